@@ -1,12 +1,13 @@
+from Velocity_driven import printHead
 import numpy as np
 
 
-def calculateQ(D, v, Noz_type):
+def calculateQ(D, v):
     """
     calculateQ is the function used to obtain the volumetric flow rate through several nozzles.
 
     Inputs:
-        D (array-like): Nozzle diameter array (alpha x 2)
+        D (array-like or PrintHead): Nozzle diameter array (alpha x 2), or a head carrying its cached areas
         v (numeric): Desired speed for all nozzles
 
     Outputs:
@@ -17,6 +18,10 @@ def calculateQ(D, v, Noz_type):
         Author: David Brzeski, Jean-François Chauvette, Raphaël Plante
             %Date: June 13, 2020 - February 13, 2024
     """
+    if isinstance(D, printHead.PrintHead):
+        # Areas cached by the head
+        return D.area * v, D.dArea * v, D.area_sum * v
+
     # Ensure inputs are valid
     if D.ndim != 2:
         raise ValueError("Input array D must be 2-dimensional")
@@ -27,30 +32,9 @@ def calculateQ(D, v, Noz_type):
     if isinstance(D, list):
         D = np.array(D)
 
-    alpha = D.shape[1]
-
-    # Initialize arrays for Q and dQ
-    Q = np.empty(alpha)
-    dQ = np.empty(alpha)
-
-    if Noz_type == 'tapered':
-        for i in range(alpha):
-            # Calculate cross-sectional area of the nozzle
-            area = np.pi * 0.25 * D[0, i] ** 2
-            Q[i] = area * v  # Calculate flow rate for each nozzle
-            # Calculate change in flow rate for each nozzle
-            dQ[i] = np.pi * 0.5 * D[0, i] * D[1, i] * v
-
-            Q_eq = Q
-
-    else:
-
-        for i in range(alpha):
-            # Calculate cross-sectional area of the nozzle
-            area = np.pi * 0.25 * D[0, i] ** 2
-            Q[i] = area * v  # Calculate flow rate for each nozzle
-            # Calculate change in flow rate for each nozzle
-            dQ[i] = np.pi * 0.5 * D[0, i] * D[1, i] * v
-            Q_eq = np.sum(Q)  # Calculate the equivalent total flow rate
+    # Calculate flow rate and its change for each nozzle (the nozzle type only matters for the resistance)
+    Q = np.pi * 0.25 * D[0, :] ** 2 * v
+    dQ = np.pi * 0.5 * D[0, :] * D[1, :] * v
+    Q_eq = np.sum(Q)  # Calculate the equivalent total flow rate
 
     return Q, dQ, Q_eq
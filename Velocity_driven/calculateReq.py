@@ -1,63 +1,148 @@
+from Velocity_driven import nozzleProfile, printHead, rheologyModels
 import numpy as np
 
+NOZZLE_TYPES = ("cyl", "tapered")
 
-def calculateReq(eta, theta, K, n, L, D, Noz_type, R):
+
+def nozzleTypes(Noz_type, alpha):
     """
-    calculateReq is the function used to obtain the equivalent hydraulic
-    resistance of several nozzles in parallel.
+    nozzleTypes returns the type of every nozzle of a head.
 
     Inputs:
-        eta (array-like): Apparent viscosity array
-        L (array-like): Nozzle length array
-        D (array-like): Nozzle diameter array
+        Noz_type (str, NozzleProfile or array-like): "cyl", "tapered" or a NozzleProfile for the whole head, or one of
+                                                     them per nozzle (alpha)
+        alpha (int): Number of nozzles
 
     Outputs:
-        R_eq (numeric): Equivalent hydraulic resistance
+        types (array-like): Type of every nozzle (alpha, object)
+    """
+    if isinstance(Noz_type, (str, nozzleProfile.NozzleProfile)):
+        types = np.empty(alpha, dtype=object)
+        types[:] = [Noz_type] * alpha
+    else:
+        types = np.empty(len(Noz_type), dtype=object)
+        types[:] = list(Noz_type)
+        types = np.broadcast_to(types, (alpha,))
+    unknown = [t for t in types if not (isinstance(t, nozzleProfile.NozzleProfile) or t in NOZZLE_TYPES)]
+    if unknown:
+        raise ValueError(f"Unknown nozzle type(s) {sorted(set(map(str, unknown)))}, expected 'cyl', 'tapered' or a "
+                         "NozzleProfile.")
+    return types
+
+
+def taperedMask(Noz_type, alpha):
+    """taperedMask returns which nozzles of a head are tapered (alpha)."""
+    return np.array([t == "tapered" for t in nozzleTypes(Noz_type, alpha)], dtype=bool)
+
+
+def _taperedPressureDrop(Q, D0, D_in, L0, theta, n, model):
+    """
+    Pressure drop of tapered nozzles (any leading axes, nozzles along the last one): a cone of half-angle theta from
+    D_in down to the outlet D0, followed by a cylindrical tip of diameter D0 when the nozzle is longer than the cone.
+    theta = 0 means that the cone spans the whole length L0, from D_in to D0.
+
+    In the lubrication approximation, every slice of the cone is a short cylinder: dP/dz = (4 / D) * tau(SR(D)), with
+    SR(D) = SR_exit * (D0 / D)^3. With u = ln(D) and dz = dD / (2 * tan(theta)), the cone gives
+    dP = 4 * L_cone * ln(D_in / D0) / (D_in - D0) * mean(tau over u), the mean being computed by Gauss-Legendre
+    quadrature (tau is smooth in u for every law). For a power law, it is the closed form
+    dP = 4 * K * L / (3 * n * (D_in - D0)) * ((3 * n + 1) * Q / (n * pi))^n * ((D0 / 2)^(-3n) - (D_in / 2)^(-3n)).
+    """
+    rabi = (3 + (1 / n)) / 4  # Weissenberg-Rabinowitsch correction
+    SR_exit = rabi * 32 * Q / (np.pi * D0 ** 3)
+    if theta > 0:
+        L_cone = np.minimum(L0, (D_in - D0) / (2 * np.tan(theta)))
+        D_in = D0 + 2 * L_cone * np.tan(theta)
+    else:
+        L_cone = L0
+    # Cylindrical tip (empty unless the nozzle is longer than its cone)
+    dP = 4 * (L0 - L_cone) / D0 * model.eta(SR_exit) * SR_exit
+
+    # ln(D_in / D0) / (D_in - D0), which tends to 1 / D0 for a cylinder
+    with np.errstate(divide='ignore', invalid='ignore'):
+        G = np.where(D_in > D0 * (1 + 1e-9), np.log(D_in / D0) / (D_in - D0), 1 / D0)
+    x, w = np.polynomial.legendre.leggauss(nozzleProfile.QUAD_NODES)
+    # Quadrature nodes along the first axis, so that per-head parameters (heads x 1 x 1) broadcast
+    t = (0.5 * (x + 1)).reshape((-1,) + (1,) * np.ndim(SR_exit))
+    SR = SR_exit * (D0 / D_in) ** (3 * t)  # D = D0 * (D_in / D0)^t
+    tau_mean = np.tensordot(0.5 * w, model.eta(SR) * SR, axes=1)
+    return dP + 4 * L_cone * G * tau_mean
+
+
+def calculateReq(Q, eta, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, Noz_type="cyl", R=0, mP=0):
+    """
+    calculateReq is the function used to obtain the equivalent hydraulic resistance of several nozzles in parallel,
+    cylindrical, tapered, of any profile, or mixed in the same head.
+
+    Every nozzle gets its own resistance Ri = dP_i / Q_i at its flow rate:
+        - cylindrical: corrected Hagen-Poiseuille resistance, Ri = rabi * 128 * L * eta / (pi D^4);
+        - tapered: the pressure drop of the cone (and of its cylindrical tip), integrated along the nozzle for the
+          material's behavior law (see _taperedPressureDrop), or the empirical law dP = R * Q^mP (MPa, mP != 0) or
+          dP = R * Q^n (Pa) when an empirical resistance R is given;
+        - NozzleProfile: the pressure drop of the profile (see nozzleProfile), D[0] only giving the exit velocity.
+    The nozzles being fed at one pressure, R_eq = 1 / sum(1 / Ri), so that P = R_eq * Q_eq + P_amb.
+
+    The nozzles are along the last axis, so leading axes (speeds, heads) are broadcast: Q[..., nozzle],
+    D[..., row, nozzle] (rows: outlet diameter, its error, inlet diameter) and L[..., row].
+
+    Inputs:
+        Q (array-like): Flow rate array
+        eta (array-like): Apparent viscosity array, at the outlet shear rate
+        D (array-like or PrintHead): Nozzle diameter array (3 x alpha), or a head carrying its cached D^4 terms
+        L (array-like): Nozzle length and its error (2)
+        theta (numeric): Half-cone angle of the tapered nozzles (0: the cone spans the whole length)
+        n, K, eta_0, eta_inf, tau_0, lmbda, a (numeric): Material rheology parameters
+        Noz_type (str, NozzleProfile or array-like): "cyl", "tapered" or a NozzleProfile, or one of them per nozzle
+        R (numeric): Empirical resistance of the tapered nozzles (0 to use the geometry)
+        mP (numeric): Empirical pressure exponent of the tapered nozzles
+
+    Outputs:
+        R_eq (numeric or array-like): Equivalent hydraulic resistance (one per leading index)
         Ri (array-like): Individual hydraulic resistance for each nozzle
 
         Author: David Brzeski, Jean-François Chauvette, Raphaël Plante
-            %Date: June 13, 2020 - February 13, 2024
+            %Date: June 13, 2020 - 2026
     """
-    eta = np.array(eta)
-    L = np.array(L)
-    D = np.array(D)
-
-    if isinstance(eta, np.ndarray) and isinstance(L, np.ndarray) and isinstance(D, np.ndarray):
-        if len(eta) != D.shape[1]:
-            raise ValueError(" Inputs eta, L and D must have the same length.")
-        # if D.shape[0] != 2:
-        #     raise ValueError(" Input D must be a matrix with 2 columns.")
-        if Noz_type == "tapered":
-            # Extract diameters from the first column of D
-            if R != 0:
-                Ri = R*np.ones(len(eta))
-                R_eq = Ri
-            else:
-
-                De = D[0, :]  # outlet diamter
-                Do = D[2, :]  # inlet diameter
-
-                # Ri = (2*K*(De**(3*n)-Do**(3*n))/(3*n*np.tan(theta)
-                #                                  )) * (((32)/(np.pi * Do**3 * De**3))**n)
-                Ri = ((4*K*L[0])/(3*n*(Do-De))) * ((3*n+1)/(n*np.pi)
-                                                   ** n) * ((De/2)**(-3*n)-(Do/2)**(-3*n))
-
-                # Calculate equivalent hydraulic resistance for nozzles in parallel
-
-                R_eq = Ri
-            # R_eq = 1/np.sum(1/Ri)
-        else:
+    Q = np.asarray(Q, dtype=float)
+    eta = np.asarray(eta, dtype=float)
+    head = D if isinstance(D, printHead.PrintHead) else None
+    D = np.asarray(D, dtype=float)
+    L = np.asarray(L, dtype=float)
+    D0 = D[..., 0, :]
+    L0 = L[..., 0]
+
+    if eta.shape[-1] != D.shape[-1]:
+        raise ValueError(" Inputs eta, L and D must have the same length.")
+    types = nozzleTypes(Noz_type, D.shape[-1])
+    tapered = np.array([t == "tapered" for t in types], dtype=bool)
 
-            # Extract diameters from the first column of D
-            diameters = D[0, :]
+    # Cylindrical nozzles
+    rabi = (3 + (1 / n)) / 4  # Weissenberg-Rabinowitsch correction
+    if head is not None:
+        Ri = rabi * L0 * eta * head.R_per_L
+    else:
+        Ri = rabi * (128 * L0 * eta) / (np.pi * D0 ** 4)
+
+    if np.any(tapered):
+        if R != 0:
+            dP = R * Q ** mP * 10 ** 6 if mP != 0 else R * Q ** n
+        else:
+            model = rheologyModels.resolveModel(n, K, eta_inf, eta_0, tau_0, lmbda, a)
+            dP = _taperedPressureDrop(Q, D0, D[..., 2, :], L0, theta, n, model)
+        Ri = np.where(tapered, dP / Q, Ri)
 
-            # Calculate individual hydraulic resistance for each nozzle
-            Ri = (128*L[0]*eta)/(np.pi*diameters**4)
+    # Nozzles with a profile, evaluated once per distinct profile for all the nozzles sharing it
+    profiles = {}
+    for i, t in enumerate(types):
+        if isinstance(t, nozzleProfile.NozzleProfile):
+            profiles.setdefault(id(t), (t, []))[1].append(i)
+    if profiles:
+        model = rheologyModels.resolveModel(n, K, eta_inf, eta_0, tau_0, lmbda, a)
+        Ri = np.array(np.broadcast_to(Ri, np.broadcast(Ri, Q).shape))
+        for profile, idx in profiles.values():
+            Q_p = Q[..., idx]
+            Ri[..., idx] = profile.pressureDrop(Q_p, n, K, eta_0, eta_inf, tau_0, lmbda, a, model) / Q_p
 
-            # Calculate equivalent hydraulic resistance for nozzles in parallel
-            R_eq = 1/np.sum(1/Ri)
-            rabi = (3 + (1 / n)) / 4   # Weissenberg-Rabinowitsch correction
-            R_eq = R_eq * rabi
-            Ri = Ri * rabi
+    # Equivalent hydraulic resistance of the nozzles in parallel
+    R_eq = 1 / np.sum(1 / Ri, axis=-1)
 
-        return R_eq, Ri
+    return R_eq, Ri
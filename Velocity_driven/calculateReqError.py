@@ -1,35 +1,95 @@
+from Velocity_driven import calculateReq, rheologyModels
 import numpy as np
 
-def calculateReqError(R_eq, Ri, alpha, D, L, eta, deta):
+
+def _taperedLogSlopes(Q, D0, D_in, L0, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a):
+    """
+    d(ln Ri)/d(D0), d(ln Ri)/d(L0) and d(ln Ri)/dK of tapered nozzles, by central differences of the pressure drop
+    quadrature of calculateReq. A nozzle whose inlet is not wider than its outlet is a cylinder: its whole bore moves
+    with D0.
+    """
+    cylinder = D_in <= D0
+
+    def lnDrop(h_D=0, h_L=0, h_K=0):
+        model = rheologyModels.resolveModel(n, K + h_K, eta_inf, eta_0, tau_0, lmbda, a)
+        return np.log(calculateReq._taperedPressureDrop(Q, D0 + h_D, np.where(cylinder, D_in + h_D, D_in), L0 + h_L,
+                                                        theta, n, model))
+
+    h_D = 1e-6 * D0
+    h_L = 1e-6 * L0
+    dlnRi_dD0 = (lnDrop(h_D=h_D) - lnDrop(h_D=-h_D)) / (2 * h_D)
+    dlnRi_dL0 = (lnDrop(h_L=h_L) - lnDrop(h_L=-h_L)) / (2 * h_L)
+    if not np.any(K):
+        return dlnRi_dD0, dlnRi_dL0, 0
+    h_K = 1e-6 * np.asarray(K, dtype=float)  # laws without consistency index (K = 0) are left as they are
+    dlnRi_dK = lnDrop(h_K=h_K) - lnDrop(h_K=-h_K)
+    return dlnRi_dD0, dlnRi_dL0, np.divide(dlnRi_dK, 2 * h_K, out=np.zeros(dlnRi_dK.shape), where=h_K != 0)
+
+
+def calculateReqError(R_eq, Ri, alpha, D, L, eta, deta, Noz_type="cyl", n=None, K=None, dK=0.1, Q=None, theta=0.0,
+                      eta_0=0, eta_inf=0, tau_0=0, lmbda=0, a=0):
     """
     calculateReqError is the function used to calculate the error in the equivalent hydraulic resistance.
 
+    The computation is vectorized over the nozzles (single O(alpha) pass, the sum of 1/Ri is computed once). The nozzles
+    are along the last axis, so leading axes (speeds, heads) are broadcast: D[..., row, nozzle] and L[..., row].
+
     Inputs:
         R_eq (numeric): Equivalent hydraulic resistance
         Ri (array-like): Individual hydraulic resistance for each nozzle
         alpha (int): Number of nozzles
-        D (array-like): Nozzle diameter array (2 x alpha)
+        D (array-like): Nozzle diameter array (3 x alpha), the third row being the inlet diameters of tapered nozzles
         L (array-like): Nozzle length array (2 x alpha)
         eta (array-like): Apparent viscosity array (1 x alpha)
         deta (array-like): Error in apparent viscosity array (1 x alpha)
+        Noz_type (str, NozzleProfile or array-like): "cyl", "tapered" or a NozzleProfile, or one of them per nozzle
+        n, K (numeric): Viscosity and consistency indexes (tapered and profiled nozzles only)
+        dK (numeric): Error in consistency index (tapered and profiled nozzles only)
+        Q (array-like): Flow rate array (tapered only)
+        theta (numeric): Half-cone angle of the tapered nozzles (tapered only, see calculateReq)
+        eta_0, eta_inf, tau_0, lmbda, a (numeric): Other rheology parameters of the material (tapered only, the default
+                                                   being a power law)
 
     Outputs:
         ReqError (numeric): Error in the equivalent hydraulic resistance
         dRi (array-like): Error in individual hydraulic resistance for each nozzle
-        
+
         Author: David Brzeski, Jean-François Chauvette, Raphaël Plante
             %Date: June 13, 2020 - February 13, 2024
     """
-    dRi = np.ones(alpha)
-    sum_terms = np.zeros(alpha)
+    D = np.asarray(D)
+    L = np.asarray(L)
+    Ri = np.asarray(Ri)
+    D0 = D[..., 0, :]
+    D1 = D[..., 1, :]
+    L0 = L[..., 0]
+    L1 = L[..., 1]
 
-    for i in range(alpha):
-        dRi[i] = (np.pi / 128) * (np.sum(1 / Ri) ** (-2)) * np.sqrt(((D[0,i] ** 2 / (eta[i] * L[0])) ** 4 * (L[0] * deta[i]) ** 2) +
-                                                                      ((eta[i] * L[1]) ** 2) +
-                                                                      16 * ((eta[i] * L[0] * D[1,i] / D[0,i])) ** 2)
-        sum_terms[i] = (dRi[i] / Ri[i] ** 2) ** 2
+    if Ri.shape[-1] != alpha:
+        raise ValueError("Input Ri must have alpha values along its last axis.")
 
-    ReqError = R_eq ** 2 * np.sqrt(np.sum(sum_terms))
+    inv_sum = np.sum(1 / Ri, axis=-1, keepdims=True)
+    dRi = (np.pi / 128) * inv_sum ** (-2) * np.sqrt(((D0 ** 2 / (eta * L0)) ** 4 * (L0 * deta) ** 2) +
+                                                    ((eta * L1) ** 2) +
+                                                    16 * ((eta * L0 * D1 / D0)) ** 2)
 
-    return ReqError, dRi
+    types = calculateReq.nozzleTypes(Noz_type, alpha)
+    tapered = np.array([t == "tapered" for t in types], dtype=bool)
+    profiled = np.array([not isinstance(t, str) for t in types], dtype=bool)
+    dK_K = np.divide(dK, K, out=np.zeros(np.shape(K)), where=np.asarray(K) != 0) if K is not None else 0
+    if np.any(profiled):
+        # The bore of a nozzle profile is taken as exact: only the consistency index contributes
+        dRi = np.where(profiled, Ri * dK_K, dRi)
+    if np.any(tapered):
+        # The error of a tapered nozzle comes from its outlet diameter, its length and the consistency index, through
+        # the pressure drop quadrature of calculateReq (material's behavior law, clipped cone inlet)
+        if Q is None:
+            raise ValueError("The flow rates Q are required for the error of tapered nozzles.")
+        dlnRi_dD0, dlnRi_dL0, dlnRi_dK = _taperedLogSlopes(np.asarray(Q, dtype=float), D0, D[..., 2, :], L0, theta, n,
+                                                           K, eta_0, eta_inf, tau_0, lmbda, a)
+        dRi = np.where(tapered, Ri * np.sqrt((dlnRi_dL0 * L1) ** 2 + (dlnRi_dD0 * D1) ** 2 + (dlnRi_dK * dK) ** 2),
+                       dRi)
+
+    ReqError = R_eq ** 2 * np.sqrt(np.sum((dRi / Ri ** 2) ** 2, axis=-1))
 
+    return ReqError, dRi
@@ -1,13 +1,14 @@
+from Velocity_driven import printHead
 import numpy as np
 
 
-def calculateSR(Q, D, v, n, Noz_type):
+def calculateSR(Q, D, v, n):
     """
     calculateSR is the function used to obtain the shear rate inside multiple nozzles.
 
     Inputs:
         Q (array-like): Flow rate array
-        D (array-like): Nozzle diameter array
+        D (array-like or PrintHead): Nozzle diameter array, or a head carrying its cached shear rate factors
         v (numeric): Desired speed for all nozzles
 
     Outputs:
@@ -17,7 +18,13 @@ def calculateSR(Q, D, v, n, Noz_type):
         Author: David Brzeski, Jean-François Chauvette, Raphaël Plante
             %Date: June 13, 2020 - February 13, 2024
     """
-    if isinstance(Q, np.ndarray) and isinstance(D, np.ndarray):
+    if isinstance(Q, np.ndarray) and isinstance(D, printHead.PrintHead):
+        if len(Q) != D.alpha:
+            raise ValueError(
+                "Input Q must have the same length as the number of rows in D.")
+        rabi = (3 + (1 / n)) / 4
+        return rabi * D.SR_per_Q * Q, D.dSR_per_v * v
+    elif isinstance(Q, np.ndarray) and isinstance(D, np.ndarray):
         # if D.shape[0] != 2:
         #     raise ValueError("Input D must be a matrix with 2 rows.")
 
@@ -29,22 +36,12 @@ def calculateSR(Q, D, v, n, Noz_type):
         if len(Q) != len(D0):
             raise ValueError(
                 "Input Q must have the same length as the number of rows in D.")
-        if Noz_type == "tapered":
-
-            SR = ((3*n+1)/n)*((8*Q)/(np.pi*D0**3))
-
-            dSR = 8 * v * D1 / D0 ** 2
-
-        else:
-            # Calculate shear rate
-            SR = 32 * Q / (np.pi * D0 ** 3)
-
-            # Calculate change in shear rate
-            dSR = 8 * v * D1 / D0 ** 2
+        # Calculate shear rate, with the Weissenberg-Rabinowitsch correction (at the outlet of tapered nozzles)
+        rabi = (3 + (1 / n)) / 4
+        SR = rabi * 32 * Q / (np.pi * D0 ** 3)
 
-            # Weissenberg-Rabinowitsch correction
-            rabi = (3 + (1 / n)) / 4
-            SR = SR * rabi
+        # Calculate change in shear rate
+        dSR = 8 * v * D1 / D0 ** 2
 
         return SR, dSR
     else:
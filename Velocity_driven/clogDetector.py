@@ -0,0 +1,150 @@
+from Velocity_driven import generatePBatch, multinozzleEmptyPressure
+import numpy as np
+
+
+class ClogDetector:
+    """
+    ClogDetector is an online estimator of nozzle diameter changes from a measured pressure stream.
+
+    Each sample (v, P_meas) gives a residual r = P_meas - multinozzleEmptyPressure(v) - P_model(v), where P_model is the
+    required pressure of the nominal head. For a change delta_i of the outlet diameter of nozzle i alone,
+    r ~= s_i(v) * delta_i, with s_i = dP/dD[0, i]. The model pressure and the sensitivities are precomputed once on a
+    velocity grid with generatePBatch, the perturbed heads (one per nozzle) being evaluated as extra heads of the same
+    batch, and are interpolated linearly for every sample.
+
+    Every nozzle hypothesis is fitted by exponentially weighted least squares (forgetting factor over a window of
+    samples), from three running sums per nozzle, so the memory stays O(alpha) whatever the length of the stream and
+    samples are ingested by chunks with array operations. The best hypothesis is the one that explains the largest part
+    of the residual energy. With a single pressure sensor, nozzles of (nearly) identical geometry have (nearly)
+    proportional sensitivities: the change is then detected reliably, but neither the nozzle nor its change can be
+    identified. When the hypotheses tied with the best one cover more than head_fraction of the nozzles, the change is
+    reported at the head level instead, as the effective relative change of all the diameters (uniform change
+    hypothesis, fitted from two more running sums). Nothing is reported before min_samples samples, nor changes of one
+    diameter or more (|relative change| >= 1), which are outside the linearization (e.g. a fit on a few samples far
+    from the model).
+
+    Inputs:
+        rho, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP: Model inputs (see generatePBatch),
+                                                                                       D being one head (3 x alpha)
+        v_range (tuple): Velocity range of the grid (mm/s); samples outside of it are ignored
+        n_grid (int): Number of grid velocities
+        window (numeric): Memory of the estimator, in samples (forgetting factor exp(-1 / window))
+        threshold (numeric): Relative diameter change reported as a clog (negative) or wear (positive)
+        min_explained (numeric): Part of the residual energy the best hypothesis must explain to be reported
+        min_samples (int): Number of samples ingested before anything is reported
+        head_fraction (numeric): Part of the nozzles tied with the best hypothesis above which the change is reported
+                                 at the head level
+        rel_step (numeric): Relative diameter step of the finite difference sensitivities
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+
+    def __init__(self, rho, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type="cyl", R=0, mP=0,
+                 v_range=(10, 300), n_grid=256, window=5000, threshold=0.05, min_explained=0.5, min_samples=100,
+                 head_fraction=0.5, rel_step=1e-4):
+        D = np.asarray(D, dtype=float)
+        if D.ndim != 2:
+            raise ValueError("Input array D must be 2-dimensional (3 x alpha).")
+        alpha = D.shape[1]
+        self.D0 = D[0].copy()
+        self.v_grid = np.linspace(v_range[0], v_range[1], n_grid)
+
+        # Nominal head followed by one head per perturbed nozzle, in a single batch
+        heads = np.repeat(D[np.newaxis], alpha + 1, axis=0)
+        step = rel_step * D[0]
+        heads[np.arange(1, alpha + 1), 0, np.arange(alpha)] += step
+        P = generatePBatch.generatePBatch(rho, self.v_grid, heads, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a,
+                                          P_amb, Noz_type, R, mP)[0]
+        self.P_model = P[0] + multinozzleEmptyPressure.multinozzleEmptyPressure(self.v_grid, 0)
+        self.sensitivity = (P[1:] - P[0]) / step[:, np.newaxis]  # alpha x n_grid
+
+        self.forgetting = np.exp(-1 / window)
+        self.threshold = threshold
+        self.min_explained = min_explained
+        self.min_samples = min_samples
+        self.head_fraction = head_fraction
+        self.reset()
+
+    def reset(self):
+        """Forgets every sample seen so far."""
+        alpha = self.D0.size
+        self.ss = np.zeros(alpha)  # weighted sum of s_i^2
+        self.sr = np.zeros(alpha)  # weighted sum of s_i * r
+        self.rr = 0.0  # weighted sum of r^2
+        self.hh = 0.0  # weighted sum of h^2, h = sum_i s_i * D0_i being the sensitivity to a uniform relative change
+        self.hr = 0.0  # weighted sum of h * r
+        self.samples = 0
+
+    def update(self, v, P_meas):
+        """Ingests a chunk of samples (velocities in mm/s, measured pressures in Pa)."""
+        v = np.asarray(v, dtype=float)
+        P_meas = np.asarray(P_meas, dtype=float)
+
+        # Linear interpolation on the grid: one index and weight per sample, shared by every nozzle
+        u = (v - self.v_grid[0]) / (self.v_grid[1] - self.v_grid[0])
+        valid = (u >= 0) & (u <= self.v_grid.size - 1) & np.isfinite(P_meas)
+        u = u[valid]
+        idx = np.minimum(u.astype(np.intp), self.v_grid.size - 2)
+        t = u - idx
+        P_model = (1 - t) * self.P_model[idx] + t * self.P_model[idx + 1]
+        s = (1 - t) * self.sensitivity[:, idx] + t * self.sensitivity[:, idx + 1]
+        r = P_meas[valid] - P_model
+        ok = np.isfinite(r) & np.all(np.isfinite(s), axis=0)  # non laminar grid speeds are NaN
+        r, s = r[ok], s[:, ok]
+
+        # Exponentially weighted sums, the newest sample having weight 1
+        m = r.size
+        decay = self.forgetting ** m
+        w = self.forgetting ** np.arange(m - 1, -1, -1)
+        self.ss = decay * self.ss + (s * s) @ w
+        self.sr = decay * self.sr + s @ (w * r)
+        self.rr = decay * self.rr + np.dot(w, r * r)
+        h = self.D0 @ s
+        self.hh = decay * self.hh + np.dot(w, h * h)
+        self.hr = decay * self.hr + np.dot(w, h * r)
+        self.samples += m
+
+    @property
+    def delta(self):
+        """Estimated outlet diameter change of every nozzle, each taken as the only changed one (mm)."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.ss > 0, self.sr / self.ss, 0.0)
+
+    @property
+    def explained(self):
+        """Part of the residual energy explained by each single nozzle hypothesis (0 to 1)."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where((self.ss > 0) & (self.rr > 0), self.sr ** 2 / (self.ss * self.rr), 0.0)
+
+    @property
+    def headChange(self):
+        """Effective relative change of the head diameters, all taken as changed by the same fraction."""
+        return self.hr / self.hh if self.hh > 0 else 0.0
+
+    def suspects(self, tie=1e-3):
+        """
+        suspects returns the nozzles whose diameter most likely changed, with their relative diameter change. Nozzles
+        whose hypothesis explains the residual as well as the best one (within tie) are all returned. When they cover
+        more than head_fraction of the head, the nozzles cannot be told apart: nozzles is None and the effective
+        relative change of the head (headChange) is returned instead. Nothing is returned before min_samples samples,
+        and changes of one diameter or more are rejected.
+
+        Outputs:
+            nozzles (array-like): Indices of the suspected nozzles (empty when nothing is detected, None for a change
+                                  detected at the head level)
+            relative_change (array-like or numeric): Estimated relative diameter change of these nozzles, or of the head
+        """
+        none = np.array([], dtype=int), np.array([])
+        if self.samples < self.min_samples:
+            return none
+        explained = self.explained
+        relative = self.delta / self.D0
+        best = np.argmax(explained)
+        if explained[best] < self.min_explained or not self.threshold <= abs(relative[best]) < 1:
+            return none
+        nozzles = np.flatnonzero((explained >= explained[best] - tie) & (np.abs(relative) >= self.threshold)
+                                 & (np.abs(relative) < 1))
+        if nozzles.size > self.head_fraction * self.D0.size:
+            return None, self.headChange
+        return nozzles, relative[nozzles]
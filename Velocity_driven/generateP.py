@@ -1,12 +1,9 @@
-from Velocity_driven import calculateQ, calculatePrequired, calculateReq, calculateReqError, calculateSR, calculateVisco, validateReynolds
+from Velocity_driven import calculateQ, calculatePrequired, calculateReq, calculateReqError, calculateSR, calculateVisco, profiling, validateReynolds
 from tools import printTableInConsole
-import os
-import sys
+import logging
 import numpy as np
 
-# Add the MEPM directory to the Python path
-mepm_path = r"C:\Users\anirb\OneDrive\Desktop\Additive Nozzle Manufacturing\CODE FOR MEPM"
-sys.path.append(mepm_path)
+logger = logging.getLogger(__name__)
 
 
 def generateP(rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP, debug_mode):
@@ -18,8 +15,10 @@ def generateP(rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb,
     Inputs:
         rho (numeric): Density
         v (numeric): Nozzle exit velocity
-        D (array-like): Nozzle diameter array along with the error for each diameter
+        D (array-like or PrintHead): Nozzle diameter array along with the error for each diameter, or a head whose
+                                     cached invariants are used (see printHead)
         L (array-like): Nozzle length array along with the error for each length of nozzle
+        theta (numeric): Half-cone angle of the tapered nozzles
         n (numeric): Viscosity index
         K (numeric): Consistency index
         eta_0 (numeric): Rest-state viscosity
@@ -28,6 +27,9 @@ def generateP(rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb,
         lmbda (numeric): Relaxation time
         a (numeric): Carreau model exponent
         P_amb (numeric): Ambient pressure
+        Noz_type (str, NozzleProfile or array-like): Type of the nozzles, or one per nozzle (see calculateReq)
+        R (numeric): Empirical resistance of the tapered nozzles (0 to use the geometry)
+        mP (numeric): Empirical pressure exponent of the tapered nozzles
         debug_mode (bool): Flag for printing debug information
 
     Outputs:
@@ -44,59 +46,60 @@ def generateP(rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb,
         Date: June 13, 2020 - February 13, 2024
     """
 
-    print('------------------------------------------------------------------------------------------------')
-    print(f'Desired nozzle exit speed (mm/s) = {v:.2f}\n')
+    logger.debug('Desired nozzle exit speed (mm/s) = %.2f', v)
 
     # Flows computation
-    Q, dQ, Q_eq = calculateQ.calculateQ(D, v, Noz_type)
+    with profiling.stage('generateP/flow'):
+        Q, dQ, Q_eq = calculateQ.calculateQ(D, v)
 
     if debug_mode:
-        print(f'Total equivalent Q (mm³/s) = {np.mean(Q_eq):.2f}')
-        print('Volumetric flow rates (mm³/s):')
-        printTableInConsole.printTableInConsole(Q)
+        logger.debug('Total equivalent Q (mm³/s) = %.2f', Q_eq)
+        printTableInConsole.printTableInConsole(Q, 'Volumetric flow rates (mm³/s):', logger)
 
     # Shear rate computation
-    SR, dSR = calculateSR.calculateSR(Q, D, v, n, Noz_type)
+    with profiling.stage('generateP/shearRate'):
+        SR, dSR = calculateSR.calculateSR(Q, D, v, n)
 
     if debug_mode:
-        print('Shear rates (1/s):')
-        printTableInConsole.printTableInConsole(SR)
+        printTableInConsole.printTableInConsole(SR, 'Shear rates (1/s):', logger)
 
     # Viscosity computation
-    eta, deta = calculateVisco.calculateVisco(
-        SR, n, K, eta_inf, eta_0, tau_0, lmbda, a, debug_mode, dSR)
+    with profiling.stage('generateP/viscosity'):
+        eta, deta = calculateVisco.calculateVisco(
+            SR, n, K, eta_inf, eta_0, tau_0, lmbda, a, debug_mode, dSR)
 
     if debug_mode:
-        print('Viscosities (Pa.s):')
-        printTableInConsole.printTableInConsole(eta)
+        printTableInConsole.printTableInConsole(eta, 'Viscosities (Pa.s):', logger)
 
     # Reynolds number hypothesis validation
-    typeEcoul, Re = validateReynolds.validateReynolds(
-        rho, v, D, eta, debug_mode)
+    with profiling.stage('generateP/reynolds'):
+        typeEcoul, Re = validateReynolds.validateReynolds(
+            rho, v, np.asarray(D), eta, debug_mode)
 
     if debug_mode:
-        print('Reynold numbers:')
-        printTableInConsole.printTableInConsole(Re)
+        printTableInConsole.printTableInConsole(Re, 'Reynold numbers:', logger)
 
     if typeEcoul == 0:  # Laminar flow
 
         # Equivalent flow resistance computation
-        R_eq, Ri = calculateReq.calculateReq(
-            eta, theta, K, n, L, D, Noz_type, R)
+        with profiling.stage('generateP/resistance'):
+            R_eq, Ri = calculateReq.calculateReq(
+                Q, eta, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, Noz_type, R, mP)
 
-        R_eq_error, dRi = calculateReqError.calculateReqError(
-            R_eq, Ri, D.shape[1], D, L, eta, deta)
+        with profiling.stage('generateP/error'):
+            R_eq_error, dRi = calculateReqError.calculateReqError(
+                R_eq, Ri, D.shape[1], D, L, eta, deta, Noz_type, n, K, Q=Q, theta=theta, eta_0=eta_0, eta_inf=eta_inf,
+                tau_0=tau_0, lmbda=lmbda, a=a)
 
         if debug_mode:
             # print(f'Total equivalent R (Pa.s/mm³) = {R_eq:.2f}')
-            print('Individual flow resistances (Pa.s/mm³):')
-            printTableInConsole.printTableInConsole(Ri)
+            printTableInConsole.printTableInConsole(Ri, 'Individual flow resistances (Pa.s/mm³):', logger)
 
         # Required pressure computation
-        P = calculatePrequired.calculatePrequired(
-            R_eq, Q_eq, P_amb, n, mP, Noz_type)
-        dP = np.sqrt((R_eq_error * Q_eq)**2 + (R_eq * np.sum(dQ))**2)
-        print(f'Required pressure (Pa) = {P:.0f}')
+        with profiling.stage('generateP/pressure'):
+            P = calculatePrequired.calculatePrequired(R_eq, Q_eq, P_amb)
+            dP = np.sqrt((R_eq_error * Q_eq)**2 + (R_eq * np.sum(dQ))**2)
+        logger.info('v = %.2f mm/s: required pressure (Pa) = %.0f', v, P, extra={'v': v, 'P': P, 'dP': dP})
     else:  # Transition flow, turbulent flow or negative Reynolds
         P = np.nan
         eta = np.nan
@@ -0,0 +1,158 @@
+from Velocity_driven import calculateReq, calculateReqError, calculateVisco, printHead, profiling
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _perHead(x, nh):
+    """Reshapes a per-head material parameter so that it broadcasts against (heads x speeds x nozzles) arrays."""
+    if np.ndim(x) == 0:
+        return x
+    x = np.asarray(x, dtype=float)
+    if x.size != nh:
+        raise ValueError("Material parameters given per head must have one value per head.")
+    return x.reshape(nh, 1, 1)
+
+
+def generatePBatch(rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP, debug_mode=False):
+    """
+    generatePBatch is the vectorized counterpart of generateP. Instead of being called once per speed, it evaluates a whole
+    velocity sweep (and optionally several printing heads) in a single pass using NumPy broadcasting. Every intermediate
+    quantity is carried as a (heads x speeds x nozzles) array, so a 1000-point sweep costs one evaluation of each stage
+    (flow, shear rate, viscosity, Reynolds, resistance, error, pressure) instead of 1000 calls to generateP.
+
+    The equations are the same as calculateQ, calculateSR, calculateVisco, validateReynolds, calculateReq,
+    calculateReqError and calculatePrequired. Speeds for which the flow is not laminar in every nozzle are set to NaN,
+    like generateP does.
+
+    Inputs:
+        rho (numeric): Density
+        v (array-like): Nozzle exit velocities (nv)
+        D (array-like or PrintHead): Nozzle diameter array (3 x alpha), a stack of heads (nh x 3 x alpha), or a head
+                                     whose cached invariants (areas, D^3, D^4) are used (see printHead)
+        L (array-like): Nozzle length and its error (2), or one per head (nh x 2)
+        theta (numeric): Half-cone angle of the tapered nozzles
+        n, K, eta_0, eta_inf, tau_0, lmbda, a (numeric): Material rheology parameters, scalars or one value per head (nh)
+        P_amb (numeric): Ambient pressure
+        Noz_type (str, NozzleProfile or array-like): Type of the nozzles, or one per nozzle (see calculateReq)
+        R (numeric): Empirical resistance of the tapered nozzles (0 to use the geometry)
+        mP (numeric): Empirical pressure exponent of the tapered nozzles
+        debug_mode (bool): Flag for printing debug information
+
+    Outputs (the head axis is dropped when D is 2-dimensional):
+        P (array-like): Required pressure (nh x nv)
+        eta (array-like): Viscosity array (nh x nv x alpha)
+        SR (array-like): Shear rate array (nh x nv x alpha)
+        Q (array-like): Flow rate array (nh x nv x alpha)
+        deta (array-like): Error in viscosity array (nh x nv x alpha)
+        dP (array-like): Error in required pressure, broadcast per nozzle (nh x nv x alpha)
+        dRi (array-like): Error in individual hydraulic resistance array (nh x nv x alpha)
+        dSR (array-like): Error in shear rate array (nh x nv x alpha)
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+    v = np.atleast_1d(np.asarray(v, dtype=float))
+    head = D if isinstance(D, printHead.PrintHead) else None
+    D = np.asarray(D, dtype=float)
+    L = np.asarray(L, dtype=float)
+
+    if v.ndim != 1:
+        raise ValueError("Input v must be a 1-dimensional array of velocities.")
+    if D.ndim == 2:
+        single_head = True
+        D = D[np.newaxis]
+    elif D.ndim == 3:
+        single_head = False
+    else:
+        raise ValueError("Input array D must be 2-dimensional (one head) or 3-dimensional (several heads).")
+    if np.any(v <= 0):
+        raise ValueError("Velocities must be strictly positive.")
+
+    L = np.broadcast_to(L, (D.shape[0], 2))
+    n, K, eta_0, eta_inf, tau_0, lmbda, a = (_perHead(x, D.shape[0]) for x in (n, K, eta_0, eta_inf, tau_0, lmbda, a))
+
+    # Broadcast everything as (heads, speeds, nozzles)
+    D0 = D[:, np.newaxis, 0, :]
+    D1 = D[:, np.newaxis, 1, :]
+    vv = v[np.newaxis, :, np.newaxis]
+
+    # Flows computation (calculateQ)
+    with profiling.stage('generatePBatch/flow'):
+        if head is not None:
+            Q = head.area * vv
+            dQ = head.dArea * vv
+        else:
+            Q = np.pi * 0.25 * D0 ** 2 * vv
+            dQ = np.pi * 0.5 * D0 * D1 * vv
+
+    # Shear rate computation (calculateSR)
+    with profiling.stage('generatePBatch/shearRate'):
+        rabi = (3 + (1 / n)) / 4  # Weissenberg-Rabinowitsch correction
+        if head is not None:
+            dSR = head.dSR_per_v * vv
+            SR = rabi * head.SR_per_Q * Q
+        else:
+            dSR = 8 * vv * D1 / D0 ** 2
+            SR = rabi * 32 * Q / (np.pi * D0 ** 3)
+
+    # Viscosity computation (calculateVisco works element-wise on any shape)
+    with profiling.stage('generatePBatch/viscosity'):
+        eta, deta = calculateVisco.calculateVisco(
+            SR, n, K, eta_inf, eta_0, tau_0, lmbda, a, debug_mode, dSR)
+        eta = np.broadcast_to(eta, SR.shape)
+        deta = np.broadcast_to(deta, SR.shape)
+
+    # Reynolds number hypothesis validation (validateReynolds), one verdict per head and speed
+    with profiling.stage('generatePBatch/reynolds'):
+        if rho == 0:
+            logger.info('Reynolds validation is skipped since rho = 0. Update material database to activate Reynolds '
+                        'validation.')
+            laminar = np.ones(SR.shape[:2], dtype=bool)
+        else:
+            Re = rho * vv * D0 / eta / 1e6
+            laminar = np.all((Re > 0) & (Re < 100), axis=-1)
+            for h, k in zip(*np.nonzero(~laminar)):
+                transition = np.where((Re[h, k] >= 100) & (Re[h, k] <= 2500))[0]
+                turbulent = np.where(Re[h, k] > 2500)[0]
+                if transition.size:
+                    logger.warning('v = %.2f mm/s: the flow is in the transition zone for nozzles # %s', v[k], transition,
+                                   extra={'v': v[k], 'nozzles': transition})
+                elif turbulent.size:
+                    logger.warning('v = %.2f mm/s: the flow is turbulent for nozzles # %s', v[k], turbulent,
+                                   extra={'v': v[k], 'nozzles': turbulent})
+                else:
+                    logger.warning('v = %.2f mm/s: Reynolds is negative', v[k], extra={'v': v[k]})
+
+    # Equivalent flow resistance computation (calculateReq)
+    with profiling.stage('generatePBatch/resistance'):
+        R_eq, Ri = calculateReq.calculateReq(Q, eta, D[:, np.newaxis] if head is None else head,
+                                             L[:, np.newaxis, np.newaxis], theta, n, K, eta_0, eta_inf, tau_0, lmbda, a,
+                                             Noz_type, R, mP)
+        Q_eq = np.sum(Q, axis=-1)
+
+    # Error on the equivalent flow resistance
+    with profiling.stage('generatePBatch/error'):
+        R_eq_error, dRi = calculateReqError.calculateReqError(
+            R_eq, Ri, D.shape[-1], D[:, np.newaxis], L[:, np.newaxis, np.newaxis], eta, deta, Noz_type, n, K, Q=Q,
+            theta=theta, eta_0=eta_0, eta_inf=eta_inf, tau_0=tau_0, lmbda=lmbda, a=a)
+
+    # Required pressure computation (calculatePrequired)
+    with profiling.stage('generatePBatch/pressure'):
+        P = R_eq * Q_eq + P_amb
+        dP = np.sqrt((R_eq_error * Q_eq) ** 2 + (R_eq * np.sum(dQ, axis=-1)) ** 2)
+        dP = np.broadcast_to(dP[..., np.newaxis], SR.shape)
+
+    # Transition flow, turbulent flow or negative Reynolds
+    P = np.where(laminar, P, np.nan)
+    mask = laminar[..., np.newaxis]
+    eta, SR, Q, deta, dP, dRi, dSR = (np.where(mask, x, np.nan) for x in (eta, SR, Q, deta, dP, dRi, dSR))
+
+    if debug_mode:
+        for k in range(v.size):
+            logger.debug('Desired nozzle exit speed (mm/s) = %.2f, required pressure (Pa) = %s', v[k], P[:, k])
+
+    if single_head:
+        return P[0], eta[0], SR[0], Q[0], deta[0], dP[0], dRi[0], dSR[0]
+    return P, eta, SR, Q, deta, dP, dRi, dSR
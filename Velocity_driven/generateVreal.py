@@ -1,75 +1,93 @@
-from MEPM import calculateQ, calculatePrequired, calculateReq, calculateReqError, calculateSR, calculateVisco, validateReynolds
+from Velocity_driven import calculateVisco, profiling, solveVreal, validateReynolds
 from tools import printTableInConsole
+import logging
 import numpy as np
-import os
-import sys
 
-mepm_path = r"C:\Users\anirb\OneDrive\Desktop\Additive Nozzle Manufacturing\CODE FOR MEPM"
-sys.path.append(mepm_path)
+logger = logging.getLogger(__name__)
 
 
 def generate_V_real(P, dP, Q, rho, v, D, L, n, K, eta_0, eta_inf, tau_0, lambda_, a, P_amb, debug_mode):
-    print('\n-----------------------True Velocity calculation -----------------------')
-    print(f'Desired nozzle exit speed (mm/s) = {v: .2f}')
-    print(f'Real applied pressure (Pa) = {P:.0f}\n')
-
-    Q_real = np.zeros(D.shape[1])
-    eta_real = np.zeros(D.shape[1])
-    Q_theo = np.zeros(D.shape[1])
-    dQ_crit = 10**-4
-
-    rabi = (3+(1/n))/4
-
-    for i in range(D.shape[1]):
-        variation_Q = dQ_crit+1
-        nbIter = 0
-        Q_guess = Q[i]
-
-        if debug_mode:
-            print(f'<strong>Nozzle #{i+1} -----------------------</strong>')
-            print(f'Starting Q_guess (mm³/s) = {Q_guess:.4f}')
-
-        while variation_Q >= dQ_crit:
-            nbIter += 1
-            if debug_mode:
-                print(f'Iteration Velocity #{nbIter}')
-
-            SR_temp = calculateSR.calculateSR(Q_guess, D[:, i], 0)
-            SR_temp *= rabi
-            eta_temp, deta_temp = calculateVisco.calculateVisco(
-                SR_temp, n, K, eta_inf, eta_0, tau_0, lambda_, a, debug_mode, 0)
-            _, Ri = calculateReq.calculateReq(eta_temp, L[0], D[:, i])
-            Ri *= rabi
-            _, dRi = calculateReqError.calculateReqError(
-                0, Ri, 1, D[:, i], L[0], eta_temp, deta_temp)
-            Q_temp = (P - P_amb)/Ri
-            dQ_temp = (dP/Ri)**2 + ((P - P_amb)*dRi/Ri**2)**2
-            variation_Q = abs(Q_temp - Q_guess) / Q_guess
-            Q_guess = Q_temp
-
-            if debug_mode:
-                print(f'Q_temp_{nbIter} (mm³/s) = {Q_temp:.4f}')
-                print(f'dQ_{nbIter} = {variation_Q:.8f}')
-
-        Q_real[i] = Q_temp
-        Q_theo[i] = (np.pi * n / (3 * n + 1)) * (D[0, i] / 2)**((1 + 3 * n) / n) * \
-            ((P - P_amb + rho * 9.81 * L[0] / 1000) / (2 * K * L[0]))**(1/n)
-        Q_guess_error = dQ_temp
-        eta_real = eta_temp
+    """
+    generate_V_real computes the true exit velocity of every nozzle for the pressure really applied to the head. All the
+    nozzles are solved at once by solveVreal: in closed form for the laws whose wall stress can be inverted (power law,
+    Newtonian, Bingham, Herschel-Bulkley, Casson), otherwise by a safeguarded Newton iteration with an iteration cap,
+    starting from the desired flow rates Q.
+
+    Inputs:
+        P (numeric): Applied pressure
+        dP (numeric): Error in applied pressure
+        Q (array-like): Desired flow rate array, used as starting point
+        rho (numeric): Density
+        v (numeric): Desired nozzle exit velocity
+        D (array-like): Nozzle diameter array along with the error for each diameter
+        L (array-like): Nozzle length array along with the error for each length of nozzle
+        n, K, eta_0, eta_inf, tau_0, lambda_, a (numeric): Material rheology parameters
+        P_amb (numeric): Ambient pressure
+        debug_mode (bool): Flag for printing debug information
+
+    Nozzles below their yield pressure (yield-stress materials at a low pressure) do not flow: their velocity, flow rate
+    and errors are 0.
+
+    Outputs:
+        v_real (array-like): Real nozzle exit velocities
+        Q_real (array-like): Real nozzle flow rates
+        dv_real (array-like): Error in real nozzle exit velocities
+        Q_theo (array-like): Analytic power-law flow rates
+
+    Author: Jean-François Chauvette, Raphaël Plante
+    Date: June 13, 2020 - 2026
+    """
+    logger.info('True velocity calculation: desired nozzle exit speed (mm/s) = %.2f, real applied pressure (Pa) = %.0f',
+                v, P, extra={'v': v, 'P': P})
+
+    with profiling.stage('generate_V_real/solve'):
+        v_real, Q_real, nbIter, converged = solveVreal.solveVreal(
+            P, D, L, n, K, eta_0, eta_inf, tau_0, lambda_, a, P_amb, Q_guess=Q, debug_mode=debug_mode)
+    profiling.count('generate_V_real/iterations', int(np.max(nbIter, initial=0)))
 
-    v_real = Q_real/(0.25*np.pi*D[0, :]**2)
-    dv_real = ((Q_guess_error / (np.pi * 4 * D[0, :]**2))**2) + (
-        (D[1, :] * Q_temp) / (np.pi * 4 * D[0, :]**3))**3
+    if debug_mode:
+        printTableInConsole.printTableInConsole(nbIter, 'Iterations per nozzle:', logger)
+    if not np.all(converged):
+        logger.warning('Real velocity did not converge for nozzles # %s', np.where(~converged)[0],
+                       extra={'nozzles': np.where(~converged)[0]})
+
+    with profiling.stage('generate_V_real/error'):
+        # Viscosity and resistance at the converged flow rates. Nozzles below their yield pressure do not flow (Q = 0):
+        # their viscosity is undefined (NaN), their resistance infinite and their velocity exactly 0.
+        flowing = Q_real > 0
+        rabi = (3 + (1 / n)) / 4
+        SR_real = rabi * 32 * Q_real / (np.pi * D[0, :] ** 3)
+        eta_real = np.full(np.shape(Q_real), np.nan)
+        deta_real = np.full(np.shape(Q_real), np.nan)
+        if np.any(flowing):
+            eta_real[flowing], deta_real[flowing] = calculateVisco.calculateVisco(
+                SR_real[flowing], n, K, eta_inf, eta_0, tau_0, lambda_, a, debug_mode)
+        Ri = np.where(flowing, rabi * (128 * L[0] * eta_real) / (np.pi * D[0, :] ** 4), np.inf)
+
+        # Error on each nozzle, taken alone (calculateReqError with alpha = 1)
+        with np.errstate(invalid='ignore'):
+            dRi = (np.pi / 128) * Ri ** 2 * np.sqrt(((D[0, :] ** 2 / (eta_real * L[0])) ** 4 * (L[0] * deta_real) ** 2)
+                                                    + ((eta_real * L[1]) ** 2) +
+                                                    16 * ((eta_real * L[0] * D[1, :] / D[0, :])) ** 2)
+            dQ_real = np.where(flowing, (dP / Ri) ** 2 + ((P - P_amb) * dRi / Ri ** 2) ** 2, 0.0)
+
+        Q_theo = (np.pi * n / (3 * n + 1)) * (D[0, :] / 2)**((1 + 3 * n) / n) * \
+            ((P - P_amb + rho * 9.81 * L[0] / 1000) / (2 * K * L[0]))**(1/n)
 
-    print('Real nozzle exit velocities (mm/s):')
-    printTableInConsole.print_table_in_console(v_real)
+        dv_real = ((dQ_real / (np.pi * 4 * D[0, :]**2))**2) + (
+            (D[1, :] * Q_real) / (np.pi * 4 * D[0, :]**3))**3
 
-    print('Real nozzle exit flow rates (mm³/s):')
-    printTableInConsole.print_table_in_console(Q_real)
+    printTableInConsole.printTableInConsole(v_real, 'Real nozzle exit velocities (mm/s):', logger, logging.INFO)
+    printTableInConsole.printTableInConsole(Q_real, 'Real nozzle exit flow rates (mm³/s):', logger, logging.INFO)
 
-    _, Re = validateReynolds(rho, v_real, D, eta_real, debug_mode)
+    if not np.all(flowing):
+        logger.info('Nozzles # %s do not flow: the applied pressure is below their yield pressure',
+                    np.where(~flowing)[0], extra={'nozzles': np.where(~flowing)[0]})
+    Re = np.zeros(np.shape(Q_real))
+    if np.any(flowing):
+        _, Re[flowing] = validateReynolds.validateReynolds(rho, v_real[flowing], D[0, :][flowing], eta_real[flowing],
+                                                           debug_mode)
     if debug_mode:
-        print('Reynold numbers:')
-        printTableInConsole.print_table_in_console(Re)
+        printTableInConsole.printTableInConsole(Re, 'Reynold numbers:', logger)
 
     return v_real, Q_real, dv_real, Q_theo
@@ -0,0 +1,251 @@
+from Velocity_driven import rheologyModels, solveVreal
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+AMBIENT = 0  # Node of the nozzle outlets, held at the ambient pressure
+
+
+class HydraulicNetwork:
+    """
+    HydraulicNetwork is a general hydraulic model of a printhead: barrel, distribution channels, contractions and
+    nozzles are the edges of a graph whose nodes are junctions, so that heads whose nozzles are not fed at one common
+    pressure (manifold trees, long distribution channels) can be modeled.
+
+    Every edge is a cylindrical duct of the generalized Newtonian material, with the law of calculateReq:
+    dP = (4 * L / D) * tau(SR), SR being the Weissenberg-Rabinowitsch corrected wall shear rate and tau = eta(SR) * SR
+    the wall stress of the behavior law (rheologyModels). Contractions are split into short cylindrical segments in
+    series (lubrication approximation). Edges below the yield stress do not flow.
+
+    The node pressures are solved by Newton iteration on the flow balance of every free node. With the incidence
+    matrix B (nodes x edges), the flows are Q = q(B^T p) and the Jacobian of the balance B Q - Q_in is the weighted
+    graph Laplacian B diag(dq/d(dP)) B^T, which is sparse (a few entries per node) and symmetric. It is solved with
+    scipy.sparse when SciPy is installed, and densely otherwise. The edge flows at given pressure drops are obtained for
+    all edges at once with solveVreal (each edge being a single nozzle head), warm started from the previous iteration.
+    Steps are halved until the flow imbalance decreases.
+
+    Example, a barrel feeding two nozzles through a manifold channel at a given piston flow rate:
+        network = HydraulicNetwork(n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb)
+        piston = network.addNode(Q_in=Q)
+        manifold = network.addNode()
+        network.addChannel(piston, manifold, d_p, L_p)
+        network.addNozzle(manifold, D, L)
+        network.addNozzle(manifold, D, L)
+        p, Q, nbIter, converged = network.solve()
+
+    Inputs:
+        n, K, eta_0, eta_inf, tau_0, lmbda, a (numeric): Material rheology parameters
+        P_amb (numeric): Ambient pressure
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+
+    def __init__(self, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb):
+        self.law = (n, K, eta_0, eta_inf, tau_0, lmbda, a)
+        self.model = rheologyModels.resolveModel(n, K, eta_inf, eta_0, tau_0, lmbda, a)
+        self.rabi = (3 + (1 / n)) / 4  # Weissenberg-Rabinowitsch correction
+        self.P_amb = P_amb
+        self.fixed = [P_amb]  # imposed pressure of every node, None for free nodes
+        self.Q_in = [0.0]  # flow rate injected at every node
+        self.tail, self.head, self.D, self.L = [], [], [], []
+        self.nozzles = []
+        self.p = None
+        self.Q = None
+
+    @property
+    def nbNodes(self):
+        return len(self.fixed)
+
+    @property
+    def nbEdges(self):
+        return len(self.tail)
+
+    def addNode(self, P=None, Q_in=0.0):
+        """
+        Adds a junction and returns its index.
+
+        Inputs:
+            P (numeric): Imposed pressure (pressure-driven inlet), None for a free node
+            Q_in (numeric): Flow rate injected at the node (piston of a velocity-driven inlet)
+        """
+        self.fixed.append(P)
+        self.Q_in.append(float(Q_in))
+        return self.nbNodes - 1
+
+    def addChannel(self, i, j, D, L):
+        """Adds a cylindrical channel of diameter D and length L from node i to node j and returns its edge index."""
+        if D <= 0 or L <= 0:
+            raise ValueError("Channel diameters and lengths must be positive.")
+        for node in (i, j):
+            if not 0 <= node < self.nbNodes:
+                raise ValueError(f"Node {node} does not exist.")
+        self.tail.append(i)
+        self.head.append(j)
+        self.D.append(float(D))
+        self.L.append(float(L))
+        return self.nbEdges - 1
+
+    def addContraction(self, i, j, D_in, D_out, L, segments=8):
+        """
+        Adds a conical contraction (or expansion) from node i (diameter D_in) to node j (diameter D_out), made of
+        segments cylindrical channels in series, and returns the edge indices of the segments.
+        """
+        x = (np.arange(segments) + 0.5) / segments
+        diameters = D_in + (D_out - D_in) * x  # diameter at the middle of every segment
+        nodes = [i] + [self.addNode() for _ in range(segments - 1)] + [j]
+        return [self.addChannel(nodes[s], nodes[s + 1], diameters[s], L / segments) for s in range(segments)]
+
+    def addNozzle(self, i, D, L, D_in=None, segments=8):
+        """
+        Adds a nozzle from node i to the ambient pressure and returns the index of its outlet edge. The nozzle is
+        cylindrical (diameter D), or tapered from D_in down to D.
+        """
+        if D_in is None:
+            edge = self.addChannel(i, AMBIENT, D, L)
+        else:
+            edge = self.addContraction(i, AMBIENT, D_in, D, L, segments)[-1]
+        self.nozzles.append(edge)
+        return edge
+
+    def _edgeFlows(self, dP, Q_guess):
+        """Flow rates of all edges at the pressure drops dP, and their derivatives dQ/d(dP)."""
+        n, K, eta_0, eta_inf, tau_0, lmbda, a = self.law
+        D = np.zeros((self.nbEdges, 3, 1))
+        D[:, 0, 0] = self._D
+        L = np.stack((self._L, np.zeros(self.nbEdges)), axis=1)
+        _, Q, _, _ = solveVreal.solveVreal(np.abs(dP)[:, np.newaxis], D, L, n, K, eta_0, eta_inf, tau_0, lmbda, a, 0,
+                                           Q_guess=np.abs(Q_guess)[:, np.newaxis, np.newaxis])
+        Q = Q[:, 0, 0]
+
+        # dP = (4 * L / D) * tau(SR) and SR = SR_per_Q * Q, so dQ/d(dP) = D / (4 * L * SR_per_Q * tau'(SR))
+        SR_per_Q = self.rabi * 32 / (np.pi * self._D ** 3)
+        SR = SR_per_Q * Q
+        flowing = Q > 0
+        dQ = np.zeros(self.nbEdges)
+        eta, slope = self.model.etaSlope(SR[flowing])
+        dQ[flowing] = self._D[flowing] / (4 * self._L[flowing] * SR_per_Q[flowing] * (eta + SR[flowing] * slope))
+        return np.sign(dP) * Q, dQ
+
+    def _laplacian(self, G, free):
+        """Weighted graph Laplacian B diag(G) B^T restricted to the free nodes, sparse when SciPy is available."""
+        try:
+            import scipy.sparse as sparse
+        except ImportError:
+            sparse = None
+        index = np.full(self.nbNodes, -1)
+        index[free] = np.arange(free.size)
+        ti, hi = index[self._tail], index[self._head]
+        rows = np.concatenate((ti, hi, ti, hi))
+        cols = np.concatenate((ti, hi, hi, ti))
+        values = np.concatenate((G, G, -G, -G))
+        keep = (rows >= 0) & (cols >= 0)
+        if sparse is None:
+            J = np.zeros((free.size, free.size))
+            np.add.at(J, (rows[keep], cols[keep]), values[keep])
+            return J, np.linalg.solve
+        J = sparse.csc_matrix((values[keep], (rows[keep], cols[keep])), shape=(free.size, free.size))
+        import scipy.sparse.linalg
+        return J, scipy.sparse.linalg.spsolve
+
+    def solve(self, tol=1e-8, max_iter=100, SR_ref=100.0, start_iter=20, debug_mode=False):
+        """
+        solve computes the pressure of every node and the flow rate of every edge.
+
+        The starting point of the Newton iteration is a Newtonian network whose edges have the viscosity of the
+        material at their own shear rate, updated from the flows of the previous one (secant viscosity, Picard
+        iteration). The first one uses the shear rate of the total injected flow rate through every edge, or SR_ref for
+        pressure-driven networks. A fixed viscosity would be far from the solution for strongly shear-thinning materials
+        (e.g. n = 0.04, where the pressure scales with the flow rate to the power n), and Newton iterations on the flow
+        balance only recover a few percent of pressure per step from there.
+
+        Inputs:
+            tol (numeric): Convergence criterion on the flow imbalance of the nodes, relative to the largest edge flow
+            max_iter (int): Iteration cap
+            SR_ref (numeric): Shear rate of the first Newtonian network of pressure-driven networks
+            start_iter (int): Iteration cap of the Newtonian networks of the starting point
+            debug_mode (bool): Flag for printing debug information
+
+        Outputs:
+            p (array-like): Node pressures (node 0 is the ambient)
+            Q (array-like): Edge flow rates, positive from the first node to the second one
+            nbIter (int): Number of Newton iterations
+            converged (bool): Whether the flow imbalance met tol; p and Q are the last iterate otherwise
+        """
+        if not self.nozzles:
+            raise ValueError("The network has no nozzle.")
+        self._tail = np.array(self.tail)
+        self._head = np.array(self.head)
+        self._D = np.array(self.D)
+        self._L = np.array(self.L)
+        Q_in = np.array(self.Q_in)
+        is_fixed = np.array([P is not None for P in self.fixed])
+        free = np.flatnonzero(~is_fixed)
+        p_fixed = np.array([P if P is not None else self.P_amb for P in self.fixed], dtype=float)
+
+        def imbalance(Q):
+            # Net flow leaving every node, minus its injected flow
+            B_Q = np.bincount(self._tail, Q, self.nbNodes) - np.bincount(self._head, Q, self.nbNodes)
+            return (B_Q - Q_in)[free]
+
+        # Starting point: Newtonian networks with the viscosity of every edge at its shear rate (see above)
+        SR_per_Q = self.rabi * 32 / (np.pi * self._D ** 3)
+        Q_total = np.sum(np.abs(Q_in))
+        SR = SR_per_Q * Q_total if Q_total > 0 else np.full(self.nbEdges, float(SR_ref))
+        for _ in range(start_iter):
+            G = (np.pi * self._D ** 4) / (128 * self.rabi * self._L * self.model.eta(SR))
+            p = p_fixed.copy()
+            if free.size:
+                J, linearSolve = self._laplacian(G, free)
+                p[free] += linearSolve(J, -imbalance(G * (p[self._tail] - p[self._head])))
+            Q_start = G * (p[self._tail] - p[self._head])
+            # Edges without flow (dead ends, below the yield stress) keep a small shear rate, so that G stays positive
+            SR_new = SR_per_Q * np.abs(Q_start)
+            SR_new = np.maximum(SR_new, 1e-6 * np.max(SR_new, initial=0) + np.finfo(float).tiny)
+            if np.max(np.abs(np.log(SR_new / SR))) < 1e-3:
+                break
+            SR = SR_new
+        dP = p[self._tail] - p[self._head]
+        Q, dQ = self._edgeFlows(dP, Q_start)
+        F = imbalance(Q)
+
+        nbIter = 0
+        converged = False
+        while True:
+            scale = max(np.max(np.abs(Q)), np.max(np.abs(Q_in)), np.finfo(float).tiny)
+            if np.max(np.abs(F), initial=0) <= tol * scale:
+                converged = True
+                break
+            if nbIter == max_iter:
+                break
+            nbIter += 1
+            # Edges that do not flow (yield stress) get a tiny conductance, so that the Laplacian stays regular
+            J, linearSolve = self._laplacian(np.maximum(dQ, 1e-12 * np.max(dQ, initial=0) + np.finfo(float).tiny), free)
+            step = linearSolve(J, -F)
+            norm = np.linalg.norm(F)
+            for _ in range(30):
+                p_new = p.copy()
+                p_new[free] += step
+                dP = p_new[self._tail] - p_new[self._head]
+                Q_new, dQ_new = self._edgeFlows(dP, Q)
+                F_new = imbalance(Q_new)
+                if np.linalg.norm(F_new) < norm:
+                    break
+                step = step / 2
+            p, Q, dQ, F = p_new, Q_new, dQ_new, F_new
+            if debug_mode:
+                logger.debug('Network Newton iteration %d: flow imbalance %.3e', nbIter, np.max(np.abs(F)) / scale)
+
+        if not converged:
+            logger.warning('HydraulicNetwork: not converged in %d iterations (flow imbalance %.3e)', max_iter,
+                           np.max(np.abs(F)) / scale)
+        self.p, self.Q = p, Q
+        return p, Q, nbIter, converged
+
+    def nozzleVelocities(self):
+        """Exit velocity of every nozzle, in the order they were added (requires solve)."""
+        if self.Q is None:
+            raise ValueError("The network must be solved first.")
+        nozzles = np.array(self.nozzles)
+        return self.Q[nozzles] / (0.25 * np.pi * np.array(self.D)[nozzles] ** 2)
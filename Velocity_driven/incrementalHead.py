@@ -0,0 +1,151 @@
+from Velocity_driven import calculateVisco, solveVreal
+import numpy as np
+
+
+class IncrementalHead:
+    """
+    IncrementalHead is a cylindrical multinozzle head whose required pressure is updated incrementally when the geometry
+    of one nozzle changes (clogged or worn nozzle what-if).
+
+    In the velocity-driven model, every nozzle term depends on that nozzle only: its flow Q_i, flow error dQ_i,
+    conductance 1/Ri and error term g_i / Ri^4 (the per-nozzle factor of calculateReqError). The head keeps their running
+    sums, from which R_eq = rabi / sum(1/Ri), P = R_eq * sum(Q) + P_amb and the pressure error are rebuilt, so changing
+    one nozzle costs O(1) instead of re-running the whole head. The real velocity of every nozzle at the nominal
+    pressure (the pressure of the head as built) is kept too: other nozzles are not affected by a change at a fixed
+    pressure, so only the changed nozzle is solved again (solveVreal).
+
+    The sums are recomputed from scratch every refresh_every updates to avoid drift. Reynolds validation is not done
+    here (see generatePBatch).
+
+    Inputs:
+        D (array-like): Nozzle diameter array (3 x alpha)
+        L (array-like): Nozzle length and its error (2), or one per nozzle (2 x alpha)
+        v (array-like): Nozzle exit velocity, or velocities (nv)
+        n, K, eta_0, eta_inf, tau_0, lmbda, a (numeric): Material rheology parameters
+        P_amb (numeric): Ambient pressure
+        refresh_every (int): Number of updates between two full recomputations of the sums
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+
+    def __init__(self, D, L, v, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, refresh_every=1000):
+        D = np.array(D, dtype=float)
+        if D.ndim != 2:
+            raise ValueError("Input array D must be 2-dimensional (3 x alpha).")
+        L = np.asarray(L, dtype=float)
+        self.D = D
+        self.L = np.array(np.broadcast_to(L.reshape(2, -1), (2, D.shape[1])))
+        self.v = np.atleast_1d(np.asarray(v, dtype=float))
+        self.law = (n, K, eta_0, eta_inf, tau_0, lmbda, a)
+        self.P_amb = P_amb
+        self.rabi = (3 + (1 / n)) / 4  # Weissenberg-Rabinowitsch correction
+        self.refresh_every = refresh_every
+        self.refresh()
+        self.P_nominal = self.P
+        self.v_real = np.broadcast_to(self.v[:, np.newaxis], self.Q.shape).copy()
+
+    def _nozzleTerms(self, D0, D1, L0, L1):
+        """Flow, flow error, conductance and error term of nozzles, for every velocity (nv x nozzles)."""
+        n, K, eta_0, eta_inf, tau_0, lmbda, a = self.law
+        vv = self.v[:, np.newaxis]
+        Q = np.pi * 0.25 * D0 ** 2 * vv
+        dQ = np.pi * 0.5 * D0 * D1 * vv
+        SR = 32 * Q / (np.pi * D0 ** 3) * self.rabi
+        eta, deta = calculateVisco.calculateVisco(SR, n, K, eta_inf, eta_0, tau_0, lmbda, a)
+        Ri = (128 * L0 * eta) / (np.pi * D0 ** 4)
+        g = ((D0 ** 2 / (eta * L0)) ** 4 * (L0 * deta) ** 2) + ((eta * L1) ** 2) + 16 * ((eta * L0 * D1 / D0)) ** 2
+        return Q, dQ, 1 / Ri, g / (self.rabi * Ri) ** 4
+
+    def refresh(self):
+        """Recomputes every nozzle term and the running sums from scratch."""
+        self.Q, self.dQ, self.invRi, self.h = self._nozzleTerms(self.D[0], self.D[1], self.L[0], self.L[1])
+        self.S = np.sum(self.invRi, axis=-1)
+        self.Q_sum = np.sum(self.Q, axis=-1)
+        self.dQ_sum = np.sum(self.dQ, axis=-1)
+        self.H = np.sum(self.h, axis=-1)
+        self._updates = 0
+
+    @property
+    def R_eq(self):
+        return self.rabi / self.S
+
+    @property
+    def P(self):
+        """Required pressure (nv)."""
+        return self.R_eq * self.Q_sum + self.P_amb
+
+    @property
+    def ReqError(self):
+        return self.R_eq ** 2 * (np.pi / 128) * (self.S / self.rabi) ** (-2) * np.sqrt(self.H)
+
+    @property
+    def dP(self):
+        """Error in the required pressure (nv)."""
+        return np.sqrt((self.ReqError * self.Q_sum) ** 2 + (self.R_eq * self.dQ_sum) ** 2)
+
+    def _pressureOutcome(self, P, D, L):
+        """Real velocities of nozzles (columns of D and L) at the pressures P, each nozzle solved on its own."""
+        n, K, eta_0, eta_inf, tau_0, lmbda, a = self.law
+        heads = D.T[:, :, np.newaxis]  # one single-nozzle head per nozzle
+        P = np.broadcast_to(P, (heads.shape[0], self.v.size))
+        v_real, _, _, _ = solveVreal.solveVreal(P, heads, L.T, n, K, eta_0, eta_inf, tau_0, lmbda, a, self.P_amb)
+        return v_real[..., 0].T
+
+    def update(self, k, D=None, D_error=None, L=None, L_error=None):
+        """
+        Changes the geometry of nozzle k (outlet diameter, its error, length, its error) in O(1), and solves its real
+        velocity at the nominal pressure.
+        """
+        if D is not None:
+            self.D[0, k] = D
+        if D_error is not None:
+            self.D[1, k] = D_error
+        if L is not None:
+            self.L[0, k] = L
+        if L_error is not None:
+            self.L[1, k] = L_error
+
+        Q, dQ, invRi, h = self._nozzleTerms(self.D[0, k], self.D[1, k], self.L[0, k], self.L[1, k])
+        Q, dQ, invRi, h = Q[:, 0], dQ[:, 0], invRi[:, 0], h[:, 0]
+        self.Q_sum += Q - self.Q[:, k]
+        self.dQ_sum += dQ - self.dQ[:, k]
+        self.S += invRi - self.invRi[:, k]
+        self.H += h - self.h[:, k]
+        self.Q[:, k], self.dQ[:, k], self.invRi[:, k], self.h[:, k] = Q, dQ, invRi, h
+        self.v_real[:, k] = self._pressureOutcome(self.P_nominal, self.D[:, k:k + 1], self.L[:, k:k + 1])[:, 0]
+
+        self._updates += 1
+        if self._updates >= self.refresh_every:
+            self.refresh()
+
+    def scanClog(self, fraction):
+        """
+        scanClog evaluates, in one vectorized pass, the head with each nozzle k partially clogged in turn (outlet
+        diameter multiplied by fraction, the other nozzles unchanged). The head itself is not modified.
+
+        Inputs:
+            fraction (numeric or array-like): Remaining fraction of the outlet diameter, scalar or one per nozzle
+
+        Outputs (nv x alpha, column k is the head with nozzle k clogged):
+            P (array-like): Required pressure to keep the target velocity
+            dP (array-like): Error in the required pressure
+            v_clogged (array-like): Real velocity of the clogged nozzle at the nominal pressure
+        """
+        D_clog = self.D.copy()
+        D_clog[0] = D_clog[0] * fraction
+        Q, dQ, invRi, h = self._nozzleTerms(D_clog[0], D_clog[1], self.L[0], self.L[1])
+
+        # Running sums with the term of nozzle k swapped, for every k at once
+        col = (slice(None), np.newaxis)
+        S = self.S[col] + invRi - self.invRi
+        Q_sum = self.Q_sum[col] + Q - self.Q
+        dQ_sum = self.dQ_sum[col] + dQ - self.dQ
+        H = self.H[col] + h - self.h
+
+        R_eq = self.rabi / S
+        P = R_eq * Q_sum + self.P_amb
+        ReqError = R_eq ** 2 * (np.pi / 128) * (S / self.rabi) ** (-2) * np.sqrt(H)
+        dP = np.sqrt((ReqError * Q_sum) ** 2 + (R_eq * dQ_sum) ** 2)
+        v_clogged = self._pressureOutcome(self.P_nominal, D_clog, self.L)
+        return P, dP, v_clogged
@@ -0,0 +1,90 @@
+from Velocity_driven import calculateReq, generatePBatch, solveVreal
+import numpy as np
+
+# Default parameter uncertainties, the constants used by calculateVisco for the error bars
+DEFAULT_UNCERTAINTY = {'K': 0.1, 'n': 0.0001}
+
+
+def monteCarloP(rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP,
+                n_samples=10000, dparams=None, percentiles=(2.5, 50, 97.5), chunk_size=2000, seed=None):
+    """
+    monteCarloP propagates the measurement uncertainties through the model by sampling instead of the hand-derived error
+    formulas (deta, dRi, dP). Every sample draws its nozzle diameters from N(D[0], D[1]), its nozzle length from
+    N(L[0], L[1]) and its rheology parameters from a log-normal law of median value and relative spread
+    uncertainty / value, so that sampled parameters keep the sign of their value: a normal law would draw n <= 0 or
+    K <= 0 for large uncertainties, which silently changes the resolved behavior law. The samples are evaluated as a
+    stack of heads by generatePBatch, chunk_size samples per pass.
+
+    The required pressure band tells how uncertain the model prediction is. The velocity band is obtained by applying
+    the nominal required pressure to every sampled head (solveVreal), i.e. the spread of the nozzle exit velocities a
+    real head would show when it is driven with the model's pressure.
+
+    Only non-zero parameters are sampled, since the zero parameters identify the behavior law (n is not sampled for the
+    Newtonian and Bingham models, where it is 1 by definition).
+
+    Inputs:
+        rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP: Same as generatePBatch
+        n_samples (int): Number of Monte Carlo samples
+        dparams (dict): Standard uncertainty of the rheology parameters, keyed as in the material database
+                        ('n', 'K', 'eta_inf', 'eta_0', 'tau_0', 'lambda', 'a'); see MaterialCatalog.uncertainty.
+                        Missing entries use DEFAULT_UNCERTAINTY, or 0.
+        percentiles (tuple): Percentiles of the returned bands
+        chunk_size (int): Number of samples evaluated per vectorized pass
+        seed (int): Seed of the random generator
+
+    Outputs:
+        P_nominal (array-like): Required pressure of the nominal head (nv)
+        P_bands (array-like): Percentiles of the required pressure (n_percentiles x nv)
+        v_bands (array-like): Percentiles of the nozzle exit velocities at the nominal pressure
+                              (n_percentiles x nv x alpha), None unless all nozzles are cylindrical
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+    v = np.atleast_1d(np.asarray(v, dtype=float))
+    D = np.asarray(D, dtype=float)
+    L = np.asarray(L, dtype=float)
+    rng = np.random.default_rng(seed)
+
+    uncertainty = dict(DEFAULT_UNCERTAINTY)
+    if dparams is not None:
+        uncertainty.update(dparams)
+
+    nominal = {'n': n, 'K': K, 'eta_0': eta_0, 'eta_inf': eta_inf, 'tau_0': tau_0, 'lambda': lmbda, 'a': a}
+    fixed = {name for name, value in nominal.items() if value == 0 or uncertainty.get(name, 0) == 0}
+    if K == 0 and eta_0 == 0:
+        fixed.add('n')  # Newtonian and Bingham models
+
+    P_nominal = generatePBatch.generatePBatch(
+        rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP)[0]
+
+    alpha = D.shape[1]
+    P_samples = np.empty((n_samples, v.size))
+    cylindrical = all(t == "cyl" for t in calculateReq.nozzleTypes(Noz_type, alpha))
+    v_samples = np.empty((n_samples, v.size, alpha)) if cylindrical else None
+
+    for start in range(0, n_samples, chunk_size):
+        ns = min(chunk_size, n_samples - start)
+
+        # Sampled heads
+        D_s = np.repeat(D[np.newaxis], ns, axis=0)
+        D_s[:, 0, :] = D[0] + D[1] * rng.standard_normal((ns, alpha))
+        L_s = np.repeat(L[np.newaxis], ns, axis=0)
+        L_s[:, 0] = L[0] + L[1] * rng.standard_normal(ns)
+
+        # Sampled material
+        law = {name: value if name in fixed
+               else value * np.exp(uncertainty[name] / abs(value) * rng.standard_normal(ns))
+               for name, value in nominal.items()}
+        params = (law['n'], law['K'], law['eta_0'], law['eta_inf'], law['tau_0'], law['lambda'], law['a'])
+
+        P_samples[start:start + ns] = generatePBatch.generatePBatch(
+            rho, v, D_s, L_s, theta, *params, P_amb, Noz_type, R, mP)[0]
+
+        if v_samples is not None:
+            v_samples[start:start + ns] = solveVreal.solveVreal(P_nominal, D_s, L_s, *params, P_amb)[0]
+
+    P_bands = np.nanpercentile(P_samples, percentiles, axis=0)
+    v_bands = None if v_samples is None else np.nanpercentile(v_samples, percentiles, axis=0)
+
+    return P_nominal, P_bands, v_bands
@@ -0,0 +1,130 @@
+from Velocity_driven import rheologyModels
+import numpy as np
+
+QUAD_NODES = 24  # Gauss-Legendre nodes of every non-cylindrical segment
+
+
+class NozzleProfile:
+    """
+    NozzleProfile is the bore of an axisymmetric nozzle of any shape: stepped bores, conical-to-cylindrical tips or
+    measured (e.g. CT scan) profiles, made of segments whose diameter varies linearly along the axis, from the inlet to
+    the outlet.
+
+    In the lubrication approximation every slice is a short cylinder, dP/dz = (4 / D(z)) * tau(SR(z)), with the
+    Weissenberg-Rabinowitsch corrected wall shear rate SR(z) = rabi * Q * g(z), g = 32 / (pi * D^3), and tau = eta * SR
+    the wall stress of the behavior law (rheologyModels). The pressure drop is computed by quadrature along the bore,
+    dP(Q) = sum_k W_k * tau(rabi * Q * g_k): a cylindrical segment of length l is one node (W = 4 * l / D, exact), and a
+    conical one is integrated in ln(D) by Gauss-Legendre quadrature (tau is smooth in ln(D) for every law).
+
+    The nodes g_k and weights W_k do not depend on the flow rate or the material: they are computed once, when the
+    profile is built. For the laws whose wall stress is a sum of powers of the shear rate (see
+    RheologyModel.stressTerms), dP(Q) = sum_j c_j * (rabi * Q)^p_j * M(p_j), where the geometric moments
+    M(p) = sum_k W_k * g_k^p are cached per exponent, so evaluations over many speeds and materials cost a few array
+    operations. Other laws (Carreau, Cross, Casson) evaluate the quadrature, for all the flow rates at once.
+
+    Example, a conical nozzle ending with a 0.5 mm cylindrical tip, used for the 3rd nozzle of a head:
+        profile = NozzleProfile([(3.55, 0.25, 17.0), (0.25, 0.25, 0.5)])
+        dP = profile.pressureDrop(Q, n, K, eta_0, eta_inf, tau_0, lmbda, a)
+        Noz_type = ['cyl', 'cyl', profile, 'cyl', ...]  # see calculateReq
+
+    Inputs:
+        segments (list): (D_in, D_out, L) of every segment, from the inlet to the outlet (mm)
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+
+    def __init__(self, segments):
+        segments = np.atleast_2d(np.asarray(segments, dtype=float))
+        if segments.ndim != 2 or segments.shape[1] != 3 or segments.shape[0] == 0:
+            raise ValueError("Segments must be given as (D_in, D_out, L) triplets.")
+        if np.any(segments[:, :2] <= 0) or np.any(segments[:, 2] < 0) or not np.any(segments[:, 2] > 0):
+            raise ValueError("Segment diameters must be positive and lengths non-negative.")
+        self.segments = segments
+        self._moments = {}
+
+        x, w = np.polynomial.legendre.leggauss(QUAD_NODES)
+        t = 0.5 * (x + 1)
+        D_nodes, weights = [], []
+        for D_in, D_out, length in segments:
+            if length == 0:
+                continue
+            if np.isclose(D_in, D_out, rtol=1e-9, atol=0):
+                D_nodes.append([D_out])
+                weights.append([4 * length / D_out])
+            else:
+                # D = D_out * (D_in / D_out)^t, dz = length * dD / (D_in - D_out)
+                D_nodes.append(D_out * (D_in / D_out) ** t)
+                weights.append(4 * length * np.log(D_in / D_out) / (D_in - D_out) * 0.5 * w)
+        self.D_nodes = np.concatenate(D_nodes)
+        self.g = 32 / (np.pi * self.D_nodes ** 3)  # shear rate per unit of corrected flow rate at every node
+        self.W = np.concatenate(weights)  # quadrature weight of the wall stress at every node
+
+    @classmethod
+    def cylinder(cls, D, L):
+        """Cylindrical bore of diameter D and length L."""
+        return cls([(D, D, L)])
+
+    @classmethod
+    def cone(cls, D_in, D_out, L):
+        """Conical bore from D_in down to D_out over the length L."""
+        return cls([(D_in, D_out, L)])
+
+    @classmethod
+    def sampled(cls, z, D):
+        """Measured bore: diameters D at the axial positions z (increasing, inlet first), linear in between."""
+        z = np.asarray(z, dtype=float)
+        D = np.asarray(D, dtype=float)
+        if z.ndim != 1 or z.shape != D.shape or z.size < 2:
+            raise ValueError("z and D must be 1-dimensional arrays of the same length (at least 2 samples).")
+        if np.any(np.diff(z) < 0):
+            raise ValueError("Axial positions z must be increasing.")
+        return cls(np.column_stack((D[:-1], D[1:], np.diff(z))))
+
+    @property
+    def length(self):
+        return float(np.sum(self.segments[:, 2]))
+
+    @property
+    def D_out(self):
+        """Outlet diameter."""
+        return float(self.segments[-1, 1])
+
+    def __repr__(self):
+        # Also the key of the profile in the pressure cache
+        return f"NozzleProfile({self.segments.tolist()!r})"
+
+    def moment(self, p):
+        """Geometric moment M(p) = sum_k W_k * g_k^p, cached per exponent."""
+        p = float(p)
+        M = self._moments.get(p)
+        if M is None:
+            M = self._moments[p] = float(np.dot(self.W, self.g ** p))
+        return M
+
+    def pressureDrop(self, Q, n, K, eta_0, eta_inf, tau_0, lmbda, a, model=None):
+        """
+        pressureDrop computes the pressure drop of the nozzle at the flow rates Q.
+
+        Inputs:
+            Q (array-like): Flow rates, any shape
+            n, K, eta_0, eta_inf, tau_0, lmbda, a (numeric): Material rheology parameters, scalars or arrays
+                                                             broadcastable against Q
+            model (RheologyModel): Behavior law already resolved for these parameters (optional)
+
+        Outputs:
+            dP (array-like): Pressure drops, shaped like Q
+        """
+        Q = np.asarray(Q, dtype=float)
+        if model is None:
+            model = rheologyModels.resolveModel(n, K, eta_inf, eta_0, tau_0, lmbda, a)
+        rabi = (3 + (1 / n)) / 4  # Weissenberg-Rabinowitsch correction
+        terms = model.stressTerms()
+        if terms is not None and np.ndim(n) == 0 and all(np.ndim(p) == 0 for _, p in terms):
+            # Sum of powers of the shear rate: cached geometric moments
+            return sum(c * (rabi * Q) ** p * self.moment(p) for c, p in terms)
+
+        # Quadrature nodes along the first axis, so that parameter arrays broadcast against Q
+        g = self.g.reshape((-1,) + (1,) * Q.ndim)
+        SR = rabi * Q * g
+        return np.tensordot(self.W, model.eta(SR) * SR, axes=1)
@@ -0,0 +1,126 @@
+import numpy as np
+
+# Rows of the geometry block of a head, one column per nozzle: the diameter array (outlet diameter, its error, inlet
+# diameter) followed by the invariants derived from it
+GEOMETRY_ROWS = ('D', 'D_error', 'D_inlet', 'area', 'dArea', 'D3', 'D4', 'SR_per_Q', 'dSR_per_v', 'R_per_L')
+
+
+def geometryBlock(D):
+    """
+    geometryBlock computes the geometry block of a head: its diameter array and the invariants every model evaluation
+    derives from it.
+
+    Inputs:
+        D (array-like): Nozzle diameter array (3 x alpha)
+
+    Outputs:
+        block (array-like): Geometry block (len(GEOMETRY_ROWS) x alpha), rows ordered as GEOMETRY_ROWS
+    """
+    D = np.asarray(D, dtype=float)
+    if D.ndim != 2 or D.shape[0] != 3 or D.shape[1] == 0:
+        raise ValueError("Input array D must be 2-dimensional (3 x alpha).")
+    if np.any(D[0] <= 0):
+        raise ValueError("Nozzle diameters must be strictly positive.")
+    D0, D1 = D[0], D[1]
+    return np.vstack((
+        D,
+        np.pi * 0.25 * D0 ** 2,  # area: flow rate per unit of exit velocity (calculateQ)
+        np.pi * 0.5 * D0 * D1,  # dArea: error on the flow rate per unit of exit velocity
+        D0 ** 3,
+        D0 ** 4,
+        32 / (np.pi * D0 ** 3),  # SR_per_Q: wall shear rate per unit of flow rate, before the Rabinowitsch correction
+        8 * D1 / D0 ** 2,  # dSR_per_v: error on the shear rate per unit of exit velocity (calculateSR)
+        128 / (np.pi * D0 ** 4),  # R_per_L: Hagen-Poiseuille resistance per unit of length and viscosity (calculateReq)
+    ))
+
+
+class PrintHead:
+    """
+    PrintHead is the geometry of a print head (nozzle diameters, length, half-cone angle and nozzle types) with the
+    invariants that calculateQ, calculateSR, calculateReq and generatePBatch would otherwise recompute from D on every
+    call: nozzle areas, D^3, D^4, shear rate and resistance factors, and the total area of the head. They are computed
+    once, when the head is built, and stored read-only in one geometry block (see GEOMETRY_ROWS).
+
+    A head can be passed wherever a (3 x alpha) diameter array D is expected: it converts to its diameter array
+    (numpy.asarray(head)) and supports shape, ndim and indexing; the functions above use its invariants directly.
+    Heads loaded from a catalog (tools/headCatalog.py) map their geometry block from a file shared by all processes,
+    and are sent to worker processes by reference (file and offset) rather than by value.
+
+    Example:
+        head = PrintHead(D, [6.5, 0.01], math.radians(5.3), "cyl", name="MN26")
+        P, *_ = generatePBatch.generatePBatch(rho, v, head, head.L, head.theta, n, K, eta_0, eta_inf, tau_0, lmbda,
+                                              a, P_amb, head.Noz_type, R, mP)
+
+    Inputs:
+        D (array-like): Nozzle diameter array (3 x alpha): outlet diameters, their error and inlet diameters (mm)
+        L (array-like): Nozzle length and its error (2, mm)
+        theta (numeric): Half-cone angle of the tapered nozzles (rad)
+        Noz_type (str or array-like): Type of the nozzles, or one per nozzle (see calculateReq)
+        name (str): Head identifier
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+
+    def __init__(self, D, L, theta=0.0, Noz_type="cyl", name=None):
+        block = geometryBlock(D)
+        block.flags.writeable = False
+        self._bind(block, L, theta, Noz_type, name)
+
+    @classmethod
+    def fromBlock(cls, block, L, theta=0.0, Noz_type="cyl", name=None):
+        """Head using an already computed (e.g. memory-mapped) geometry block, without copying it."""
+        block = np.asarray(block, dtype=float)
+        if block.ndim != 2 or block.shape[0] != len(GEOMETRY_ROWS):
+            raise ValueError(f"A geometry block must have {len(GEOMETRY_ROWS)} rows.")
+        head = cls.__new__(cls)
+        head._bind(block, L, theta, Noz_type, name)
+        return head
+
+    def _bind(self, block, L, theta, Noz_type, name):
+        L = np.asarray(L, dtype=float)
+        if L.shape != (2,):
+            raise ValueError("Input L must hold the nozzle length and its error.")
+        self.block = block
+        self.D = block[:3]
+        (self.area, self.dArea, self.D3, self.D4, self.SR_per_Q, self.dSR_per_v,
+         self.R_per_L) = block[3:]
+        self.area_sum = float(np.sum(self.area))  # total flow rate per unit of exit velocity
+        self.dArea_sum = float(np.sum(self.dArea))
+        self.L = L
+        self.theta = float(theta)
+        self.Noz_type = Noz_type
+        self.name = name
+        self._shared = None  # reconstructor and arguments of a shared head, set by its catalog
+
+    @property
+    def alpha(self):
+        return self.block.shape[1]
+
+    @property
+    def shape(self):
+        return self.D.shape
+
+    @property
+    def ndim(self):
+        return 2
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, index):
+        return self.D[index]
+
+    def __array__(self, dtype=None, copy=None):
+        if copy:
+            return np.array(self.D, dtype=dtype)
+        return np.asarray(self.D, dtype=dtype)
+
+    def __repr__(self):
+        return f"PrintHead({self.name!r}, alpha={self.alpha}, Noz_type={self.Noz_type!r})"
+
+    def __reduce__(self):
+        if self._shared is not None:
+            # Sent by reference: the receiving process maps the same geometry block
+            return self._shared
+        return (PrintHead, (np.array(self.D), self.L, self.theta, self.Noz_type, self.name))
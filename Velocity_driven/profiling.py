@@ -0,0 +1,156 @@
+"""
+Opt-in profiling of the model stages and solvers.
+
+When profiling is enabled, the stages of generateP and generatePBatch record their wall time, and the iterative
+solvers record one entry per iteration (iteration number, residual, active nozzles). When it is disabled (the
+default), stage() returns a shared no-op context and the solvers skip the recording, so the instrumented code keeps
+its speed. Example:
+
+    profiling.enable()
+    generateP.generateP(...)
+    profiling.report()                      # per-stage table on the console
+    profiling.writeTrace('trace.json')      # Chrome trace file (chrome://tracing, ui.perfetto.dev)
+
+The trace file holds one complete event per timed stage and one counter event per solver iteration, and the summary
+(see summary) in its 'otherData' field.
+
+Author: Raphaël Plante
+Date: 2026
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+
+_NULL = contextlib.nullcontext()
+_lock = threading.Lock()
+_enabled = False
+_keep_events = True
+_t0 = 0.0
+_stages = {}  # name -> [calls, total time (s), longest call (s)]
+_counters = {}  # name -> value
+_series = {}  # name -> list of per-iteration records
+_events = []  # Chrome trace events
+
+
+def enable(trace=True):
+    """Starts recording. With trace=False, only the summary is kept (no per-call trace events)."""
+    global _enabled, _keep_events
+    _enabled = True
+    _keep_events = trace
+
+
+def disable():
+    """Stops recording; what has been recorded is kept until reset."""
+    global _enabled
+    _enabled = False
+
+
+def isEnabled():
+    return _enabled
+
+
+def reset():
+    """Forgets everything recorded so far."""
+    global _t0
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+        _series.clear()
+        _events.clear()
+        _t0 = time.perf_counter()
+
+
+class _Stage:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        elapsed = end - self.start
+        with _lock:
+            entry = _stages.get(self.name)
+            if entry is None:
+                _stages[self.name] = [1, elapsed, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] = max(entry[2], elapsed)
+            if _keep_events:
+                _events.append({'name': self.name, 'ph': 'X', 'ts': (self.start - _t0) * 1e6, 'dur': elapsed * 1e6,
+                                'pid': os.getpid(), 'tid': threading.get_ident()})
+        return False
+
+
+def stage(name):
+    """Context timing a stage: 'with profiling.stage("generateP/viscosity"): ...'."""
+    if not _enabled:
+        return _NULL
+    return _Stage(name)
+
+
+def count(name, value=1):
+    """Adds value to a counter."""
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + value
+
+
+def record(name, **fields):
+    """Records one iteration of a solver (fields are numbers: iteration, residual, active, ...)."""
+    if not _enabled:
+        return
+    fields = {key: float(value) for key, value in fields.items()}
+    with _lock:
+        _series.setdefault(name, []).append(fields)
+        if _keep_events:
+            _events.append({'name': name, 'ph': 'C', 'ts': (time.perf_counter() - _t0) * 1e6, 'args': fields,
+                            'pid': os.getpid(), 'tid': threading.get_ident()})
+
+
+def summary():
+    """
+    summary returns what has been recorded, as plain Python objects.
+
+    Outputs:
+        summary (dict): 'stages': {name: {calls, total_s, mean_s, max_s}}, 'counters': {name: value},
+                        'series': {name: {records, last}} with the number of iterations recorded and the last one
+    """
+    with _lock:
+        stages = {name: {'calls': calls, 'total_s': total, 'mean_s': total / calls, 'max_s': longest}
+                  for name, (calls, total, longest) in _stages.items()}
+        series = {name: {'records': len(records), 'last': records[-1]} for name, records in _series.items()}
+        return {'stages': stages, 'counters': dict(_counters), 'series': series}
+
+
+def report(out=print):
+    """Prints the per-stage times, longest total first, with the counters and the last solver iterations."""
+    result = summary()
+    total = sum(entry['total_s'] for entry in result['stages'].values()) or 1.0
+    out(f"{'stage':<36} {'calls':>8} {'total [s]':>12} {'mean [s]':>12} {'share':>7}")
+    for name, entry in sorted(result['stages'].items(), key=lambda item: -item[1]['total_s']):
+        out(f"{name:<36} {entry['calls']:8d} {entry['total_s']:12.4e} {entry['mean_s']:12.4e} "
+            f"{100 * entry['total_s'] / total:6.1f}%")
+    for name, value in result['counters'].items():
+        out(f'{name}: {value:g}')
+    for name, entry in result['series'].items():
+        last = ', '.join(f'{key} = {value:.4g}' for key, value in entry['last'].items())
+        out(f"{name}: {entry['records']} iteration(s) recorded, last: {last}")
+
+
+def writeTrace(path):
+    """Writes the trace events and the summary as a Chrome trace file (JSON)."""
+    with _lock:
+        events = list(_events)
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': summary()}, fh)
+
+
+reset()
@@ -0,0 +1,404 @@
+"""
+Registry of the material behavior laws.
+
+A material's rheology parameters (n, K, eta_inf, eta_0, tau_0, lmbda, a) are resolved once into a model object by
+resolveModel, which checks the registered laws in order. The model then evaluates its fused, vectorized kernels on
+any shear rate array, without identifying the law again:
+
+    model = rheologyModels.resolveModel(n, K, eta_inf, eta_0, tau_0, lmbda, a)
+    eta, deta = model.etaError(SR)      # viscosity and its error (calculateVisco)
+    eta, slope = model.etaSlope(SR)     # viscosity and d(eta)/d(SR) (Newton solvers)
+    SR = model.shearRate(tau)           # inverse of the wall stress tau = eta(SR) * SR, for invertible laws
+
+Laws whose wall stress can be inverted in closed form (invertible = True) let the pressure-driven solver compute the
+flow rates of all nozzles directly, without iteration (see solveVreal).
+
+A new law is added by subclassing RheologyModel and decorating it with @registerModel; the parameters of a law are
+told apart by which of them are zero, like in calculateVisco.
+
+Author: Raphaël Plante
+Date: 2026
+"""
+import functools
+import numpy as np
+
+# Uncertainties on the rheology parameters and on the shear rate used for the viscosity error bars
+dK = 0.1
+dn = 0.0001
+dSR = 0.0001
+deta_inf = 0
+deta_0 = 0
+dlambda = 0
+da = 0
+dtau_0 = 0
+
+# Registered model classes, in identification order
+MODELS = []
+
+
+def registerModel(cls):
+    """Class decorator adding a behavior law to the registry."""
+    MODELS.append(cls)
+    return cls
+
+
+def _lawParameters(*params):
+    """
+    Returns the nominal value of each rheology parameter, used to identify the behavior law. A parameter may be an array
+    of samples (Monte Carlo), as long as it is zero for every sample or for none of them.
+    """
+    nominal = []
+    for x in params:
+        if isinstance(x, np.ndarray):
+            zero = x == 0
+            if np.all(zero):
+                x = 0.0
+            elif np.any(zero):
+                raise ValueError('Sampled rheology parameters must keep the same behavior law for every sample.')
+            elif np.all(x == x.flat[0]):
+                x = float(x.flat[0])
+            else:
+                x = float(np.mean(x))
+        nominal.append(x)
+    return nominal
+
+
+class RheologyModel:
+    """
+    Base class of the behavior laws. Parameters are numbers or arrays broadcastable against the shear rate.
+
+    Subclasses define:
+        name (str): Name printed in debug mode
+        matches(n, K, eta_inf, eta_0, tau_0, lmbda, a): True if the nominal parameters select this law
+        etaError(SR): Apparent viscosity and its error
+        etaSlope(SR): Apparent viscosity and its derivative with respect to the shear rate
+    and, for laws whose wall stress can be inverted in closed form (invertible = True):
+        shearRate(tau): Shear rate at which the stress eta(SR) * SR equals tau (0 below the yield stress)
+    and, for laws whose wall stress is a sum of powers of the shear rate:
+        stressTerms(): (c, p) pairs such that eta(SR) * SR = sum(c * SR^p), None for the other laws
+    """
+    name = ''
+    invertible = False
+
+    def __init__(self, n, K, eta_inf, eta_0, tau_0, lmbda, a):
+        self.n = n
+        self.K = K
+        self.eta_inf = eta_inf
+        self.eta_0 = eta_0
+        self.tau_0 = tau_0
+        self.lmbda = lmbda
+        self.a = a
+
+    @property
+    def params(self):
+        return self.n, self.K, self.eta_inf, self.eta_0, self.tau_0, self.lmbda, self.a
+
+    @staticmethod
+    def matches(n, K, eta_inf, eta_0, tau_0, lmbda, a):
+        raise NotImplementedError
+
+    def select(self, idx):
+        """Returns the same law restricted to a subset of array parameters (scalars are kept as they are)."""
+        return type(self)(*(p[idx] if np.ndim(p) else p for p in self.params))
+
+    def eta(self, SR):
+        return self.etaSlope(SR)[0]
+
+    def slope(self, SR):
+        return self.etaSlope(SR)[1]
+
+    def etaError(self, SR):
+        raise NotImplementedError
+
+    def etaSlope(self, SR):
+        raise NotImplementedError
+
+    def shearRate(self, tau):
+        raise NotImplementedError
+
+    def stressTerms(self):
+        return None
+
+
+@registerModel
+class Sisko(RheologyModel):
+    name = 'Sisko model'
+
+    @staticmethod
+    def matches(n, K, eta_inf, eta_0, tau_0, lmbda, a):
+        return n != 0 and K != 0 and eta_inf != 0 and eta_0 == 0 and tau_0 == 0 and lmbda == 0 and a == 0
+
+    def etaError(self, SR):
+        n, K = self.n, self.K
+        p = SR ** (n - 1)
+        Kp = K * p
+        eta = Kp + self.eta_inf
+        deta = np.sqrt((p * dK) ** 2 + (Kp * (n - 1) / SR * dSR) ** 2 + (Kp * np.log(SR) * dn) ** 2 + deta_inf ** 2)
+        return eta, deta
+
+    def etaSlope(self, SR):
+        Kp = self.K * SR ** (self.n - 1)
+        return Kp + self.eta_inf, Kp * (self.n - 1) / SR
+
+    def stressTerms(self):
+        return [(self.K, self.n), (self.eta_inf, 1)]
+
+
+@registerModel
+class Newtonian(RheologyModel):
+    name = 'Newtonian model'
+    invertible = True
+
+    @staticmethod
+    def matches(n, K, eta_inf, eta_0, tau_0, lmbda, a):
+        return n == 1 and K == 0 and eta_inf != 0 and eta_0 == 0 and tau_0 == 0 and lmbda == 0 and a == 0
+
+    def etaError(self, SR):
+        ones = np.ones(np.shape(SR))
+        return self.eta_inf * ones, deta_inf * ones
+
+    def etaSlope(self, SR):
+        return self.eta_inf * np.ones(np.shape(SR)), np.zeros(np.shape(SR))
+
+    def shearRate(self, tau):
+        return tau / self.eta_inf
+
+    def stressTerms(self):
+        return [(self.eta_inf, 1)]
+
+
+@registerModel
+class PowerLaw(RheologyModel):
+    name = 'Ostwald-de-Waele model (pure power law)'
+    invertible = True
+
+    @staticmethod
+    def matches(n, K, eta_inf, eta_0, tau_0, lmbda, a):
+        return n != 0 and K != 0 and eta_inf == 0 and eta_0 == 0 and tau_0 == 0 and lmbda == 0 and a == 0
+
+    def etaError(self, SR):
+        n = self.n
+        p = SR ** (n - 1)
+        eta = self.K * p
+        deta = np.sqrt((p * dK) ** 2 + (eta * (n - 1) / SR * dSR) ** 2 + (eta * np.log(SR) * dn) ** 2)
+        return eta, deta
+
+    def etaSlope(self, SR):
+        eta = self.K * SR ** (self.n - 1)
+        return eta, eta * (self.n - 1) / SR
+
+    def shearRate(self, tau):
+        return (tau / self.K) ** (1 / self.n)
+
+    def stressTerms(self):
+        return [(self.K, self.n)]
+
+
+@registerModel
+class Carreau(RheologyModel):
+    name = 'Carreau model'
+
+    @staticmethod
+    def matches(n, K, eta_inf, eta_0, tau_0, lmbda, a):
+        return n != 0 and K == 0 and eta_inf != 0 and eta_0 != 0 and tau_0 == 0 and lmbda != 0 and a != 0
+
+    def _terms(self, SR):
+        x = self.lmbda * SR
+        xa = x ** self.a
+        ratio = 1 + xa
+        r = ratio ** ((self.n - 1) / self.a)
+        return x, xa, ratio, r
+
+    def etaError(self, SR):
+        n, a, lmbda = self.n, self.a, self.lmbda
+        span = self.eta_0 - self.eta_inf
+        x, xa, ratio, r = self._terms(SR)
+        eta = self.eta_inf + span * r
+        # (eta_0 - eta_inf) * ratio^((n - 1 - a) / a) * (n - 1) * (lmbda * SR)^(a - 1)
+        common = span * (r / ratio) * (n - 1) * xa / x
+        deta1 = ((1 - r) * deta_inf) ** 2
+        deta2 = (r * deta_0) ** 2
+        deta3 = (common * SR * dlambda) ** 2
+        deta4 = (common * lmbda * dSR) ** 2
+        deta5 = (span * (n - 1) * ratio / a * (xa * np.log(x) / ratio - np.log(ratio) / a) * da) ** 2
+        return eta, np.sqrt(deta1 + deta2 + deta3 + deta4 + deta5)
+
+    def etaSlope(self, SR):
+        span = self.eta_0 - self.eta_inf
+        x, xa, ratio, r = self._terms(SR)
+        return self.eta_inf + span * r, span * (self.n - 1) * (r / ratio) * xa / SR
+
+
+@registerModel
+class Bingham(RheologyModel):
+    name = 'Bingham model'
+    invertible = True
+
+    @staticmethod
+    def matches(n, K, eta_inf, eta_0, tau_0, lmbda, a):
+        return n == 1 and K == 0 and eta_inf != 0 and eta_0 == 0 and tau_0 != 0 and lmbda == 0 and a == 0
+
+    def etaError(self, SR):
+        tau_0 = self.tau_0
+        eta = tau_0 / SR + self.eta_inf
+        deta = np.sqrt((dtau_0 / SR) ** 2 + (tau_0 * dSR / SR ** 2) ** 2 + deta_inf ** 2)
+        return eta, deta
+
+    def etaSlope(self, SR):
+        yield_term = self.tau_0 / SR
+        return yield_term + self.eta_inf, -yield_term / SR
+
+    def shearRate(self, tau):
+        return np.maximum(tau - self.tau_0, 0) / self.eta_inf
+
+    def stressTerms(self):
+        return [(self.tau_0, 0), (self.eta_inf, 1)]
+
+
+@registerModel
+class HerschelBulkleyExtended(RheologyModel):
+    name = 'Herschell-Bulkley extended model'
+
+    @staticmethod
+    def matches(n, K, eta_inf, eta_0, tau_0, lmbda, a):
+        return n != 0 and K != 0 and eta_inf != 0 and eta_0 == 0 and tau_0 != 0 and lmbda == 0 and a == 0
+
+    def etaError(self, SR):
+        n, tau_0 = self.n, self.tau_0
+        p = SR ** (n - 1)
+        Kp = self.K * p
+        eta = tau_0 / SR + Kp + self.eta_inf
+        deta = np.sqrt((dtau_0 / SR) ** 2 + (p * dK) ** 2 + deta_inf ** 2 + ((n - 1) * Kp + tau_0 / SR ** 2) * dSR +
+                       Kp * np.log(SR) * dn)
+        return eta, deta
+
+    def etaSlope(self, SR):
+        Kp = self.K * SR ** (self.n - 1)
+        yield_term = self.tau_0 / SR
+        return yield_term + Kp + self.eta_inf, (Kp * (self.n - 1) - yield_term) / SR
+
+    def stressTerms(self):
+        return [(self.tau_0, 0), (self.K, self.n), (self.eta_inf, 1)]
+
+
+@registerModel
+class HerschelBulkley(RheologyModel):
+    name = 'Herschell-Bulkley model'
+    invertible = True
+
+    @staticmethod
+    def matches(n, K, eta_inf, eta_0, tau_0, lmbda, a):
+        return n != 0 and K != 0 and eta_inf == 0 and eta_0 == 0 and tau_0 != 0 and lmbda == 0 and a == 0
+
+    def etaError(self, SR):
+        n, tau_0 = self.n, self.tau_0
+        p = SR ** (n - 1)
+        Kp = self.K * p
+        eta = tau_0 / SR + Kp
+        deta = np.sqrt((dtau_0 / SR) ** 2 + (p * dK) ** 2 + ((n - 1) * Kp + tau_0 / SR ** 2) * dSR +
+                       Kp * np.log(SR) * dn)
+        return eta, deta
+
+    def etaSlope(self, SR):
+        Kp = self.K * SR ** (self.n - 1)
+        yield_term = self.tau_0 / SR
+        return yield_term + Kp, (Kp * (self.n - 1) - yield_term) / SR
+
+    def shearRate(self, tau):
+        return (np.maximum(tau - self.tau_0, 0) / self.K) ** (1 / self.n)
+
+    def stressTerms(self):
+        return [(self.tau_0, 0), (self.K, self.n)]
+
+
+@registerModel
+class Cross(RheologyModel):
+    """
+    Cross model, eta = eta_inf + (eta_0 - eta_inf) / (1 + (lmbda * SR)^(1 - n)). n is the high shear rate flow index,
+    like in the Carreau model; a must be 0 (a nonzero a selects the Carreau model).
+    """
+    name = 'Cross model'
+
+    @staticmethod
+    def matches(n, K, eta_inf, eta_0, tau_0, lmbda, a):
+        return n != 0 and K == 0 and eta_0 != 0 and tau_0 == 0 and lmbda != 0 and a == 0
+
+    def _terms(self, SR):
+        x = self.lmbda * SR
+        xm = x ** (1 - self.n)
+        return x, xm, 1 / (1 + xm)
+
+    def etaError(self, SR):
+        span = self.eta_0 - self.eta_inf
+        x, xm, inv = self._terms(SR)
+        eta = self.eta_inf + span * inv
+        slope = -span * (1 - self.n) * xm * inv ** 2 / SR
+        deta_dn = span * xm * np.log(x) * inv ** 2
+        deta = np.sqrt((slope * dSR) ** 2 + (deta_dn * dn) ** 2 + ((1 - inv) * deta_inf) ** 2 + (inv * deta_0) ** 2)
+        return eta, deta
+
+    def etaSlope(self, SR):
+        span = self.eta_0 - self.eta_inf
+        x, xm, inv = self._terms(SR)
+        return self.eta_inf + span * inv, -span * (1 - self.n) * xm * inv ** 2 / SR
+
+
+@registerModel
+class Casson(RheologyModel):
+    """
+    Casson model, sqrt(tau) = sqrt(tau_0) + sqrt(eta_inf * SR). It is selected by a yield stress and a plastic viscosity
+    with K = 0 and n != 1 (n = 1 is the Bingham model); n is then only the apparent flow index used by the
+    Weissenberg-Rabinowitsch correction (about 0.5 for a Casson fluid).
+    """
+    name = 'Casson model'
+    invertible = True
+
+    @staticmethod
+    def matches(n, K, eta_inf, eta_0, tau_0, lmbda, a):
+        return n != 0 and n != 1 and K == 0 and eta_inf != 0 and eta_0 == 0 and tau_0 != 0 and lmbda == 0 and a == 0
+
+    def etaError(self, SR):
+        s = np.sqrt(self.tau_0 / SR)
+        root = s + np.sqrt(self.eta_inf)
+        eta = root ** 2
+        deta = np.sqrt((root * s / SR * dSR) ** 2 + (root * s / self.tau_0 * dtau_0) ** 2 +
+                       (root / np.sqrt(self.eta_inf) * deta_inf) ** 2)
+        return eta, deta
+
+    def etaSlope(self, SR):
+        s = np.sqrt(self.tau_0 / SR)
+        root = s + np.sqrt(self.eta_inf)
+        return root ** 2, -root * s / SR
+
+    def shearRate(self, tau):
+        return (np.sqrt(np.maximum(tau, self.tau_0)) - np.sqrt(self.tau_0)) ** 2 / self.eta_inf
+
+
+def _findModel(n, K, eta_inf, eta_0, tau_0, lmbda, a):
+    for model in MODELS:
+        if model.matches(n, K, eta_inf, eta_0, tau_0, lmbda, a):
+            return model
+    raise ValueError('No model was found for your material')
+
+
+@functools.lru_cache(maxsize=256)
+def _resolveScalar(n, K, eta_inf, eta_0, tau_0, lmbda, a):
+    return _findModel(n, K, eta_inf, eta_0, tau_0, lmbda, a)(n, K, eta_inf, eta_0, tau_0, lmbda, a)
+
+
+def resolveModel(n, K, eta_inf, eta_0, tau_0, lmbda, a):
+    """
+    resolveModel identifies the behavior law of a material and returns its model object. Materials given by scalar
+    parameters are cached, so the law of a material is only identified once per process.
+
+    Inputs:
+        n, K, eta_inf, eta_0, tau_0, lmbda, a (numeric or array-like): Material rheology parameters (arrays hold one value
+                                                                      per head or per sample)
+
+    Outputs:
+        model (RheologyModel): Behavior law of the material
+    """
+    params = (n, K, eta_inf, eta_0, tau_0, lmbda, a)
+    if all(np.ndim(x) == 0 for x in params):
+        return _resolveScalar(*(float(x) for x in params))
+    return _findModel(*_lawParameters(*params))(*params)
@@ -0,0 +1,131 @@
+from Velocity_driven import generatePBatch, profiling, rheologyModels, solveVreal
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def solvePressureLoop(rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, D_target=None, P_guess=None,
+                      tol=1e-8, max_iter=50, debug_mode=False):
+    """
+    solvePressureLoop is the coupled pressure/velocity solver: for every desired speed, it finds the pressure at which
+    the real head (cylindrical nozzles fed at one pressure) delivers the total flow rate of the target head extruding at
+    that speed, and the real velocity of every nozzle at that pressure.
+
+    The velocity-driven model (generatePBatch) forces every nozzle to the desired speed, which the real nozzles only
+    approximately do at a common pressure. Here the total flow rate sum(Q_i(P)) = Q_target is solved by a safeguarded
+    Newton iteration, all speeds at once. The unknown is x = ln(P - P_amb) and the residual f = ln(sum(Q_i)) - ln(Q_target), nearly linear in x (slope
+    1/n for a power law), with the derivative dQ_i/dP = D / (4 * L * SR_per_Q * tau'(SR)) of each nozzle. The starting
+    pressures are the velocity-driven ones (or P_guess, e.g. the solution of a previous call), the real flow rates are
+    warm started from the previous iteration, and every speed keeps a bracket of its root with a bisection fallback.
+    Speeds are converged when the relative error of their total flow rate, or the relative change of their pressure, is
+    below tol.
+
+    The target is a flow rate, not the velocity-driven pressure (generateP, every nozzle forced to the desired speed)
+    that main_iterP applies: with D_target = D (default), P is within a few 0.1% of the velocity-driven pressure of D,
+    and with a nominal D_target it is the pressure at which the real head delivers the nominal flow rate.
+
+    Inputs:
+        rho (numeric): Density
+        v (array-like): Desired nozzle exit velocities (nv)
+        D (array-like): Real nozzle diameter array (3 x alpha)
+        L (array-like): Nozzle length and its error (2)
+        theta (numeric): Half-cone angle of the nozzles
+        n, K, eta_0, eta_inf, tau_0, lmbda, a (numeric): Material rheology parameters
+        P_amb (numeric): Ambient pressure
+        D_target (array-like): Head whose flow rate at the desired speeds is the target (default: D), e.g. the nominal
+                               head when D holds the measured diameters
+        P_guess (array-like): Optional starting pressures (nv)
+        tol (numeric): Convergence criterion on the relative flow rate error and pressure change
+        max_iter (int): Iteration cap
+        debug_mode (bool): Flag for printing debug information
+
+    Outputs:
+        P (array-like): Applied pressures (nv), NaN where the velocity-driven start is not laminar and no P_guess is given
+        v_real (array-like): Real nozzle exit velocities (nv x alpha)
+        Q_real (array-like): Real nozzle flow rates (nv x alpha)
+        nbIter (array-like): Number of iterations used by each speed (nv)
+        converged (array-like): Convergence mask (nv)
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+    v = np.atleast_1d(np.asarray(v, dtype=float))
+    D = np.asarray(D, dtype=float)
+    if D.ndim != 2:
+        raise ValueError("Input array D must be 2-dimensional (3 x alpha).")
+    D_target = D if D_target is None else np.asarray(D_target, dtype=float)
+    Q_target = np.pi * 0.25 * np.sum(D_target[0] ** 2) * v
+
+    if P_guess is None:
+        P_guess = generatePBatch.generatePBatch(rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb,
+                                                "cyl", 0, 0, debug_mode)[0]
+    P = np.array(np.broadcast_to(P_guess, v.shape), dtype=float)
+    if np.any(P <= P_amb):
+        raise ValueError("Starting pressures must be above the ambient pressure.")
+
+    model = rheologyModels.resolveModel(n, K, eta_inf, eta_0, tau_0, lmbda, a)
+    rabi = (3 + (1 / n)) / 4  # Weissenberg-Rabinowitsch correction
+    SR_per_Q = rabi * 32 / (np.pi * D[0] ** 3)
+    max_step = 5.0  # Largest change of ln(P - P_amb) per iteration
+
+    def residual(x, Q_guess, Q_target):
+        # Real flow rates at P = P_amb + exp(x), total flow residual and its derivative with respect to x
+        _, Q, _, _ = solveVreal.solveVreal(P_amb + np.exp(x), D, L, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb,
+                                           Q_guess=Q_guess)
+        SR = SR_per_Q * Q
+        flowing = Q > 0
+        eta, slope = model.etaSlope(np.where(flowing, SR, 1.0))
+        dQ_dP = np.where(flowing, D[0] / (4 * L[0] * SR_per_Q * (eta + SR * slope)), 0.0)
+        Q_sum = np.sum(Q, axis=-1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            f = np.log(Q_sum) - np.log(Q_target)
+            df = np.exp(x) * np.sum(dQ_dP, axis=-1) / Q_sum
+        return Q, f, df
+
+    valid = np.isfinite(P)
+    x = np.log(np.where(valid, P, 2 * P_amb) - P_amb)
+    lo = np.full(v.size, -np.inf)
+    hi = np.full(v.size, np.inf)
+    Q_real = np.zeros((v.size, D.shape[1]))
+    Q_real[:] = np.pi * 0.25 * D[0] ** 2 * v[:, np.newaxis]
+    nbIter = np.zeros(v.size, dtype=int)
+    converged = ~valid
+
+    for iteration in range(max_iter):
+        active = np.flatnonzero(~converged)
+        if active.size == 0:
+            break
+        xa = x[active]
+        Q, f, df = residual(xa, Q_real[active], Q_target[active])
+        Q_real[active] = Q
+        lo_a = np.where(f < 0, xa, lo[active])
+        hi_a = np.where(f > 0, xa, hi[active])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = -f / df
+            step = np.where(np.isfinite(step) & (df > 0), step, -np.sign(f) * max_step)
+            x_new = xa + np.clip(step, -max_step, max_step)
+            outside = (x_new < lo_a) | (x_new > hi_a)
+            x_new = np.where(outside & np.isfinite(lo_a) & np.isfinite(hi_a), 0.5 * (lo_a + hi_a), x_new)
+        nbIter[active] += 1
+        # f is the relative error of the total flow rate and |x_new - x| the relative change of P - P_amb
+        converged[active] = (np.abs(f) < tol) | (np.abs(x_new - xa) < tol)
+        x[active], lo[active], hi[active] = x_new, lo_a, hi_a
+        if profiling.isEnabled():
+            profiling.record('solvePressureLoop', iteration=iteration + 1, active=active.size,
+                             residual=np.max(np.abs(f)))
+        if debug_mode:
+            logger.debug('Pressure loop iteration %d: %d speed(s) not converged, flow residual %.3e', iteration + 1,
+                         np.count_nonzero(~converged), np.max(np.abs(f)))
+
+    if not np.all(converged):
+        logger.warning('solvePressureLoop: v = %s mm/s did not converge in %d iterations', v[~converged], max_iter,
+                       extra={'v': v[~converged]})
+
+    # Flow rates of the converged pressures
+    P = np.where(valid, P_amb + np.exp(x), np.nan)
+    _, Q_real, _, _ = solveVreal.solveVreal(np.where(valid, P, P_amb), D, L, n, K, eta_0, eta_inf, tau_0, lmbda, a,
+                                            P_amb, Q_guess=Q_real)
+    Q_real = np.where(valid[:, np.newaxis], Q_real, np.nan)
+    v_real = Q_real / (0.25 * np.pi * D[0] ** 2)
+    return P, v_real, Q_real, nbIter, valid & converged
@@ -0,0 +1,170 @@
+from Velocity_driven import profiling, rheologyModels
+from Velocity_driven.generatePBatch import _perHead
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def solveVreal(P, D, L, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Q_guess=None, tol=1e-10, max_iter=50,
+               debug_mode=False, closed_form=True):
+    """
+    solveVreal is the pressure-driven solver: it computes the real flow rate and exit velocity of every cylindrical nozzle
+    for one or several applied pressures, all nozzles at once.
+
+    For a cylindrical nozzle, the Hagen-Poiseuille resistance used by calculateReq (with the Weissenberg-Rabinowitsch
+    correction) gives P - P_amb = Ri(Q) * Q = (4 * L / D) * tau(SR), where tau(SR) = eta(SR) * SR is the wall stress
+    of the behavior law and SR the corrected wall shear rate. The solver finds SR with a safeguarded Newton iteration
+    on ln(tau) = f(ln(SR)), using the analytic derivative of the viscosity (see rheologyModels). Each nozzle keeps a
+    bracket of its root and falls back to bisection whenever a Newton step leaves it (steps are bounded while the
+    bracket is still open), and the iteration cap guarantees termination. Nozzles whose wall stress is below the yield
+    stress tau_0 do not flow (Q = 0).
+
+    Laws whose wall stress can be inverted in closed form (power law, Newtonian, Bingham, Herschel-Bulkley and Casson,
+    see rheologyModels) skip the iteration: the shear rates of all nozzles are computed directly by model.shearRate,
+    and nbIter is 0. The other laws (Sisko, Carreau, Cross, extended Herschel-Bulkley) are solved iteratively.
+
+    Inputs:
+        P (array-like): Applied pressure(s) (nP), or one row per head (nh x nP)
+        D (array-like): Nozzle diameter array (3 x alpha), or a stack of heads (nh x 3 x alpha)
+        L (array-like): Nozzle length and its error (2), or one per head (nh x 2)
+        n, K, eta_0, eta_inf, tau_0, lmbda, a (numeric): Material rheology parameters, scalars or one value per head (nh)
+        P_amb (numeric): Ambient pressure
+        Q_guess (array-like): Optional starting flow rates, broadcastable to the output
+        tol (numeric): Convergence criterion on the relative change of the shear rate
+        max_iter (int): Iteration cap
+        debug_mode (bool): Flag for printing debug information
+        closed_form (bool): Use the closed-form inversion of invertible laws (False forces the iteration)
+
+    Outputs (shape nP x alpha, or nh x nP x alpha for several heads):
+        v_real (array-like): Real nozzle exit velocities
+        Q_real (array-like): Real nozzle flow rates
+        nbIter (array-like): Number of iterations used by each nozzle
+        converged (array-like): Convergence mask
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+    P = np.asarray(P, dtype=float)
+    D = np.asarray(D, dtype=float)
+    L = np.asarray(L, dtype=float)
+
+    if D.ndim == 2:
+        D0 = D[0]
+        L0 = L[0]
+        P = P[..., np.newaxis]
+    elif D.ndim == 3:
+        D0 = D[:, np.newaxis, 0, :]
+        L0 = np.broadcast_to(L, (D.shape[0], 2))[:, 0, np.newaxis, np.newaxis]
+        P = np.atleast_1d(P)[..., np.newaxis]
+        if P.ndim == 2:
+            P = P[np.newaxis]
+        n, K, eta_0, eta_inf, tau_0, lmbda, a = (_perHead(x, D.shape[0]) for x in (n, K, eta_0, eta_inf, tau_0, lmbda, a))
+    else:
+        raise ValueError("Input array D must be 2-dimensional (one head) or 3-dimensional (several heads).")
+
+    rabi = (3 + (1 / n)) / 4  # Weissenberg-Rabinowitsch correction
+
+    # Wall stress imposed by the pressure, and shear rate <-> flow rate conversion
+    tau_w = (P - P_amb) * D0 / (4 * L0)
+    SR_per_Q = rabi * 32 / (np.pi * D0 ** 3)
+    shape = np.broadcast(tau_w, SR_per_Q).shape
+    tau_w = np.broadcast_to(tau_w, shape)
+    SR_per_Q = np.broadcast_to(SR_per_Q, shape)
+
+    # Behavior law resolved once, with its parameters flattened like the nozzles so that they can follow the active
+    # subset
+    model = rheologyModels.resolveModel(*(np.broadcast_to(x, shape).ravel() if np.ndim(x) else x
+                                          for x in (n, K, eta_inf, eta_0, tau_0, lmbda, a)))
+    per_nozzle = any(np.ndim(p) for p in model.params)
+
+    flowing = (tau_w > tau_0).ravel()
+    nbIter = np.zeros(flowing.size, dtype=int)
+    if closed_form and model.invertible:
+        # Closed-form inversion of the wall stress: all the flow rates at once, without iteration
+        SR = np.where(flowing, model.shearRate(np.where(flowing, tau_w.ravel(), 0.0)), 0.0)
+        converged = np.ones(flowing.size, dtype=bool)
+        profiling.count('solveVreal/closed form')
+    else:
+        SR, nbIter, converged = _iterate(model, per_nozzle, tau_w.ravel(), flowing, SR_per_Q.ravel(), Q_guess, shape,
+                                         tol, max_iter, debug_mode)
+
+    profiling.count('solveVreal/calls')
+    profiling.count('solveVreal/not converged', np.count_nonzero(~converged))
+    if debug_mode and not np.all(converged):
+        logger.debug('solveVreal: %d nozzle(s) did not converge in %d iterations', np.count_nonzero(~converged), max_iter)
+
+    SR = SR.reshape(shape)
+    flowing = flowing.reshape(shape)
+    nbIter = nbIter.reshape(shape)
+    converged = converged.reshape(shape)
+    Q_real = np.where(flowing, SR / SR_per_Q, 0.0)
+    v_real = Q_real / (0.25 * np.pi * D0 ** 2)
+
+    return v_real, Q_real, nbIter, converged
+
+
+def _iterate(model, per_nozzle, tau_w, flowing, SR_per_Q, Q_guess, shape, tol, max_iter, debug_mode):
+    """
+    Safeguarded Newton iteration of solveVreal on ln(tau) = f(ln(SR)), for the laws without a closed-form inversion
+    (all arrays are flattened, one entry per nozzle).
+
+    Outputs:
+        SR (array-like): Wall shear rates (0 for the nozzles that do not flow)
+        nbIter (array-like): Number of iterations used by each nozzle
+        converged (array-like): Convergence mask
+    """
+    max_step = 10.0  # Largest change of ln(SR) per iteration
+
+    def stress(x, idx):
+        SR = np.exp(x)
+        eta, slope = (model.select(idx) if per_nozzle else model).etaSlope(SR)
+        # f = ln(tau) - ln(tau_w), df/dx = SR * tau'(SR) / tau = 1 + SR * eta' / eta
+        return np.log(eta * SR), 1 + SR * slope / eta
+
+    log_tau_w = np.log(np.where(flowing, tau_w, 1.0))
+
+    # Starting point: given flow rates, or one Newton step from SR = 1 (exact for a pure power law)
+    if Q_guess is not None:
+        with np.errstate(divide='ignore'):
+            x = np.log(np.broadcast_to(Q_guess, shape).ravel() * SR_per_Q)
+    else:
+        f0, df0 = stress(np.zeros(log_tau_w.size), slice(None))
+        x = -(f0 - log_tau_w) / df0
+    x = np.where(np.isfinite(x), x, 0.0)
+
+    # Bracket of the root of every nozzle (ln(tau) is increasing in ln(SR)), shrunk as the iteration goes
+    lo = np.full(x.size, -np.inf)
+    hi = np.full(x.size, np.inf)
+
+    nbIter = np.zeros(x.size, dtype=int)
+    converged = ~flowing
+    for iteration in range(max_iter):
+        act = np.flatnonzero(~converged)
+        if act.size == 0:
+            break
+        xa, lo_a, hi_a = x[act], lo[act], hi[act]
+        f, df = stress(xa, act)
+        f = f - log_tau_w[act]
+        # Shrink the bracket with the current point
+        lo_a = np.where(f < 0, xa, lo_a)
+        hi_a = np.where(f > 0, xa, hi_a)
+        # Newton step, replaced by bisection when it leaves the bracket (or by a bounded step while the bracket is
+        # still open on that side)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = -f / df
+            step = np.where(np.isfinite(step) & (df > 0), step, -np.sign(f) * max_step)
+            x_new = xa + np.clip(step, -max_step, max_step)
+            outside = (x_new <= lo_a) | (x_new >= hi_a)
+            x_new = np.where(outside & np.isfinite(lo_a) & np.isfinite(hi_a), 0.5 * (lo_a + hi_a), x_new)
+            x_new = np.where(outside & np.isinf(lo_a), hi_a - max_step, x_new)
+            x_new = np.where(outside & np.isinf(hi_a), lo_a + max_step, x_new)
+        nbIter[act] += 1
+        converged[act] = (np.abs(x_new - xa) < tol) | (f == 0) | (hi_a - lo_a < tol)
+        x[act], lo[act], hi[act] = x_new, lo_a, hi_a
+        if profiling.isEnabled():
+            profiling.record('solveVreal', iteration=iteration + 1, active=act.size, residual=np.max(np.abs(f)))
+        if debug_mode:
+            logger.debug('Newton iteration: %d nozzle(s) not converged', np.count_nonzero(~converged))
+
+    return np.where(flowing, np.exp(x), 0.0), nbIter, converged
@@ -1,5 +1,8 @@
+import logging
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 def validateReynolds(rho, v, D, eta, debug_mode=False):
     """
     validateReynolds is the function used to validate whether a laminar flow is occurring in the nozzles of the robot. Upon validation, the Hagen-
@@ -27,7 +30,7 @@ def validateReynolds(rho, v, D, eta, debug_mode=False):
 
     if np.isscalar(rho): #and np.isscalar(eta):
         if np.any(rho == 0):
-            print('Reynolds validation is skipped since rho = 0. Update material database to activate Reynolds validation.')
+            logger.info('Reynolds validation is skipped since rho = 0. Update material database to activate Reynolds validation.')
             typeEcoul = np.full(D.shape[0], np.nan)
             Re = np.full(D.shape[0], np.nan)
         else:
@@ -37,18 +40,18 @@ def validateReynolds(rho, v, D, eta, debug_mode=False):
             if np.all(Re > 0) and np.all(Re < 100):  # Laminar
                 typeEcoul = 0
                 if debug_mode:
-                    print('All flow rates are laminar')
+                    logger.debug('All flow rates are laminar')
             elif np.any((Re >= 100) & (Re <= 2500)):  # Transition
                 typeEcoul = 1
                 pos = np.where((Re >= 100) & (Re <= 2500))[0]
-                print('The flow is in the transition zone for nozzles #', pos)
+                logger.warning('The flow is in the transition zone for nozzles # %s', pos, extra={'nozzles': pos})
             elif np.any(Re > 2500):  # Turbulent
                 typeEcoul = 2
                 pos = np.where(Re > 2500)[0]
-                print('The flow is turbulent for nozzles #', pos)
+                logger.warning('The flow is turbulent for nozzles # %s', pos, extra={'nozzles': pos})
             else:  # Negative Re number
                 typeEcoul = np.nan
-                print('Reynolds is negative')
+                logger.warning('Reynolds is negative')
     else:
         raise ValueError("Inputs 'rho', 'v', 'D', and 'eta' must be scalar values.")
 
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite of the MEPM pipeline at increasing scale.
+
+Every stage of the velocity-driven model is timed on heads of 26 up to 10^5 nozzles: calculateQ, calculateSR,
+calculateVisco (once per registered behavior law), calculateReq, calculateReqError, generateP and generate_V_real, and
+calculateQ, calculateSR and calculateReq again with a PrintHead (cached geometric invariants). The batched path
+(generatePBatch) is also timed against the sweep length (number of speeds) and the number of materials (one head per
+material). Heads and materials are generated from a fixed seed, so the runs are reproducible.
+
+Every run is appended as one JSON line to the history file ($MEPM_CACHE_DIR/benchmarks/history.jsonl, default
+~/.cache/mepm/benchmarks/history.jsonl, outside the repository), with the commit, the NumPy and Python versions and the
+host, and is compared to the last run of the same host: a case slower than the previous one by more than the
+tolerance is reported as a regression (exit code 1 with --check). Run from the repository root:
+
+    python benchmarks/benchPipeline.py                 # full suite, appended to the history file
+    python benchmarks/benchPipeline.py --quick --check # small sizes only, fails on regressions
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchReqError import best  # noqa: E402
+from Velocity_driven import (calculateQ, calculateReq, calculateReqError, calculateSR, calculateVisco,  # noqa: E402
+                             generateP, generatePBatch, generateVreal, printHead, rheologyModels)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY = os.path.join(os.environ.get('MEPM_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'mepm')),
+                       'benchmarks', 'history.jsonl')
+
+ALPHAS = (26, 1000, 10000, 100000)
+SWEEPS = (1, 10, 100, 1000)
+MATERIAL_COUNTS = (1, 10, 100)
+QUICK = dict(alphas=(26, 1000), sweeps=(1, 10), materials=(1, 10))
+
+# One representative material per registered behavior law: (n, K, eta_inf, eta_0, tau_0, lmbda, a)
+LAWS = {
+    'Sisko': (0.4, 500.0, 10.0, 0, 0, 0, 0),
+    'Newtonian': (1, 0, 50.0, 0, 0, 0, 0),
+    'PowerLaw': (0.3575, 6673.0, 0, 0, 0, 0, 0),
+    'Carreau': (0.4, 0, 5.0, 1e4, 0, 1.0, 2.0),
+    'Bingham': (1, 0, 30.0, 0, 200.0, 0, 0),
+    'HerschelBulkleyExtended': (0.5, 300.0, 5.0, 0, 200.0, 0, 0),
+    'HerschelBulkley': (0.5, 300.0, 0, 0, 200.0, 0, 0),
+    'Cross': (0.6, 0, 0, 1e4, 0, 1.0, 0),
+    'Casson': (0.5, 0, 10.0, 0, 200.0, 0, 0),
+}
+RHO = 1279.0
+P_AMB = 101325
+V = 50.0
+
+
+def makeHead(alpha, rng):
+    """Cylindrical head of alpha nozzles around the 26-nozzle reference head."""
+    D = np.zeros((3, alpha))
+    D[0] = 0.255 + 0.002 * rng.standard_normal(alpha)
+    D[1] = 0.001
+    D[2] = 3.55
+    L = np.array([6.5, 0.01])
+    return D, L
+
+
+def quiet(func):
+    """Wraps a stage that prints its results, so that only the computation is timed meaningfully."""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+    return run
+
+
+def stageCases(alpha, rng):
+    """(name, callable) of every pipeline stage for one head size."""
+    D, L = makeHead(alpha, rng)
+    n, K, eta_inf, eta_0, tau_0, lmbda, a = LAWS['PowerLaw']
+    Q, dQ, Q_eq = calculateQ.calculateQ(D, V)
+    SR, dSR = calculateSR.calculateSR(Q, D, V, n)
+    eta, deta = calculateVisco.calculateVisco(SR, n, K, eta_inf, eta_0, tau_0, lmbda, a, False, dSR)
+    R_eq, Ri = calculateReq.calculateReq(Q, eta, D, L, 0.0, n, K, eta_0, eta_inf, tau_0, lmbda, a)
+    with contextlib.redirect_stdout(io.StringIO()):
+        P = generateP.generateP(RHO, V, D, L, 0.0, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_AMB, 'cyl', 0, 0, False)[0]
+
+    head = printHead.PrintHead(D, L)
+
+    cases = [
+        ('calculateQ', lambda: calculateQ.calculateQ(D, V)),
+        ('calculateQ[PrintHead]', lambda: calculateQ.calculateQ(head, V)),
+        ('calculateSR', lambda: calculateSR.calculateSR(Q, D, V, n)),
+        ('calculateSR[PrintHead]', lambda: calculateSR.calculateSR(Q, head, V, n)),
+    ]
+    for law, params in LAWS.items():
+        cases.append((f'calculateVisco[{law}]',
+                      lambda params=params: calculateVisco.calculateVisco(SR, *params, False, dSR)))
+    cases += [
+        ('calculateReq', lambda: calculateReq.calculateReq(Q, eta, D, L, 0.0, n, K, eta_0, eta_inf, tau_0, lmbda, a)),
+        ('calculateReq[PrintHead]', lambda: calculateReq.calculateReq(Q, eta, head, L, 0.0, n, K, eta_0, eta_inf, tau_0,
+                                                                       lmbda, a)),
+        ('calculateReq[tapered]', lambda: calculateReq.calculateReq(Q, eta, D, L, 0.0, n, K, eta_0, eta_inf, tau_0,
+                                                                     lmbda, a, 'tapered')),
+        ('calculateReqError', lambda: calculateReqError.calculateReqError(R_eq, Ri, alpha, D, L, eta, deta)),
+        ('generateP', quiet(lambda: generateP.generateP(RHO, V, D, L, 0.0, n, K, eta_0, eta_inf, tau_0, lmbda, a,
+                                                        P_AMB, 'cyl', 0, 0, False))),
+        ('generate_V_real', quiet(lambda: generateVreal.generate_V_real(P, 0.0, Q, RHO, V, D, L, n, K, eta_0, eta_inf,
+                                                                        tau_0, lmbda, a, P_AMB, False))),
+    ]
+    return cases
+
+
+def batchCases(sweeps, materials, rng):
+    """(name, callable) of generatePBatch against the sweep length and the number of materials."""
+    D, L = makeHead(26, rng)
+    n, K, eta_inf, eta_0, tau_0, lmbda, a = LAWS['PowerLaw']
+    cases = []
+    for nv in sweeps:
+        v = np.linspace(1, 100, nv)
+        cases.append((f'generatePBatch[speeds={nv}]', lambda v=v: generatePBatch.generatePBatch(
+            RHO, v, D, L, 0.0, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_AMB, 'cyl', 0, 0)))
+    v = np.linspace(1, 100, 10)
+    for nm in materials:
+        heads = np.repeat(D[np.newaxis], nm, axis=0)
+        K_m = K * (1 + 0.1 * rng.random(nm))
+        n_m = n * (1 + 0.1 * rng.random(nm))
+        cases.append((f'generatePBatch[materials={nm}]',
+                      lambda heads=heads, K_m=K_m, n_m=n_m: generatePBatch.generatePBatch(
+                          RHO, v, heads, L, 0.0, n_m, K_m, eta_0, eta_inf, tau_0, lmbda, a, P_AMB, 'cyl', 0, 0)))
+    return cases
+
+
+def environment():
+    """Description of the code and machine a run was made on."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return dict(timestamp=datetime.datetime.now().isoformat(timespec='seconds'), commit=commit,
+                host=platform.node(), machine=platform.machine(), python=platform.python_version(),
+                numpy=np.__version__)
+
+
+def lastRun(history, host):
+    """Most recent run of the history file made on the same host, None if there is none."""
+    previous = None
+    if os.path.exists(history):
+        with open(history, encoding='utf-8') as fh:
+            for line in fh:
+                try:
+                    run = json.loads(line)
+                except ValueError:
+                    continue
+                if run.get('host') == host:
+                    previous = run
+    return previous
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark suite of the MEPM pipeline.')
+    parser.add_argument('--quick', action='store_true', help='small sizes only')
+    parser.add_argument('--history', default=HISTORY, help='history file (JSON lines)')
+    parser.add_argument('--no-record', action='store_true', help='do not append this run to the history')
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help='slow-down ratio over the previous run reported as a regression')
+    parser.add_argument('--check', action='store_true', help='exit with code 1 when a regression is found')
+    args = parser.parse_args(argv)
+
+    sizes = QUICK if args.quick else dict(alphas=ALPHAS, sweeps=SWEEPS, materials=MATERIAL_COUNTS)
+    covered = {law for law in LAWS}
+    missing = [cls.__name__ for cls in rheologyModels.MODELS if cls.__name__ not in covered]
+    if missing:
+        print(f"warning: no benchmark material for the behavior law(s) {', '.join(missing)}")
+
+    rng = np.random.default_rng(0)
+    run = environment()
+    previous = lastRun(args.history, run['host'])
+    reference = {result['case']: result['seconds'] for result in previous['results']} if previous else {}
+
+    results = []
+    regressions = []
+    print(f"{'case':<52} {'time [s]':>12} {'previous':>12}")
+    cases = [(f'{name}@alpha={alpha}', func) for alpha in sizes['alphas'] for name, func in stageCases(alpha, rng)]
+    cases += batchCases(sizes['sweeps'], sizes['materials'], rng)
+    for case, func in cases:
+        seconds = best(func)
+        results.append(dict(case=case, seconds=seconds))
+        ratio = ''
+        if case in reference:
+            ratio = f'{seconds / reference[case]:11.2f}x'
+            if seconds > args.tolerance * reference[case]:
+                regressions.append(case)
+                ratio += '  REGRESSION'
+        print(f'{case:<52} {seconds:12.3e} {ratio:>12}')
+
+    run.update(quick=args.quick, results=results)
+    if not args.no_record:
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+        with open(args.history, 'a', encoding='utf-8') as fh:
+            fh.write(json.dumps(run) + '\n')
+        print(f'Run recorded in {args.history}')
+    if previous:
+        print(f"{len(regressions)} regression(s) against the run of {previous['timestamp']} ({previous['commit']})")
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
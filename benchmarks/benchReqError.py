@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Scaling benchmark of calculateReqError, from the 26-nozzle head up to 10^5 nozzles.
+
+The previous per-nozzle loop (which recomputed np.sum(1 / Ri) for every nozzle, O(alpha^2)) is kept below as the
+reference; it is only timed up to LOOP_MAX_ALPHA nozzles. Run from the repository root:
+
+    python benchmarks/benchReqError.py
+"""
+import os
+import sys
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Velocity_driven import calculateReqError  # noqa: E402
+
+ALPHAS = (26, 100, 1000, 10000, 100000)
+LOOP_MAX_ALPHA = 2000
+
+
+def calculateReqErrorLoop(R_eq, Ri, alpha, D, L, eta, deta):
+    """Per-nozzle loop version of calculateReqError (cylindrical nozzles), used as reference."""
+    dRi = np.ones(alpha)
+    sum_terms = np.zeros(alpha)
+    for i in range(alpha):
+        dRi[i] = (np.pi / 128) * (np.sum(1 / Ri) ** (-2)) * np.sqrt(((D[0, i] ** 2 / (eta[i] * L[0])) ** 4 * (L[0] * deta[i]) ** 2) +
+                                                                      ((eta[i] * L[1]) ** 2) +
+                                                                      16 * ((eta[i] * L[0] * D[1, i] / D[0, i])) ** 2)
+        sum_terms[i] = (dRi[i] / Ri[i] ** 2) ** 2
+    ReqError = R_eq ** 2 * np.sqrt(np.sum(sum_terms))
+    return ReqError, dRi
+
+
+def makeHead(alpha, rng):
+    D = np.zeros((3, alpha))
+    D[0] = 0.255 + 0.002 * rng.standard_normal(alpha)
+    D[1] = 0.001
+    D[2] = 3.55
+    L = np.array([6.5, 0.01])
+    eta = 100 + rng.random(alpha)
+    deta = 0.01 * eta
+    Ri = 128 * L[0] * eta / (np.pi * D[0] ** 4)
+    R_eq = 1 / np.sum(1 / Ri)
+    return R_eq, Ri, D, L, eta, deta
+
+
+def best(func, repeat=5):
+    number = 1
+    while True:
+        elapsed = timeit.timeit(func, number=number)
+        if elapsed > 0.05 or number >= 10000:
+            break
+        number *= 10
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'alpha':>8} {'vectorized [s]':>16} {'tapered [s]':>14} {'loop [s]':>12} {'speed-up':>10}")
+    for alpha in ALPHAS:
+        R_eq, Ri, D, L, eta, deta = makeHead(alpha, rng)
+        D_tap = D.copy()
+        D_tap[0] = 0.25
+        Ri_tap = np.full(alpha, 1e4)
+
+        t_vec = best(lambda: calculateReqError.calculateReqError(R_eq, Ri, alpha, D, L, eta, deta))
+        t_tap = best(lambda: calculateReqError.calculateReqError(Ri_tap, Ri_tap, alpha, D_tap, L, eta, deta,
+                                                                 "tapered", 0.4, 5000, Q=np.full(alpha, 0.1)))
+        if alpha <= LOOP_MAX_ALPHA:
+            t_loop = best(lambda: calculateReqErrorLoop(R_eq, Ri, alpha, D, L, eta, deta), repeat=3)
+            ref = calculateReqErrorLoop(R_eq, Ri, alpha, D, L, eta, deta)
+            new = calculateReqError.calculateReqError(R_eq, Ri, alpha, D, L, eta, deta)
+            assert np.allclose(ref[0], new[0]) and np.allclose(ref[1], new[1])
+            loop = f"{t_loop:12.3e} {t_loop / t_vec:9.0f}x"
+        else:
+            loop = f"{'-':>12} {'-':>10}"
+        print(f"{alpha:8d} {t_vec:16.3e} {t_tap:14.3e} {loop}")
+
+
+if __name__ == "__main__":
+    main()
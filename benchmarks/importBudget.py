@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Import-time budget of the computational core and of the headless entry points.
+
+Each statement is run in a fresh interpreter, like a short CLI invocation or a new sweep worker process. The script
+reports its import time above the cost of importing NumPy alone, fails if it exceeds its budget, and fails if any of
+the heavy optional modules (plotting, GUI, Excel, pandas) got loaded. Run from the repository root:
+
+    python benchmarks/importBudget.py
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be loaded on first use (plots, GUI, Excel files, tables)
+FORBIDDEN = ('matplotlib', 'tkinter', 'pandas', 'xlrd', 'openpyxl')
+
+# Statement -> budget in ms on top of "import numpy"
+BUDGETS = {
+    'from Velocity_driven import generateP, generatePBatch, generateVreal, solveVreal, monteCarloP': 50,
+    'import mepm': 50,
+    'from tools import materialCatalog, resultsStore, sweepRunner': 100,
+    'import main': 100,
+}
+REPEAT = 5
+
+PROBE = """
+import sys, time
+{setup}
+t0 = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - t0
+loaded = sorted({{name.split('.')[0] for name in sys.modules}} & set({forbidden!r}))
+print(elapsed * 1000, ','.join(loaded))
+"""
+
+
+def measure(statement, setup=''):
+    """Best import time (ms) of a statement over REPEAT fresh interpreters, and the forbidden modules it loaded."""
+    times = []
+    loaded = ''
+    for _ in range(REPEAT):
+        out = subprocess.run([sys.executable, '-c', PROBE.format(setup=setup, statement=statement, forbidden=FORBIDDEN)],
+                             cwd=ROOT, capture_output=True, text=True, check=True).stdout.split('\n')
+        probe = out[-2].split(' ')  # last printed line; the imported module may print before it
+        times.append(float(probe[0]))
+        loaded = probe[1] if len(probe) > 1 else ''
+    return min(times), loaded
+
+
+def main():
+    baseline, _ = measure('import numpy')
+    print(f"import numpy: {baseline:.1f} ms (baseline)")
+    failed = False
+    for statement, budget in BUDGETS.items():
+        elapsed, loaded = measure(statement, setup='import numpy')
+        verdict = 'ok'
+        if elapsed > budget:
+            verdict = f'OVER BUDGET ({budget} ms)'
+            failed = True
+        if loaded:
+            verdict += f', loaded {loaded}'
+            failed = True
+        print(f"{statement}: +{elapsed:.1f} ms {verdict}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
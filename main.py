@@ -15,62 +15,32 @@
 **************************************************************************
 """
 
-from Velocity_driven import generateP, calculateQ
-from tools import readMaterial, comparePlotPV, comparePlotVisco, comparePlotQ, printTableInConsole
+from Velocity_driven import generateP, generatePBatch, calculateQ
+from tools import headCatalog, logSetup, materialCatalog, pressureCache, readMaterial, resultsStore, printTableInConsole
 import numpy as np
-import math
 import os
 import sys
-import openpyxl
-import matplotlib.pyplot as plt
-import tkinter as tk
-from tkinter import filedialog
-import xlrd
+
+# The GUI (tkinter) and plotting (matplotlib, tools.comparePlot*) modules are imported where they are used, so that
+# importing this script or running it without plots does not pay for them.
 
 
 # Constants
 P_amb = 101325  # Ambient pressure [Pa]
 Noz_type = "cyl"  # Either tapered or cylindrical
-alpha = 26  # Number of nozzles
+head_catalog = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'heads.toml')  # see tools/headCatalog.py
+head_id = 'MN26-tapered' if Noz_type == "tapered" else 'MN26'  # 26 cylindrical (or tapered) Multinozzle
 debug_mode = True
 graph_mode = 'S'  # Plotting mode
 #     P = Pressure vs. Speed
 #     V = Viscosity vs. Shear rate
 #     S = Printing Speed vs. nozzle ID number
 #     Q = Mass flow rate vs. printing speed
+results_store = None  # Results store directory the run is appended to (e.g. 'results/main.mepm'), None to skip
+use_cache = True  # Reuse the results of previous runs for the same material, head and speeds (tools/pressureCache.py)
+log_file = None  # JSON lines log of the run (e.g. 'results/main.jsonl'), see tools/logSetup.py
 
 
-# Nozzle geometry
-D = np.zeros((3, alpha))
-
-# For 26 cylindrical Multinozzle
-D[0, :] = np.array([0.257193333, 0.25623, 0.25612, 0.256406667, 0.25561, 0.25561, 0.25612, 0.255536667, 0.255376667,
-                    0.25357, 0.25459, 0.25561, 0.2551, 0.25663, 0.25459, 0.2551, 0.25255, 0.25408, 0.25357, 0.25459,
-                    0.25816, 0.25459, 0.25663, 0.25765, 0.25714, 0.25459])
-# D[0, :] = np.ones(alpha) * 0.250
-D[1, :] = np.ones(alpha) * 0.001  # Error on the nozzle diameters
-D[2, :] = np.ones(alpha) * 3.55
-
-# D = np.array([[0.257193333, 0.25623, 0.25612, 0.256406667, 0.25561, 0.25561, 0.25612, 0.255536667, 0.255376667,
-#                0.25357, 0.25459, 0.25561, 0.2551, 0.25663, 0.25459, 0.2551, 0.25255, 0.25408, 0.25357, 0.25459,
-#                0.25816, 0.25459, 0.25663, 0.25765, 0.25714, 0.25459],
-#               [0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001,
-#                0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001]])
-# D[0, 6] = 1*D[0, 6]
-# D = np.array([[np.ones(alpha)*0.250], [np.ones(alpha)*0.001]])
-# diameter is clogged
-
-D_avg = np.array([np.mean(D[0, :]), np.mean(D[1, :])]
-                 )  # Average diameter and error
-if Noz_type == "tapered":
-    L = np.array([17.25, 0.01])  # Nozzle length and error
-else:
-    L = np.array([6.5, 0.01])  # Nozzle length and error
-
-# theta is the half-cone angle of the nozzle
-angle = 5.3  # deg
-theta = math.radians(angle)  # rad
-
 # Desired printing speed [mm/s]
 v = np.array([50, 100, 150, 200, 250])
 
@@ -83,12 +53,14 @@ def open_material_file():
         tuple: A tuple containing the selected file path or None if cancelled,
                and a list of material sheet names (if a file was chosen).
     """
+    import tkinter as tk
+    from tkinter import filedialog
+
     root = tk.Tk()
     root.withdraw()  # Hide the main window
     filepath = filedialog.askopenfilename(filetypes=[("Excel files", "*.xls")])
     if filepath:
-        workbook = xlrd.open_workbook(filepath)
-        sheet_names = workbook.sheet_names()
+        sheet_names = materialCatalog.loadMaterialCatalog(filepath).sheet_names
         printTableInConsole.printTableInConsole(sheet_names)
         return filepath, sheet_names
     else:
@@ -96,6 +68,22 @@ def open_material_file():
 
 
 if __name__ == "__main__":
+    logSetup.configureLogging('DEBUG' if debug_mode else 'INFO', json_file=log_file, stream=sys.stdout)
+
+    # Nozzle geometry, with its cached invariants (areas, D^3, D^4...), loaded here rather than on import
+    head = headCatalog.loadHeadCatalog(head_catalog)[head_id]
+    D = head  # Diameters (3 x alpha): outlet, error, inlet
+    alpha = head.alpha  # Number of nozzles
+    # D = np.array(head)  # Writable copy of the diameters, e.g. D[0, 6] = 0.9*D[0, 6] to see how the pressure changes
+    # when a nozzle diameter is clogged (IncrementalHead.scanClog in Velocity_driven/incrementalHead.py scans every
+    # nozzle at once)
+
+    D_avg = np.array([np.mean(D[0, :]), np.mean(D[1, :])])  # Average diameter and error
+    L = head.L  # Nozzle length and error
+
+    # theta is the half-cone angle of the nozzle
+    theta = head.theta  # rad
+
     material_file_path, sheet_names = open_material_file()
 
     if material_file_path is None:
@@ -132,15 +120,6 @@ if __name__ == "__main__":
         print(f"- Density: {rho}")
         print(f"- Weight fraction: {w}")
         # ... (add print statements for other properties)
-        # Initialize arrays for results
-        P = np.zeros(len(v))
-        eta = np.zeros((len(v), alpha))
-        SR = np.zeros((len(v), alpha))
-        Q = np.zeros((len(v), alpha))
-        dP = np.zeros((len(v), alpha))
-        dRi = np.zeros((len(v), alpha))
-        deta = np.zeros((len(v), alpha))
-        dSR = np.zeros((len(v), alpha))
 
     # def compute_overall_p(v, rho, D_avg, L, n, K, eta_0, eta_inf, tau_0, lambda_, a, P_amb, debug_mode=False):
         """
@@ -173,24 +152,21 @@ if __name__ == "__main__":
                 - dSR (numpy.ndarray): Array of shear rate derivatives (optional, might depend on generateP).
         """
 
-        for i in range(len(v)):
-            try:
-                newP, newEta, newSR, newQ, newdP, newdRi, newdEta, newdSR = generateP.generateP(
-                    rho, v[i], D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP, debug_mode)
-                P[i] = newP
-                eta[i] = newEta
-                SR[i] = newSR
-                Q[i] = newQ
-                dP[i] = newdP
-                dRi[i] = newdRi
-                deta[i] = newdEta
-                dSR[i] = newdSR
-
-            except ValueError as e:
-                if str(e) == "Pressure could not be computed due to invalid Reynolds number":
-                    print(e)
-                else:
-                    raise e  # Re-raise other ValueErrors
+        # Whole velocity sweep evaluated in one vectorized pass
+        if use_cache:
+            cache = pressureCache.PressureCache(catalog=materialCatalog.loadMaterialCatalog(material_file_path))
+            compute = cache.generatePBatch
+        else:
+            compute = generatePBatch.generatePBatch
+        P, eta, SR, Q, deta, dP, dRi, dSR = compute(
+            rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP, debug_mode)
+        if np.any(np.isnan(P)):
+            print("Pressure could not be computed due to invalid Reynolds number for v =", v[np.isnan(P)])
+        if results_store is not None:
+            resultsStore.writeRun(results_store, {'material': material, 'material_file': material_file_path,
+                                                  'Noz_type': Noz_type, 'D': np.asarray(D).tolist(), 'L': L.tolist(),
+                                                  'theta': theta, 'P_amb': P_amb},
+                                  v, P, eta, SR, Q, deta, dP, dRi, dSR)
 
     # Return results (adjust based on generateP)
         # return P, eta, SR, Q, dP, dRi, deta, dSR
@@ -209,14 +185,17 @@ if __name__ == "__main__":
         dP = dP/1000  # convert Pa to kPa and plot
 
         if 'P' in graph_mode:
+            from tools import comparePlotPV
             # Plot pressure vs. printing speed
             comparePlotPV.comparePlotPV(v, P)
 
         if 'V' in graph_mode:
+            from tools import comparePlotVisco
             # Plot viscosity vs. shear rate for each nozzle
             comparePlotVisco.comparePlotVisco(np.mean(SR, 1), np.mean(eta, 1))
 
         if 'S' in graph_mode:
+            import matplotlib.pyplot as plt
             # Plot printing exit velocity vs. nozzle ID number
             v_all = [v[0]]*alpha
             plt.bar(list(range(1, alpha+1)), v_all,
@@ -227,6 +206,7 @@ if __name__ == "__main__":
             plt.show()
 
         if 'Q' in graph_mode:
+            from tools import comparePlotQ
             # Plot mass flow rate vs. printing speed
             comparePlotQ.comparePlotQ(v, np.sum(Q, 1)*rho*1e-6)
 
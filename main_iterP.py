@@ -2,17 +2,12 @@ import numpy as np
 import pandas as pd
 import os
 import sys
-import openpyxl
-import matplotlib.pyplot as plt
-import tkinter as tk
-from tkinter import filedialog
-import xlrd
 
-mepm_path = r"C:\Users\anirb\OneDrive\Desktop\Additive Nozzle Manufacturing\CODE FOR MEPM"
-sys.path.append(mepm_path)
+from Velocity_driven import generatePBatch, generateVreal, profiling, solveVreal
+from tools import headCatalog, logSetup
 
-from MEPM import generateP, generateVreal, calculateQ, calculatePrequired, calculateReq, calculateReqError, calculateSR, calculateVisco, validateReynolds, generateVreal 
-from tools import printTableInConsole, readMaterial
+# Print head catalog (see tools/headCatalog.py), next to this script
+HEAD_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'heads.toml')
 
 def valid_user_input(prompt, is_array=False):
     while True:
@@ -80,6 +75,10 @@ def main():
     # Initializing variables
     debug_mode = False  # To print in the console all the intermediate values for calculation
     dP_crit = 10**-4  # Error margin for Pressure calculation
+    profile = False  # To record the time of every stage and the pressure loop iterations (see Velocity_driven/profiling.py)
+    logSetup.configureLogging('DEBUG' if debug_mode else 'INFO', stream=sys.stdout)
+    if profile:
+        profiling.enable()
 
     # Opening the material database file
     file = input("Enter the material database file to open: ")
@@ -108,16 +107,13 @@ def main():
 
         P_amb = 101325  # Ambient pressure [Pa]
 
-        D = np.array([[0.257193333, 0.25623, 0.25612, 0.256406667, 0.25561, 0.25561, 0.25612, 0.255536667, 0.255376667,
-                     0.25357, 0.25459, 0.25561, 0.2551, 0.25663, 0.25459, 0.2551, 0.25255, 0.25408, 0.25357, 0.25459,
-                     0.25816, 0.25459, 0.25663, 0.25765, 0.25714, 0.25459],
-                     [0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001,
-                      0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001]])
+        heads = headCatalog.loadHeadCatalog(HEAD_CATALOG)
+        D = np.array(heads['MN26'])  # Measured head (writable copy)
         D[0,6] = 0.9*D[0,6]
-        D_avg = np.array([[0.25] * len(D), [0.01] * len(D)])
+        D_avg = heads['MN26-nominal']  # Nominal head
         D_current = D_avg
 
-        L = np.array([6.5, 0.01])  # Nozzle length and error
+        L = heads['MN26'].L  # Nozzle length and error
 
         # Desired printing speed [mm/s]
         v = np.array([50, 100, 150, 200, 250])
@@ -134,17 +130,17 @@ def main():
         # D = D_real
         # L = L_real
         P = np.zeros(len(v))
-        eta = np.zeros((len(v), len(D)))
-        SR = np.zeros((len(v), len(D)))
-        Q = np.zeros((len(v), len(D)))
-        v_all = np.zeros((len(v), len(D)))
-        Q_all = np.zeros((len(v), len(D)))
-        Q_theo = np.zeros((len(v), len(D)))
-        Errv_real = np.zeros((len(v), len(D)))
-        dRi = np.zeros((len(v), len(D)))
+        eta = np.zeros((len(v), D.shape[1]))
+        SR = np.zeros((len(v), D.shape[1]))
+        Q = np.zeros((len(v), D.shape[1]))
+        v_all = np.zeros((len(v), D.shape[1]))
+        Q_all = np.zeros((len(v), D.shape[1]))
+        Q_theo = np.zeros((len(v), D.shape[1]))
+        Errv_real = np.zeros((len(v), D.shape[1]))
+        dRi = np.zeros((len(v), D.shape[1]))
         dP = np.zeros(len(v))
-        deta = np.zeros((len(v), len(D)))
-        dSR = np.zeros((len(v), len(D)))
+        deta = np.zeros((len(v), D.shape[1]))
+        dSR = np.zeros((len(v), D.shape[1]))
 
         # Compute overall P for desired nozzle exit speed and retrieve viscosity/shear rate data
         # for each P/v
@@ -152,68 +148,49 @@ def main():
         # Constants
         P_amb = 101325  # Ambient pressure [Pa]
 
-        D = np.array([[0.257193333, 0.25623, 0.25612, 0.256406667, 0.25561, 0.25561, 0.25612, 0.255536667, 0.255376667,
-                     0.25357, 0.25459, 0.25561, 0.2551, 0.25663, 0.25459, 0.2551, 0.25255, 0.25408, 0.25357, 0.25459,
-                     0.25816, 0.25459, 0.25663, 0.25765, 0.25714, 0.25459],
-                     [0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001,
-                      0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001, 0.001]])
+        heads = headCatalog.loadHeadCatalog(HEAD_CATALOG)
+        D = np.array(heads['MN26'])  # Measured head (writable copy)
         D[0,6] = 0.9*D[0,6]
-        D_avg = np.array([[0.25] * len(D), [0.01] * len(D)])
+        D_avg = heads['MN26-nominal']  # Nominal head
         D_current = D_avg
 
-        L = np.array([6.5, 0.01])  # Nozzle length and error
+        L = heads['MN26'].L  # Nozzle length and error
 
         # Desired printing speed [mm/s]
         v = np.array([50, 100, 150, 200, 250])
 
-        variation_P = dP_crit + 1
-        nbIter = 0  # Number of iteration needed for convergence
-        P_guess = 0
-
+        # Velocity-driven pressure of the measured head D, all speeds at once. The former substitution loop alternated
+        # generateP and generate_V_real until P stopped changing, but P does not depend on the real velocities: its
+        # fixed point is this single pass
         print("=" * 86)
-        while variation_P >= dP_crit:
-            nbIter += 1
-            if debug_mode:
-                print(f"Iteration Pressure #{nbIter}")
-
-            for i in range(len(v)):
-                newP, newEta, newSR, newQ, newdEta, newdP, newdRi, newdSR = generateP.generateP(rho, v[i], D_current, L, n, K, eta_0, eta_inf, tau_0, lambda_, a, P_amb, debug_mode)
-                if np.isnan(newP):
-                    raise ValueError("Pressure could not be computed due to invalid Reynolds number")
-                else:
-                    P[i] = newP
-                    eta[i, :] = newEta
-                    SR[i, :] = newSR
-                    Q[i, :] = newQ
-                    dP[i] = newdP
-                    dRi[i, :] = newdRi
-                    deta[i, :] = newdEta
-                    dSR[i, :] = newdSR
-            P_temp = P
-
-            # Compute true velocity and flow for nozzle true applied pressure
-            # for each P/v combination
-            for i in range(len(v)):
-                v_real, Q_real, dv_real, q_long = generateVreal.generate_V_real(P[i], dP[i], Q[i, :], rho, v[i], D, L, n, K, eta_0, eta_inf, tau_0, lambda_, a, P_amb, debug_mode)
-                v_all[i, :] = v_real
-                Q_all[i, :] = Q_real
-                Errv_real[i, :] = dv_real
-                Q_theo[i, :] = q_long
-
-            variation_P = abs(P_temp - P_guess) / P_guess  # Delta P with previous guess
-            P_guess = P_temp  # New Q guess
-            D_current = D
-
-            if debug_mode:
-                print(f"Q_temp_{nbIter} = {P_temp:.4f}")
-                print(f"dQ_{nbIter} = {variation_P:.8f}")
+        P, eta, SR, Q, deta, dP, dRi, dSR = generatePBatch.generatePBatch(
+            rho, v, D, L, 0, n, K, eta_0, eta_inf, tau_0, lambda_, a, P_amb, "cyl", 0, 0, debug_mode)
+        if np.any(np.isnan(P)):
+            raise ValueError(f"Pressure could not be computed due to invalid Reynolds number "
+                             f"(v = {v[np.isnan(P)]} mm/s)")
+        dP = dP[:, 0]
+
+        # Real velocities of the measured head at these pressures, all speeds at once, and their errors
+        v_all, Q_all, nbIter, converged = solveVreal.solveVreal(P, D, L, n, K, eta_0, eta_inf, tau_0, lambda_, a, P_amb)
+        if not np.all(converged):
+            raise ValueError(f"Real velocities did not converge in the iteration cap "
+                             f"(v = {v[~np.all(converged, axis=1)]} mm/s)")
+        if debug_mode:
+            print(f"Real velocity iterations per speed: {np.max(nbIter, axis=1)}")
+        for i in range(len(v)):
+            _, _, Errv_real[i, :], Q_theo[i, :] = generateVreal.generate_V_real(
+                P[i], dP[i], Q_all[i, :], rho, v[i], D, L, n, K, eta_0, eta_inf, tau_0, lambda_, a, P_amb, debug_mode)
+
+        if profile:
+            profiling.report()
+            profiling.writeTrace('profile_iterP.json')
 
         print("\n-------------------- Filament diameter calculation --------------------------\n")
         v_travel = v  # ./9
         for j in range(len(v_travel)):
             print(f"Filament diameters for v travel = {v_travel[j]:.2f} mm/s")
             D_fila = np.sqrt(4 * Q_all[j, :] / (np.pi * v_travel[j]))
-            printTableInConsole.print_table_in_console(D_fila)
+            printTableInConsole(D_fila)
 
         # Graphs ------------------------------------
         P = P / 1000  # convert Pa to kPa and plot
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+**************************************************************************
+ mepm command line entry point
+**************************************************************************
+ Description : Headless version of main.py. The material file, sheet(s), head geometry, speeds and output paths come
+ from a TOML configuration file and/or command line flags, so runs can be scripted on compute nodes. No GUI toolkit
+ is ever imported and plots are rendered with matplotlib's non-interactive Agg backend.
+
+ Usage:
+       python -m mepm run config.toml
+       python -m mepm run config.toml --sheet "0HMGS-12FS" --v 50 100 150 --output results/run.mepm
+       python -m mepm run --material-file materials.xls --sheet all --v 10:250:25 --output results/all.mepm
+       python -m mepm run --sheet all --head MN26-tapered --head-catalog heads.toml
+       python -m mepm run config.toml --no-cache --profile results/trace.json
+       python -m mepm run config.toml --uncertainty 10000
+       python -m mepm run config.toml --log-level INFO --log-json results/run.jsonl
+       tail -f pressure.log | python -m mepm monitor config.toml -
+       python -m mepm gcode config.toml part.gcode --output part_P.gcode --table table.bin
+       python -m mepm fit capillary.csv --slip --output fitted_sheet.csv
+
+ Every material is appended as one run to the results store (see tools/resultsStore.py), which can be reopened with
+ ResultsStore(path) and read back memory-mapped.
+
+ See example_config.toml for the configuration keys.
+
+ Authors: Raphaël Plante
+ Date: 2026
+**************************************************************************
+"""
+import argparse
+import datetime
+import math
+import os
+import sys
+import numpy as np
+
+from tools import logSetup
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    import tomli as tomllib
+
+# Head catalog shipped next to this script, and its head used when the [head] section gives neither an id nor diameters
+HEAD_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'heads.toml')
+DEFAULT_HEAD = 'MN26'
+
+# Percentiles of the required pressure band of 'run --uncertainty' (see Velocity_driven/monteCarloP.py)
+UNCERTAINTY_PERCENTILES = (2.5, 97.5)
+
+DEFAULT_CONFIG = {
+    'material': {'file': 'materials.xls', 'sheet': None},
+    'head': {'catalog': HEAD_CATALOG, 'id': None, 'Noz_type': None, 'D': None, 'D_error': 0.001, 'D_inlet': 3.55,
+             'L': [6.5, 0.01], 'theta_deg': 5.3},
+    'run': {'v': [50, 100, 150, 200, 250], 'P_amb': 101325, 'debug_mode': False, 'cache': True, 'uncertainty': 0},
+    'output': {'results': None, 'plot': None},
+    'gcode': {'template': 'SET_PRESSURE P={P_kPa:.1f}', 'speed_ratio': 1.0, 'resolution': 100.0, 'v_range': [1, 300],
+              'n_points': 2048},
+    'monitor': {'chunk_size': 1024, 'window': 5000, 'threshold': 0.05, 'min_samples': 100, 'v_range': [10, 300],
+                'columns': [0, 1, 2]},
+}
+
+
+def loadConfig(path):
+    """Reads a TOML configuration file and fills the missing keys with DEFAULT_CONFIG."""
+    config = {section: dict(values) for section, values in DEFAULT_CONFIG.items()}
+    if path is not None:
+        with open(path, 'rb') as fh:
+            user = tomllib.load(fh)
+        for section, values in user.items():
+            if section not in config:
+                raise ValueError(f"Unknown configuration section [{section}] in {path}")
+            config[section].update(values)
+    return config
+
+
+def parseVelocities(spec):
+    """
+    Velocities are given as a list of numbers, a table {start, stop, num} (linear range) or, on the command line,
+    as 'start:stop:num'.
+    """
+    if isinstance(spec, dict):
+        return np.linspace(spec['start'], spec['stop'], int(spec['num']))
+    if isinstance(spec, str):
+        start, stop, num = spec.split(':')
+        return np.linspace(float(start), float(stop), int(num))
+    return np.atleast_1d(np.asarray(spec, dtype=float))
+
+
+def buildHead(head):
+    """
+    Builds the configured head: the head 'id' of the head catalog (see heads.toml), or the (3 x alpha) diameter array
+    given by the [head] keys (DEFAULT_HEAD of the catalog when neither is given). Returns the diameters (PrintHead or
+    array), length array, half-cone angle and nozzle type, [head] Noz_type overriding the one of a catalog head.
+    """
+    if head['id'] is not None or head['D'] is None:
+        from tools import headCatalog
+
+        print_head = headCatalog.loadHeadCatalog(head['catalog'])[head['id'] or DEFAULT_HEAD]
+        return print_head, print_head.L, print_head.theta, head['Noz_type'] or print_head.Noz_type
+    D0 = np.atleast_1d(np.asarray(head['D'], dtype=float))
+    D = np.zeros((3, D0.size))
+    D[0] = D0
+    D[1] = head['D_error']
+    D[2] = head['D_inlet']
+    L = np.asarray(head['L'], dtype=float)
+    theta = math.radians(head['theta_deg'])
+    return D, L, theta, head['Noz_type'] or 'cyl'
+
+
+def plotPressure(path, v, results):
+    """Saves the pressure vs. speed curves to an image file with the Agg backend."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    for sheet, result in results.items():
+        ax.loglog(v, result['P'] / 1000, '-s', linewidth=1.5, label=sheet)
+    ax.set_xlabel('Nozzle exit velocity [mm/s]', fontsize=12)
+    ax.set_ylabel('Required pressure [kPa]', fontsize=12)
+    ax.grid(True, which="both", ls="--")
+    ax.legend()
+    fig.savefig(path, dpi=150, bbox_inches='tight')
+    plt.close(fig)
+
+
+def run(config):
+    from tools import materialCatalog, pressureCache, resultsStore
+    from Velocity_driven import generatePBatch, monteCarloP
+
+    catalog = materialCatalog.loadMaterialCatalog(config['material']['file'])
+    sheets = config['material']['sheet']
+    if sheets is None:
+        raise ValueError("No material selected: set [material] sheet or pass --sheet. Available materials: " +
+                         ", ".join(catalog.sheet_names))
+    if sheets == 'all':
+        sheets = catalog.sheet_names
+    elif isinstance(sheets, str):
+        sheets = [sheets]
+
+    D, L, theta, Noz_type = buildHead(config['head'])
+    v = parseVelocities(config['run']['v'])
+    P_amb = config['run']['P_amb']
+    debug_mode = config['run']['debug_mode']
+    compute = (pressureCache.PressureCache(catalog=catalog).generatePBatch if config['run']['cache']
+               else generatePBatch.generatePBatch)
+
+    results = {}
+    bands = {}
+    for sheet in sheets:
+        rho, w, f, n, K, eta_inf, eta_0, tau_0, lmbda, a, mP, R = catalog[sheet]
+        try:
+            P, eta, SR, Q, deta, dP, dRi, dSR = compute(
+                rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP, debug_mode)
+        except (ValueError, ArithmeticError) as e:
+            print(f"{sheet}: skipped ({e})", file=sys.stderr)
+            continue
+        results[sheet] = {'P': P, 'eta': eta, 'SR': SR, 'Q': Q, 'deta': deta, 'dP': dP, 'dRi': dRi, 'dSR': dSR}
+        print(f"{sheet}: " + ", ".join(f"{vi:g} mm/s -> {Pi / 1000:.1f} kPa" for vi, Pi in zip(v, P)))
+        if config['run']['uncertainty']:
+            # Monte Carlo band of the required pressure, with the parameter uncertainties of the material sheet
+            _, bands[sheet], _ = monteCarloP.monteCarloP(
+                rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP,
+                n_samples=int(config['run']['uncertainty']), dparams=catalog.uncertainty(sheet),
+                percentiles=UNCERTAINTY_PERCENTILES, seed=0)
+            print(f"{sheet}: 95% band " + ", ".join(f"{vi:g} mm/s -> [{lo / 1000:.1f}, {hi / 1000:.1f}] kPa"
+                                                    for vi, lo, hi in zip(v, *bands[sheet])))
+
+    output = config['output']
+    if output['results'] and results:
+        store = resultsStore.ResultsStore(output['results'])
+        created = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+        for sheet, result in results.items():
+            metadata = {'material': sheet, 'material_file': catalog.path,
+                        'material_sha256': catalog.sha256,
+                        'parameters': dict(zip(materialCatalog.PARAMETERS, catalog[sheet])),
+                        'Noz_type': Noz_type, 'D': np.asarray(D).tolist(), 'L': L.tolist(), 'theta': theta, 'P_amb': P_amb,
+                        'created': created}
+            if sheet in bands:
+                metadata['P_band'] = {'percentiles': list(UNCERTAINTY_PERCENTILES), 'P': bands[sheet].tolist()}
+            resultsStore.writeRun(store, metadata, v, **result)
+    if output['plot'] and results:
+        os.makedirs(os.path.dirname(os.path.abspath(output['plot'])), exist_ok=True)
+        plotPressure(output['plot'], v, results)
+
+    return 0 if results else 1
+
+
+def monitor(config, log):
+    """Runs the clog detector over a pressure log ('-' for the standard input)."""
+    from tools import clogMonitor, materialCatalog
+    from Velocity_driven import clogDetector
+
+    catalog = materialCatalog.loadMaterialCatalog(config['material']['file'])
+    sheet = config['material']['sheet']
+    if not isinstance(sheet, str) or sheet == 'all':
+        raise ValueError("The monitor needs a single material: set [material] sheet or pass --sheet.")
+    rho, w, f, n, K, eta_inf, eta_0, tau_0, lmbda, a, mP, R = catalog[sheet]
+    D, L, theta, Noz_type = buildHead(config['head'])
+    settings = config['monitor']
+    detector = clogDetector.ClogDetector(rho, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, config['run']['P_amb'],
+                                         Noz_type, R, mP, v_range=tuple(settings['v_range']),
+                                         window=settings['window'], threshold=settings['threshold'],
+                                         min_samples=settings['min_samples'])
+    if log == '-':
+        clogMonitor.monitor(sys.stdin, detector, settings['chunk_size'], columns=tuple(settings['columns']))
+    else:
+        with open(log, encoding='utf-8') as stream:
+            clogMonitor.monitor(stream, detector, settings['chunk_size'], columns=tuple(settings['columns']))
+    return 0
+
+
+def gcode(config, source, output, table_file):
+    """Inserts pressure setpoints in a G-code file ('-' for the standard input/output)."""
+    from tools import gcodePressure, materialCatalog
+
+    catalog = materialCatalog.loadMaterialCatalog(config['material']['file'])
+    sheet = config['material']['sheet']
+    if not isinstance(sheet, str) or sheet == 'all':
+        raise ValueError("G-code post-processing needs a single material: set [material] sheet or pass --sheet.")
+    rho, w, f, n, K, eta_inf, eta_0, tau_0, lmbda, a, mP, R = catalog[sheet]
+    D, L, theta, Noz_type = buildHead(config['head'])
+    settings = config['gcode']
+    table = gcodePressure.buildPressureTable(rho, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a,
+                                             config['run']['P_amb'], Noz_type, R, mP,
+                                             *settings['v_range'], settings['n_points'])
+    if table_file:
+        table.export(table_file)
+
+    src = sys.stdin if source == '-' else open(source, encoding='utf-8')
+    dst = sys.stdout if output in (None, '-') else open(output, 'w', encoding='utf-8')
+    try:
+        inserted = gcodePressure.processGcode(src, dst, table, settings['template'], settings['speed_ratio'],
+                                              settings['resolution'])
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    print(f"{inserted} pressure setpoint(s) inserted", file=sys.stderr)
+    return 0
+
+
+def fit(measurements, P_amb, slip, criterion, output, rho, w, f):
+    """
+    Fits every behavior law to capillary measurements (CSV file with a header line and the columns D, L, P and Q or v,
+    one row per measurement), prints the ranking and writes the material sheet rows of the best law.
+    """
+    from tools import fitRheology
+
+    data = np.genfromtxt(measurements, delimiter=',', names=True, dtype=float, encoding='utf-8')
+    columns = data.dtype.names or ()
+    missing = [name for name in ('D', 'L', 'P') if name not in columns]
+    if missing or not ('Q' in columns or 'v' in columns):
+        raise ValueError(f"{measurements} must have the columns D, L, P and Q or v, found {list(columns)}")
+    data = np.atleast_1d(data)
+    Q = data['Q'] if 'Q' in columns else np.pi * 0.25 * data['D'] ** 2 * data['v']
+    fits = fitRheology.fitRheology(data['D'], data['L'], Q, data['P'], P_amb, slip=slip, criterion=criterion)
+
+    print(f"{'':3} {'law':<24} {'k':>2} {'rms':>9} {'AIC':>9} {'BIC':>9}  parameters")
+    for rank, result in enumerate(fits, 1):
+        free = ", ".join(f"{name}={result.values[name]:.4g}" for name in result.errors)
+        if slip:
+            free += f", slip={result.slip:.3g}"
+        print(f"{rank:>3} {result.law:<24} {result.nb_params:>2} {result.rms:>9.3g} {result.aic:>9.1f} "
+              f"{result.bic:>9.1f}  {free}")
+    rows = fits[0].sheetRows(rho, w, f)
+    if output:
+        with open(output, 'w', encoding='utf-8') as fh:
+            for label, value, unit in rows:
+                fh.write(f"{label},{value:.10g},{unit}\n")
+    else:
+        for label, value, unit in rows:
+            print(f"{label:<8} {value:<14.10g} {unit}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='mepm', description='Multinozzle extrusion pressure model')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    logging_options = argparse.ArgumentParser(add_help=False)
+    logging_options.add_argument('--log-level', default='WARNING',
+                                 choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+                                 help='level of the diagnostics printed on stderr (default: WARNING)')
+    logging_options.add_argument('--log-json', metavar='FILE', help='also log every record to a JSON lines file')
+
+    run_parser = commands.add_parser('run', parents=[logging_options],
+                                     help='compute the required pressure over a velocity sweep')
+    run_parser.add_argument('config', nargs='?', help='TOML configuration file')
+    run_parser.add_argument('--material-file', help='material database file (.xls)')
+    run_parser.add_argument('--sheet', action='append', help="material sheet (repeatable, or 'all')")
+    run_parser.add_argument('--noz-type', choices=['cyl', 'tapered'], help='nozzle type')
+    run_parser.add_argument('--head', help=f'head ID in the head catalog (default: {DEFAULT_HEAD})')
+    run_parser.add_argument('--head-catalog', help='head catalog file (default: heads.toml next to mepm.py)')
+    run_parser.add_argument('--v', nargs='+', help="velocities (mm/s), or 'start:stop:num'")
+    run_parser.add_argument('--output', help='results store directory (appended to if it exists)')
+    run_parser.add_argument('--plot', help='pressure vs. speed figure (.png, .pdf, ...)')
+    run_parser.add_argument('--debug', action='store_true', help='print all the intermediate values')
+    run_parser.add_argument('--no-cache', action='store_true', help='recompute instead of reusing cached results')
+    run_parser.add_argument('--uncertainty', type=int, metavar='SAMPLES',
+                            help='Monte Carlo pressure band from the uncertainties of the material sheet (0: off)')
+    run_parser.add_argument('--profile', metavar='TRACE', help='time the model stages and write a Chrome trace file')
+
+    monitor_parser = commands.add_parser('monitor', parents=[logging_options],
+                                         help='detect nozzle diameter changes in a pressure log')
+    monitor_parser.add_argument('config', help='TOML configuration file')
+    monitor_parser.add_argument('log', help="pressure log lines 'time, velocity, pressure' ('-' for stdin)")
+    monitor_parser.add_argument('--material-file', help='material database file (.xls)')
+    monitor_parser.add_argument('--sheet', action='append', help='material sheet')
+    monitor_parser.add_argument('--noz-type', choices=['cyl', 'tapered'], help='nozzle type')
+    monitor_parser.add_argument('--head', help=f'head ID in the head catalog (default: {DEFAULT_HEAD})')
+    monitor_parser.add_argument('--head-catalog', help='head catalog file (default: heads.toml next to mepm.py)')
+
+    gcode_parser = commands.add_parser('gcode', parents=[logging_options],
+                                       help='insert pressure setpoints in a G-code file')
+    gcode_parser.add_argument('config', help='TOML configuration file')
+    gcode_parser.add_argument('gcode', help="G-code file ('-' for stdin)")
+    gcode_parser.add_argument('--output', help="processed G-code file (default: stdout)")
+    gcode_parser.add_argument('--table', help='binary pressure table exported for the controller')
+    gcode_parser.add_argument('--material-file', help='material database file (.xls)')
+    gcode_parser.add_argument('--sheet', action='append', help='material sheet')
+    gcode_parser.add_argument('--noz-type', choices=['cyl', 'tapered'], help='nozzle type')
+    gcode_parser.add_argument('--head', help=f'head ID in the head catalog (default: {DEFAULT_HEAD})')
+    gcode_parser.add_argument('--head-catalog', help='head catalog file (default: heads.toml next to mepm.py)')
+
+    fit_parser = commands.add_parser('fit', parents=[logging_options],
+                                     help='fit the behavior laws to capillary measurements and rank them')
+    fit_parser.add_argument('measurements', help='CSV file with the columns D (mm), L (mm), P (Pa) and Q (mm³/s) or '
+                                                 'v (mm/s)')
+    fit_parser.add_argument('--P-amb', type=float, default=101325, help='ambient pressure (Pa, default: 101325)')
+    fit_parser.add_argument('--slip', action='store_true', help='also fit a wall slip coefficient (2+ diameters)')
+    fit_parser.add_argument('--criterion', choices=['aic', 'bic'], default='bic', help='ranking criterion')
+    fit_parser.add_argument('--output', help='CSV file of the material sheet rows of the best law (default: stdout)')
+    fit_parser.add_argument('--rho', type=float, default=0, help='density written to the sheet (kg/m3)')
+    fit_parser.add_argument('--w', type=float, default=0, help='weight fraction written to the sheet (wt.%%)')
+    fit_parser.add_argument('--f', type=float, default=0, help='volume fraction written to the sheet (vol.%%)')
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'fit':
+            logSetup.configureLogging(args.log_level, json_file=args.log_json)
+            return fit(args.measurements, args.P_amb, args.slip, args.criterion, args.output, args.rho, args.w, args.f)
+        config = loadConfig(args.config)
+        debug_mode = getattr(args, 'debug', False) or config['run']['debug_mode']
+        logSetup.configureLogging('DEBUG' if debug_mode else args.log_level, json_file=args.log_json)
+        if args.material_file:
+            config['material']['file'] = args.material_file
+        if args.sheet:
+            config['material']['sheet'] = args.sheet[0] if len(args.sheet) == 1 else args.sheet
+        if args.noz_type:
+            config['head']['Noz_type'] = args.noz_type
+        if args.head:
+            config['head']['id'] = args.head
+        if args.head_catalog:
+            config['head']['catalog'] = args.head_catalog
+        if args.command == 'monitor':
+            return monitor(config, args.log)
+        if args.command == 'gcode':
+            return gcode(config, args.gcode, args.output, args.table)
+        if args.v:
+            config['run']['v'] = args.v[0] if len(args.v) == 1 and ':' in args.v[0] else [float(x) for x in args.v]
+        if args.output:
+            config['output']['results'] = args.output
+        if args.plot:
+            config['output']['plot'] = args.plot
+        if args.debug:
+            config['run']['debug_mode'] = True
+        if args.no_cache:
+            config['run']['cache'] = False
+        if args.uncertainty is not None:
+            config['run']['uncertainty'] = args.uncertainty
+        if not args.profile:
+            return run(config)
+        from Velocity_driven import profiling
+        profiling.enable()
+        try:
+            return run(config)
+        finally:
+            profiling.report(out=lambda line: print(line, file=sys.stderr))
+            profiling.writeTrace(args.profile)
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming front end of the clog detector (Velocity_driven/clogDetector.py).
+
+Pressure logs are text lines 'time, velocity (mm/s), pressure (Pa)', read from a file or a pipe by chunks of lines,
+so that a kHz sensor log is processed with array operations and bounded memory. Lines that do not parse (headers,
+comments, truncated last line) are skipped. Example, next to the printer:
+
+    tail -f pressure.log | python -m mepm monitor config.toml -
+
+Author: Raphaël Plante
+Date: 2026
+"""
+import itertools
+import numpy as np
+
+
+def _parseLines(lines, delimiter, columns):
+    try:
+        table = np.array([line.split(delimiter) for line in lines], dtype=float)
+    except ValueError:
+        # Slow path, line by line, for chunks holding a header or a malformed line
+        rows = []
+        for line in lines:
+            try:
+                rows.append([float(x) for x in line.split(delimiter)])
+            except ValueError:
+                continue
+        width = max((len(row) for row in rows), default=0)
+        table = np.array([row for row in rows if len(row) == width], dtype=float).reshape(-1, width)
+    if table.size == 0 or table.shape[1] <= max(columns):
+        return None
+    return tuple(table[:, c] for c in columns)
+
+
+def readSamples(stream, chunk_size=1024, delimiter=',', columns=(0, 1, 2)):
+    """
+    readSamples reads a pressure log by chunks.
+
+    Inputs:
+        stream (iterable of str): Opened text file, or sys.stdin
+        chunk_size (int): Number of lines per chunk
+        delimiter (str): Column delimiter
+        columns (tuple): Columns of the time, velocity and pressure
+
+    Outputs:
+        Generator of (t, v, P) arrays, one tuple per chunk
+    """
+    while True:
+        lines = list(itertools.islice(stream, chunk_size))
+        if not lines:
+            return
+        samples = _parseLines([line for line in lines if line.strip() and not line.startswith('#')], delimiter,
+                              columns)
+        if samples is not None:
+            yield samples
+
+
+def monitor(stream, detector, chunk_size=1024, delimiter=',', columns=(0, 1, 2), out=print):
+    """
+    monitor feeds a pressure log to a ClogDetector and reports every change of the suspected nozzles.
+
+    Inputs:
+        stream (iterable of str): Opened text file, or sys.stdin
+        detector (ClogDetector): Detector built for the material and head in use
+        chunk_size, delimiter, columns: See readSamples
+        out (callable): Report function
+
+    Outputs:
+        events (list): (time, suspected nozzles, relative diameter changes) of every reported change, the nozzles being
+                       None for a change of the whole head (see ClogDetector.suspects)
+    """
+    events = []
+    previous = ()
+    for t, v, P in readSamples(stream, chunk_size, delimiter, columns):
+        detector.update(v, P)
+        nozzles, relative = detector.suspects()
+        state = 'head' if nozzles is None else tuple(nozzles)
+        if state != previous:
+            previous = state
+            events.append((t[-1], nozzles, relative))
+            if nozzles is None:
+                out(f't = {t[-1]:.3f}: head: effective diameter change {100 * relative:+.2f}%, nozzle not identifiable')
+            elif nozzles.size == 0:
+                out(f't = {t[-1]:.3f}: no diameter change detected')
+            else:
+                changes = ', '.join(f'#{i} {100 * x:+.1f}%' for i, x in zip(nozzles, relative))
+                out(f't = {t[-1]:.3f}: diameter change suspected on nozzle(s) {changes}')
+    return events
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rheology parameter fitting from capillary measurements.
+
+Raw (pressure, flow rate) measurements taken through cylindrical nozzles of one or several diameters are fitted by
+every behavior law of the registry (Velocity_driven/rheologyModels.py), and the laws are ranked by information
+criterion (AIC or BIC). The fitted parameters are those the pressure model uses, so they can be written to the
+material database as they are (see RheologyFit.sheetRows).
+
+Every measurement gives the wall stress tau_w = (P - P_amb) * D / (4 * L) and, with the Weissenberg-Rabinowitsch
+correction of the model (rabi = (3 + 1/n) / 4, n being the flow index of the law), the wall shear rate
+SR = rabi * 32 * Q / (pi * D^3). The residuals are ln(tau(SR)) - ln(tau_w), tau = eta(SR) * SR being the wall stress
+of the law, so that measurements spanning decades of pressure weigh the same. With wall slip (Mooney), part of the
+flow rate slides along the wall at the velocity v_s = beta * tau_w, and only Q - pi * D^2 / 4 * v_s shears the
+material; the slip coefficient beta is then fitted too, which needs several diameters.
+
+The free parameters of every law are fitted in log space (they stay positive, so the fitted law is the one resolveModel
+identifies) by a Levenberg-Marquardt iteration run on all the starting points of a law at once: residuals and
+finite-difference Jacobians of every start are evaluated in one vectorized call of the law's kernel.
+
+Example:
+    fits = fitRheology(D, L, Q, P, P_amb=101325)      # one value per measurement (D and L may be scalars)
+    best = fits[0]                                    # lowest BIC
+    best.params                                       # (n, K, eta_inf, eta_0, tau_0, lmbda, a), as in generateP
+    for label, value, unit in best.sheetRows(rho=1279, w=12, f=24):
+        ...                                           # rows of a material sheet (column A, B, C)
+
+Author: Raphaël Plante
+Date: 2026
+"""
+import logging
+import math
+import numpy as np
+
+from Velocity_driven import rheologyModels
+
+logger = logging.getLogger(__name__)
+
+# Rheology parameters of a law, in the order of RheologyModel.params
+LAW_PARAMETERS = ('n', 'K', 'eta_inf', 'eta_0', 'tau_0', 'lmbda', 'a')
+
+# Free parameters of every registered law, and the parameters it fixes (the others are 0). The Casson flow index only
+# enters the Weissenberg-Rabinowitsch correction and is kept at its usual value.
+LAWS = {
+    'Sisko': (('n', 'K', 'eta_inf'), {}),
+    'Newtonian': (('eta_inf',), {'n': 1.0}),
+    'PowerLaw': (('n', 'K'), {}),
+    'Carreau': (('n', 'eta_inf', 'eta_0', 'lmbda', 'a'), {}),
+    'Bingham': (('eta_inf', 'tau_0'), {'n': 1.0}),
+    'HerschelBulkleyExtended': (('n', 'K', 'eta_inf', 'tau_0'), {}),
+    'HerschelBulkley': (('n', 'K', 'tau_0'), {}),
+    'Cross': (('n', 'eta_inf', 'eta_0', 'lmbda'), {}),
+    'Casson': (('eta_inf', 'tau_0'), {'n': 0.5}),
+}
+
+# Material database rows (column A) and units (column C), see tools/materialCatalog.py
+SHEET_ROWS = (('rho', '[kg/m3]'), ('w', '[wt.%]'), ('f', '[vol.%]'), ('n', '[ ]'), ('K', '[Pa.s^n]'),
+              ('eta_inf', '[Pa.s]'), ('eta_0', '[Pa.s]'), ('tau_0', '[Pa]'), ('lambda', '[s]'), ('a', '[ ]'))
+
+CRITERIA = ('aic', 'bic')
+
+
+class RheologyFit:
+    """
+    RheologyFit is the result of fitting one behavior law to capillary measurements.
+
+    Attributes:
+        law (str): Law (class name in rheologyModels)
+        name (str): Name of the law
+        values (dict): Fitted rheology parameters, keyed as LAW_PARAMETERS (0 for the parameters the law does not use)
+        errors (dict): Standard error of every free parameter
+        slip (numeric): Wall slip coefficient beta (mm/(s.Pa)), 0 without wall slip
+        dslip (numeric): Standard error of the slip coefficient
+        rss (numeric): Sum of the squared log-stress residuals
+        aic, bic (numeric): Akaike and Bayesian information criteria
+        nb_points (int): Number of measurements
+        nb_params (int): Number of fitted parameters
+        nbIter (int): Number of Levenberg-Marquardt iterations of the best start
+        converged (bool): True if the best start converged
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+
+    def __init__(self, law, values, errors, slip, dslip, rss, nb_points, nb_params, nbIter, converged):
+        self.law = law
+        self.name = getattr(rheologyModels, law).name
+        self.values = values
+        self.errors = errors
+        self.slip = slip
+        self.dslip = dslip
+        self.rss = rss
+        self.nb_points = nb_points
+        self.nb_params = nb_params
+        self.nbIter = nbIter
+        self.converged = converged
+        sigma2 = max(rss, np.finfo(float).tiny) / nb_points
+        self.aic = nb_points * math.log(sigma2) + 2 * nb_params
+        self.bic = nb_points * math.log(sigma2) + nb_params * math.log(nb_points)
+
+    @property
+    def params(self):
+        """Fitted (n, K, eta_inf, eta_0, tau_0, lmbda, a), the order of calculateVisco and resolveModel."""
+        return tuple(self.values[name] for name in LAW_PARAMETERS)
+
+    @property
+    def rms(self):
+        """Root mean square relative error of the fitted wall stresses."""
+        return math.sqrt(self.rss / self.nb_points)
+
+    def model(self):
+        """Behavior law of the fitted parameters (rheologyModels.RheologyModel)."""
+        return rheologyModels.resolveModel(*self.params)
+
+    def sheetRows(self, rho=0, w=0, f=0):
+        """
+        Rows (label, value, unit) of a material sheet holding the fitted parameters, followed by the uncertainty rows
+        ('d' + parameter) of the free parameters, in the layout read by tools/materialCatalog.py.
+        """
+        values = dict(self.values, rho=rho, w=w, f=f)
+        values['lambda'] = values.pop('lmbda')
+        rows = [(label, float(values[label]), unit) for label, unit in SHEET_ROWS]
+        units = dict(SHEET_ROWS)
+        for name, error in self.errors.items():
+            label = 'lambda' if name == 'lmbda' else name
+            rows.append(('d' + label, float(error), units[label]))
+        return rows
+
+    def __repr__(self):
+        free = ", ".join(f"{name}={value:.4g}" for name, value in self.values.items() if name in self.errors)
+        slip = f", slip={self.slip:.3g}" if self.slip else ""
+        return f"RheologyFit({self.law}: {free}{slip}, rms={self.rms:.3g}, bic={self.bic:.1f})"
+
+
+def _measurements(D, L, Q, P, P_amb):
+    """Diameters, wall stresses and apparent shear rates of the valid measurements."""
+    Q = np.atleast_1d(np.asarray(Q, dtype=float))
+    P = np.atleast_1d(np.asarray(P, dtype=float))
+    if Q.ndim != 1 or Q.shape != P.shape:
+        raise ValueError("Inputs Q and P must be 1-dimensional arrays with one value per measurement.")
+    D, L = (np.broadcast_to(np.asarray(x, dtype=float), Q.shape) for x in (D, L))
+    keep = np.isfinite(Q) & np.isfinite(P) & np.isfinite(D) & np.isfinite(L)
+    D, L, Q, P = D[keep], L[keep], Q[keep], P[keep]
+    if np.any(D <= 0) or np.any(L <= 0) or np.any(Q <= 0) or np.any(P <= P_amb):
+        raise ValueError("Diameters, lengths and flow rates must be positive, and pressures above the ambient one.")
+    tau_w = (P - P_amb) * D / (4 * L)
+    SR_a = 32 * Q / (np.pi * D ** 3)
+    return D, tau_w, SR_a
+
+
+def _logResiduals(cls, names, fixed, theta, SR_a, tau_w, D, slip):
+    """
+    Log-stress residuals of a law for a batch of parameter sets theta (B x free parameters, slip coefficient last when
+    slip is True), against all the measurements (B x m).
+    """
+    params = dict.fromkeys(LAW_PARAMETERS, 0.0)
+    params.update(fixed)
+    for j, name in enumerate(names):
+        params[name] = theta[:, j, np.newaxis]
+    SR = SR_a
+    if slip:
+        # Mooney: the wall slides at beta * tau_w, which carries 8 * v_s / D of the apparent shear rate
+        SR = SR_a - 8 * theta[:, -1, np.newaxis] * tau_w / D
+    rabi = (3 + (1 / params['n'])) / 4  # Weissenberg-Rabinowitsch correction
+    SR = rabi * SR
+    with np.errstate(all='ignore'):
+        model = cls(*(params[name] for name in LAW_PARAMETERS))
+        r = np.log(model.eta(SR) * SR) - np.log(tau_w)
+    return np.where(SR > 0, r, np.nan)
+
+
+def _startingPoints(names, slip, SR_a, tau_w, D, nb_starts, rng):
+    """Starting parameter sets (log space): estimates from the flow curve, then random spreads around them."""
+    # Apparent power law through the measurements
+    if np.ptp(np.log(SR_a)) > 0:
+        n_a, lnK = np.polyfit(np.log(SR_a), np.log(tau_w), 1)
+        n_a = float(np.clip(n_a, 0.05, 2))
+    else:
+        n_a, lnK = 1.0, float(np.mean(np.log(tau_w / SR_a)))
+    eta_a = tau_w / SR_a
+    guess = {
+        'n': n_a,
+        'K': math.exp(lnK),
+        'eta_inf': 0.1 * float(np.min(eta_a)),
+        'eta_0': 10 * float(np.max(eta_a)),
+        'tau_0': 0.5 * float(np.min(tau_w)),
+        'lmbda': 1 / float(np.median(SR_a)),
+        'a': 2.0,
+        'slip': 0.01 * float(np.median(SR_a * D / 8 / tau_w)),
+    }
+    keys = list(names) + (['slip'] if slip else [])
+    u0 = np.log([guess[key] for key in keys])
+    spread = rng.normal(0, 1.0, (nb_starts - 1, len(keys)))
+    return np.vstack((u0, u0 + spread))
+
+
+def _levenbergMarquardt(residual, u, max_iter, tol):
+    """
+    Levenberg-Marquardt iteration of all the starting points u (S x k) at once. Returns the parameters, the residual
+    sums of squares, the final residuals, the Jacobians (S x m x k), the iteration counts and the convergence mask.
+    """
+    S, k = u.shape
+    h = 1e-6
+    r = residual(u)
+    cost = np.where(np.all(np.isfinite(r), axis=1), np.sum(r ** 2, axis=1), np.inf)
+    mu = np.full(S, 1e-3)
+    nbIter = np.zeros(S, dtype=int)
+    converged = ~np.isfinite(cost)  # starts outside of the domain of the law are dropped
+    J = np.zeros((S, r.shape[1], k))
+    for iteration in range(max_iter):
+        active = np.flatnonzero(~converged)
+        if active.size == 0:
+            break
+        ua, ra = u[active], r[active]
+        # Forward-difference Jacobians of the active starts, in one evaluation
+        U = ua[:, np.newaxis, :] + h * np.eye(k)
+        R = residual(U.reshape(-1, k)).reshape(active.size, k, -1)
+        Ja = np.nan_to_num(np.swapaxes(R - ra[:, np.newaxis, :], 1, 2) / h, nan=0.0, posinf=0.0, neginf=0.0)
+        J[active] = Ja
+        A = np.einsum('smi,smj->sij', Ja, Ja)
+        g = np.einsum('smi,sm->si', Ja, ra)
+        diag = np.einsum('sii->si', A)
+        A_damped = A + (mu[active, np.newaxis] * diag + 1e-12)[:, :, np.newaxis] * np.eye(k)
+        step = np.linalg.solve(A_damped, -g[:, :, np.newaxis])[:, :, 0]
+        step = np.clip(step, -5, 5)
+
+        r_new = residual(ua + step)
+        cost_new = np.where(np.all(np.isfinite(r_new), axis=1), np.sum(r_new ** 2, axis=1), np.inf)
+        better = cost_new < cost[active]
+        decrease = np.where(better, cost[active] - cost_new, 0.0)
+        nbIter[active] += 1
+
+        idx = active[better]
+        u[idx] = ua[better] + step[better]
+        r[idx] = r_new[better]
+        cost[idx] = cost_new[better]
+        mu[active] = np.where(better, mu[active] / 3, mu[active] * 4)
+        converged[active] = ((better & (decrease <= tol * (cost[active] + tol))) |
+                             (np.max(np.abs(step), axis=1) < tol) | (mu[active] > 1e12))
+    return u, cost, r, J, nbIter, converged
+
+
+def fitLaw(law, D, L, Q, P, P_amb=101325, slip=False, nb_starts=16, max_iter=200, tol=1e-10, seed=0):
+    """
+    fitLaw fits one behavior law to capillary measurements (see the module description).
+
+    Inputs:
+        law (str): Law, a class name of rheologyModels (key of LAWS)
+        D (array-like): Nozzle diameter of every measurement (mm), or one for all
+        L (array-like): Nozzle length of every measurement (mm), or one for all
+        Q (array-like): Measured flow rates (mm³/s)
+        P (array-like): Measured pressures (Pa)
+        P_amb (numeric): Ambient pressure (Pa)
+        slip (bool): Also fit a wall slip coefficient (needs at least 2 diameters)
+        nb_starts (int): Number of starting points of the Levenberg-Marquardt iteration
+        max_iter (int): Iteration cap
+        tol (numeric): Convergence criterion on the relative decrease of the residuals
+        seed (int): Seed of the random starting points
+
+    Outputs:
+        fit (RheologyFit): Best fit of the law, None if no starting point could be fitted
+    """
+    if law not in LAWS:
+        raise ValueError(f"Unknown law '{law}', expected one of {list(LAWS)}.")
+    D, tau_w, SR_a = _measurements(D, L, Q, P, P_amb)
+    if slip and np.unique(D).size < 2:
+        raise ValueError("Wall slip can only be fitted from measurements with at least 2 nozzle diameters.")
+    names, fixed = LAWS[law]
+    cls = getattr(rheologyModels, law)
+    k = len(names) + bool(slip)
+    m = tau_w.size
+    if m <= k:
+        raise ValueError(f"{law} has {k} free parameters and needs more than {k} measurements.")
+
+    def residual(u):
+        return _logResiduals(cls, names, fixed, np.exp(u), SR_a, tau_w, D, slip)
+
+    rng = np.random.default_rng(seed)
+    u0 = _startingPoints(names, slip, SR_a, tau_w, D, nb_starts, rng)
+    u, cost, r, J, nbIter, converged = _levenbergMarquardt(residual, u0, max_iter, tol)
+    best = int(np.argmin(cost))
+    if not np.isfinite(cost[best]):
+        logger.warning('fitRheology: %s could not be fitted to the measurements', law, extra={'law': law})
+        return None
+
+    # Standard errors from the Gauss-Newton covariance of the log parameters: d(theta) = theta * d(u)
+    theta = np.exp(u[best])
+    JtJ = J[best].T @ J[best]
+    sigma2 = cost[best] / max(m - k, 1)
+    with np.errstate(all='ignore'):
+        cov = np.linalg.pinv(JtJ) * sigma2
+    errors = theta * np.sqrt(np.abs(np.diag(cov)))
+
+    values = dict.fromkeys(LAW_PARAMETERS, 0.0)
+    values.update(fixed)
+    values.update({name: float(theta[j]) for j, name in enumerate(names)})
+    fit = RheologyFit(law, values, {name: float(errors[j]) for j, name in enumerate(names)},
+                      float(theta[-1]) if slip else 0.0, float(errors[-1]) if slip else 0.0, float(cost[best]), m, k,
+                      int(nbIter[best]), bool(converged[best]))
+    logger.debug('fitRheology: %s', fit)
+    return fit
+
+
+def fitRheology(D, L, Q, P, P_amb=101325, laws=None, slip=False, criterion='bic', nb_starts=16, max_iter=200,
+                tol=1e-10, seed=0):
+    """
+    fitRheology fits every behavior law of the registry to capillary measurements and ranks them.
+
+    Inputs:
+        D, L, Q, P, P_amb: Measurements, as in fitLaw
+        laws (list): Laws to fit (default: every law of LAWS)
+        slip (bool): Also fit a wall slip coefficient (needs at least 2 diameters)
+        criterion (str): Ranking criterion, 'aic' or 'bic'
+        nb_starts, max_iter, tol, seed: Settings of the Levenberg-Marquardt iteration, as in fitLaw
+
+    Outputs:
+        fits (list): RheologyFit of every law that could be fitted, best (lowest criterion) first
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+    if criterion not in CRITERIA:
+        raise ValueError(f"Unknown criterion '{criterion}', expected one of {list(CRITERIA)}.")
+    if laws is None:
+        laws = [model.__name__ for model in rheologyModels.MODELS if model.__name__ in LAWS]
+    fits = []
+    for law in laws:
+        if len(LAWS[law][0]) + bool(slip) >= np.size(Q):
+            logger.info('fitRheology: %s skipped, not enough measurements for its parameters', law)
+            continue
+        fit = fitLaw(law, D, L, Q, P, P_amb, slip, nb_starts, max_iter, tol, seed)
+        if fit is not None:
+            fits.append(fit)
+    if not fits:
+        raise ValueError("No behavior law could be fitted to the measurements.")
+    return sorted(fits, key=lambda fit: getattr(fit, criterion))
+
+
+def flowCurve(D, L, Q, P, P_amb=101325, slip=0.0):
+    """
+    flowCurve returns the flow curve of capillary measurements with the classical Weissenberg-Rabinowitsch correction,
+    for plots: the wall shear rate is SR_a * (3 * n' + 1) / (4 * n'), n' = d ln(tau_w) / d ln(SR_a) being the local
+    slope of the measured curve (quadratic fit in log-log).
+
+    Inputs:
+        D, L, Q, P, P_amb: Measurements, as in fitLaw
+        slip (numeric): Wall slip coefficient removed from the flow rates (e.g. RheologyFit.slip)
+
+    Outputs:
+        tau_w (array-like): Wall stresses (Pa)
+        SR_a (array-like): Apparent shear rates, without slip (1/s)
+        SR_w (array-like): Corrected wall shear rates (1/s)
+    """
+    D, tau_w, SR_a = _measurements(D, L, Q, P, P_amb)
+    SR_a = SR_a - 8 * slip * tau_w / D
+    x = np.log(SR_a)
+    degree = 2 if np.unique(x).size > 3 else 1
+    n_local = np.polyval(np.polyder(np.polyfit(x, np.log(tau_w), degree)), x)
+    return tau_w, SR_a, SR_a * (3 * n_local + 1) / (4 * n_local)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pressure setpoints for G-code toolpaths.
+
+buildPressureTable evaluates the velocity-driven model (generatePBatch) on a dense, uniform velocity grid and makes the
+curve monotone, so that the controller can look pressures up by interpolation. The table and the setpoints hold the
+gauge pressure (above P_amb) that a pressure regulator takes. processGcode then streams a G-code file line by line:
+it tracks the modal feed rate (F, mm/min) and motion mode (G0 to G3), and inserts a pressure command before every
+printing move (axis words in G1, G2 or G3 mode) whose setpoint differs from the last one sent. Comments, after ';' or
+between parentheses, are ignored. A printing feed rate outside the velocity range of the table is an error, not a
+clamped setpoint. Only the current line is held in memory, so multi-gigabyte toolpaths are processed in constant
+memory.
+
+The table is exported in a compact little-endian binary form for the controller:
+    magic b'MEPT', version (uint16), number of points n (uint32), v_min and dv (float64, mm/s), then n gauge pressures
+    (float32, Pa).
+
+Example:
+    table = buildPressureTable(rho, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, 'cyl', R, mP)
+    table.export('table.bin')
+    with open('part.gcode') as src, open('part_P.gcode', 'w') as dst:
+        processGcode(src, dst, table)
+
+Author: Raphaël Plante
+Date: 2026
+"""
+import re
+import struct
+import numpy as np
+
+from Velocity_driven import generatePBatch
+
+TABLE_MAGIC = b'MEPT'
+TABLE_VERSION = 2  # 2: gauge pressures (1 held absolute ones)
+_HEADER = struct.Struct('<4sHIdd')
+
+# Pressure command inserted in the G-code; fields: P (gauge, Pa), P_kPa, v (nozzle exit velocity, mm/s), F (mm/min)
+DEFAULT_TEMPLATE = 'SET_PRESSURE P={P_kPa:.1f}'
+
+_WORD = re.compile(r'([A-Z])\s*([-+]?(?:\d+\.?\d*|\.\d+))')
+_COMMENT = re.compile(r'\([^)]*\)')
+# Motion group (modal): rapid and printing moves
+_MOTION_MODES = {'0': '0', '00': '0', '1': '1', '01': '1', '2': '2', '02': '2', '3': '3', '03': '3'}
+_PRINTING_MOVES = {'1', '2', '3'}
+# Non-modal commands whose axis words are not a move (dwell, offsets, homing, set position)
+_NON_MOTION = {'4', '04', '10', '28', '30', '53', '92'}
+_AXES = set('XYZEABCIJ')
+
+
+class PressureTable:
+    """
+    PressureTable is a monotone gauge pressure vs. nozzle exit velocity table on a uniform velocity grid.
+
+    Inputs:
+        v_min (numeric): First velocity of the grid (mm/s)
+        dv (numeric): Velocity step (mm/s)
+        P (array-like): Gauge pressure of every grid velocity (Pa), non-decreasing
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+
+    def __init__(self, v_min, dv, P):
+        self.v_min = float(v_min)
+        self.dv = float(dv)
+        self.P = np.asarray(P, dtype=float)
+
+    @property
+    def v(self):
+        return self.v_min + self.dv * np.arange(self.P.size)
+
+    @property
+    def v_max(self):
+        return self.v_min + self.dv * (self.P.size - 1)
+
+    def pressure(self, v):
+        """Interpolated pressure at the velocities v, which must be within the table range."""
+        v = np.asarray(v, dtype=float)
+        tolerance = 1e-9 * self.dv
+        if np.any(v < self.v_min - tolerance) or np.any(v > self.v_max + tolerance):
+            raise ValueError(f"Velocities outside the pressure table range [{self.v_min:g}, {self.v_max:g}] mm/s.")
+        return np.interp(v, self.v, self.P)
+
+    def export(self, path):
+        with open(path, 'wb') as fh:
+            fh.write(_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, self.P.size, self.v_min, self.dv))
+            fh.write(self.P.astype('<f4').tobytes())
+
+
+def loadPressureTable(path):
+    """Reads a table written by PressureTable.export."""
+    with open(path, 'rb') as fh:
+        magic, version, size, v_min, dv = _HEADER.unpack(fh.read(_HEADER.size))
+        if magic != TABLE_MAGIC or version != TABLE_VERSION:
+            raise ValueError(f"{path} is not a version {TABLE_VERSION} pressure table.")
+        P = np.frombuffer(fh.read(4 * size), dtype='<f4')
+    if P.size != size:
+        raise ValueError(f"{path} is truncated.")
+    return PressureTable(v_min, dv, P.astype(float))
+
+
+def buildPressureTable(rho, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP,
+                       v_min=1.0, v_max=300.0, n_points=2048):
+    """
+    buildPressureTable computes the required gauge pressure (P - P_amb) on a dense velocity grid for one material and
+    head.
+
+    Inputs:
+        rho, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP: Model inputs (see generatePBatch)
+        v_min, v_max (numeric): Velocity range (mm/s)
+        n_points (int): Number of grid velocities
+
+    Outputs:
+        table (PressureTable): Monotone gauge pressure table
+    """
+    v = np.linspace(v_min, v_max, n_points)
+    P = generatePBatch.generatePBatch(rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type,
+                                      R, mP)[0] - P_amb
+    if np.any(np.isnan(P)):
+        raise ValueError(f"The flow is not laminar above v = {v[np.argmax(np.isnan(P))]:.2f} mm/s: reduce v_max.")
+    # The required pressure grows with the speed; the running maximum removes rounding wiggles of flat curves
+    return PressureTable(v_min, v[1] - v[0], np.maximum.accumulate(P))
+
+
+def processGcode(src, dst, table, template=DEFAULT_TEMPLATE, speed_ratio=1.0, resolution=100.0):
+    """
+    processGcode copies a G-code stream and inserts a pressure command before every printing move whose setpoint
+    changed: a line with axis words in G1, G2 or G3 mode (a G1 F600 without axis words does not move). A printing move
+    whose velocity is outside the table range raises a ValueError.
+
+    Inputs:
+        src (iterable of str): Input G-code lines
+        dst (file-like): Output, written line by line
+        table (PressureTable): Pressure table of the material and head
+        template (str): Pressure command, formatted with P (gauge, Pa), P_kPa, v (mm/s) and F (mm/min)
+        speed_ratio (numeric): Nozzle exit velocity over feed rate (1 when the filament is laid at the print speed)
+        resolution (numeric): Setpoints are rounded to this pressure step (Pa), which sets how often commands are sent
+
+    Outputs:
+        inserted (int): Number of pressure commands inserted
+    """
+    feed = None
+    motion = None  # modal motion mode, applied to the moves without a G word
+    setpoint = None  # setpoint of the modal feed rate, only looked up when F changes
+    last = None
+    inserted = 0
+    for number, line in enumerate(src, 1):
+        code = _COMMENT.sub(' ', line.split(';', 1)[0]).upper()
+        words = _WORD.findall(code)
+        if words:
+            g_words = [value for letter, value in words if letter == 'G']
+            modes = [_MOTION_MODES[g] for g in g_words if g in _MOTION_MODES]
+            if modes:
+                motion = modes[-1]
+            F = [value for letter, value in words if letter == 'F']
+            if F and float(F[-1]) != feed:
+                feed = float(F[-1])
+                setpoint = None
+            moves = (any(letter in _AXES for letter, _ in words)
+                     and not any(g in _NON_MOTION for g in g_words))
+            if moves and motion in _PRINTING_MOVES and feed:
+                v = feed / 60 * speed_ratio
+                if setpoint is None:
+                    try:
+                        setpoint = round(float(table.pressure(v)) / resolution) * resolution
+                    except ValueError as e:
+                        raise ValueError(f"Line {number}: F{feed:g} (v = {v:.2f} mm/s): {e} Widen v_range.") from None
+                if setpoint != last:
+                    dst.write(template.format(P=setpoint, P_kPa=setpoint / 1000, v=v, F=feed) + '\n')
+                    last = setpoint
+                    inserted += 1
+        dst.write(line)
+    return inserted
@@ -0,0 +1,180 @@
+import hashlib
+import math
+import os
+import numpy as np
+
+from Velocity_driven import calculateReq, printHead
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    import tomli as tomllib
+
+# Keys of a head table in a catalog file
+HEAD_KEYS = ('description', 'Noz_type', 'D', 'alpha', 'D_error', 'D_inlet', 'L', 'theta_deg')
+
+CACHE_VERSION = 1
+
+# Catalogs already loaded in this process, keyed by (path, mtime, size)
+_loaded = {}
+
+# Geometry files mapped in this process, keyed by path
+_mapped = {}
+
+
+class HeadCatalog:
+    """
+    HeadCatalog holds the print heads of a catalog file, keyed by their ID, in file order.
+
+    Attributes:
+        path (str): Absolute path of the catalog file
+        sha256 (str): Hash of the catalog file content
+        names (list): Head IDs, in file order
+        descriptions (dict): Head ID -> description
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+
+    def __init__(self, path, sha256, heads, descriptions):
+        self.path = path
+        self.sha256 = sha256
+        self._heads = heads
+        self.names = list(heads)
+        self.descriptions = descriptions
+
+    def __contains__(self, name):
+        return name in self._heads
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, name):
+        """Returns the PrintHead of an ID."""
+        if name not in self._heads:
+            raise KeyError(f"Head '{name}' is not in {self.path}")
+        return self._heads[name]
+
+    def items(self):
+        return self._heads.items()
+
+
+def _cachePath(sha256, cache_dir):
+    if cache_dir is None:
+        cache_dir = os.environ.get('MEPM_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'mepm'))
+    return os.path.join(cache_dir, f'heads-{sha256[:16]}.npy')
+
+
+def _mapBlocks(cache_file):
+    """Geometry blocks of every head of a catalog, mapped read-only (once per process)."""
+    blocks = _mapped.get(cache_file)
+    if blocks is None:
+        blocks = _mapped[cache_file] = np.asarray(np.load(cache_file, mmap_mode='r'))
+    return blocks
+
+
+def _sharedHead(cache_file, start, alpha, L, theta, Noz_type, name):
+    """Rebuilds a catalog head in another process from the shared geometry file (see PrintHead.__reduce__)."""
+    head = printHead.PrintHead.fromBlock(_mapBlocks(cache_file)[:, start:start + alpha], L, theta, Noz_type, name)
+    head._shared = (_sharedHead, (cache_file, start, alpha, L, theta, Noz_type, name))
+    return head
+
+
+def _parseHead(name, table):
+    """Diameter array, length, half-cone angle and nozzle types of a head table."""
+    unknown = sorted(set(table) - set(HEAD_KEYS))
+    if unknown:
+        raise ValueError(f"Unknown key(s) {unknown} in head [{name}], expected {list(HEAD_KEYS)}.")
+    if 'D' not in table or 'L' not in table:
+        raise ValueError(f"Head [{name}] must give its nozzle diameters D and length L.")
+    D0 = np.atleast_1d(np.asarray(table['D'], dtype=float))
+    if D0.size == 1 and 'alpha' in table:
+        D0 = np.full(int(table['alpha']), D0[0])
+    elif 'alpha' in table and int(table['alpha']) != D0.size:
+        raise ValueError(f"Head [{name}] gives {D0.size} diameters for alpha = {table['alpha']} nozzles.")
+    if D0.ndim != 1:
+        raise ValueError(f"The diameters D of head [{name}] must be a list of numbers.")
+    D = np.zeros((3, D0.size))
+    D[0] = D0
+    D[1] = table.get('D_error', 0.0)
+    D[2] = table.get('D_inlet', D0)
+    L = np.asarray(table['L'], dtype=float)
+    if L.shape != (2,):
+        raise ValueError(f"The length L of head [{name}] must be [length, error].")
+    theta = math.radians(table.get('theta_deg', 0.0))
+    Noz_type = table.get('Noz_type', 'cyl')
+    calculateReq.nozzleTypes(Noz_type, D0.size)
+    if not isinstance(Noz_type, str):
+        Noz_type = list(Noz_type)
+    return D, L, theta, Noz_type
+
+
+def loadHeadCatalog(file, cache_dir=None):
+    """
+    loadHeadCatalog returns the print heads of a catalog file (TOML, one table per head ID, see heads.toml).
+
+    The geometry blocks of all the heads (diameters and their invariants, see printHead.PrintHead) are computed once
+    per catalog content and stored in one binary file (npy) named after the hash of the catalog, which every process
+    maps read-only: the heads share its pages instead of holding copies, and a head sent to a worker process (e.g. by
+    sweepRunner) is pickled as a reference to its block in that file.
+
+    Inputs:
+        file (str): Path of the head catalog file
+        cache_dir (str): Cache directory (default: $MEPM_CACHE_DIR or ~/.cache/mepm)
+
+    Outputs:
+        catalog (HeadCatalog): Heads of the catalog, keyed by their ID
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+    path = os.path.abspath(file)
+    stat = os.stat(path)
+    memo_key = (path, stat.st_mtime_ns, stat.st_size)
+    if memo_key in _loaded:
+        return _loaded[memo_key]
+
+    with open(path, 'rb') as fh:
+        content = fh.read()
+    try:
+        tables = tomllib.loads(content.decode('utf-8'))
+    except tomllib.TOMLDecodeError as e:
+        raise ValueError(f"{path}: {e}") from None
+    if not tables:
+        raise ValueError(f"{path} does not hold any head.")
+    parsed = {}
+    for name, table in tables.items():
+        if not isinstance(table, dict):
+            raise ValueError(f"{path}: '{name}' must be a head table ([{name}]).")
+        parsed[name] = _parseHead(name, table)
+
+    sha256 = hashlib.sha256(content + f'|{CACHE_VERSION}'.encode('ascii')).hexdigest()
+    cache_file = _cachePath(sha256, cache_dir)
+    alphas = [D.shape[1] for D, _, _, _ in parsed.values()]
+    shape = (len(printHead.GEOMETRY_ROWS), sum(alphas))
+    try:
+        blocks = _mapBlocks(cache_file)
+        if blocks.shape != shape:
+            raise ValueError(f"{cache_file} does not match {path}")
+    except (OSError, ValueError):
+        _mapped.pop(cache_file, None)
+        blocks = np.hstack([printHead.geometryBlock(D) for D, _, _, _ in parsed.values()])
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = cache_file + f'.{os.getpid()}.tmp.npy'
+        np.save(tmp_file, blocks)
+        os.replace(tmp_file, cache_file)
+        blocks = _mapBlocks(cache_file)
+
+    heads = {}
+    start = 0
+    for (name, (D, L, theta, Noz_type)), alpha in zip(parsed.items(), alphas):
+        heads[name] = _sharedHead(cache_file, start, alpha, L, theta, Noz_type, name)
+        start += alpha
+    descriptions = {name: tables[name].get('description', '') for name in parsed}
+
+    catalog = HeadCatalog(path, sha256, heads, descriptions)
+    _loaded[memo_key] = catalog
+    return catalog
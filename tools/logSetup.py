@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Logging configuration of the MEPM scripts.
+
+The model modules (Velocity_driven) and tools never print diagnostics: they log them with the standard logging module,
+one logger per module, with lazy %-formatting so that nothing is formatted at disabled levels. Levels are used as:
+    - DEBUG: intermediate values of debug_mode (tables of flow rates, shear rates, viscosities, ...);
+    - INFO: one line per computed result (required pressure, real velocities);
+    - WARNING: conditions that invalidate a result (non-laminar flow, solver not converged, skipped combinations).
+
+Without configuration, Python only reports warnings (on stderr). Entry points call configureLogging, e.g.
+configureLogging('WARNING') for silent production sweeps, or configureLogging('DEBUG', json_file='run.jsonl') for a
+debug run. The JSON lines sink writes one object per record, with the values passed as 'extra' (speed, pressure,
+nozzle indices, ...) as fields, for scripts that analyze a run.
+
+Author: Raphaël Plante
+Date: 2026
+"""
+import json
+import logging
+import sys
+
+import numpy as np
+
+LOGGERS = ('Velocity_driven', 'tools', 'mepm')  # Loggers of the package, configured together
+_STANDARD = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats a record as one JSON object: time, level, logger, message and the 'extra' fields."""
+
+    def format(self, record):
+        entry = {'time': record.created, 'level': record.levelname, 'logger': record.name,
+                 'message': record.getMessage()}
+        for key, value in vars(record).items():
+            if key not in _STANDARD:
+                entry[key] = value.tolist() if isinstance(value, (np.ndarray, np.generic)) else value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configureLogging(level='INFO', json_file=None, stream=sys.stderr, json_level='DEBUG'):
+    """
+    configureLogging sets up the loggers of the package (previous handlers are replaced).
+
+    Inputs:
+        level (str or int): Console level; None for no console output
+        json_file (str): JSON lines file, appended to (None for no machine-readable sink)
+        stream (file-like): Console stream
+        json_level (str or int): Level of the JSON lines sink
+
+    Outputs:
+        handlers (list): Installed handlers
+    """
+    handlers = []
+    if level is not None:
+        console = logging.StreamHandler(stream)
+        console.setLevel(level)
+        console.setFormatter(logging.Formatter('%(message)s'))
+        handlers.append(console)
+    if json_file is not None:
+        sink = logging.FileHandler(json_file, encoding='utf-8')
+        sink.setLevel(json_level)
+        sink.setFormatter(JsonLinesFormatter())
+        handlers.append(sink)
+
+    lowest = min((handler.level for handler in handlers), default=logging.CRITICAL + 1)
+    for name in LOGGERS:
+        logger = logging.getLogger(name)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        for handler in handlers:
+            logger.addHandler(handler)
+        logger.setLevel(lowest)
+        logger.propagate = False
+    return handlers
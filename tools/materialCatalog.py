@@ -0,0 +1,151 @@
+import hashlib
+import os
+import numpy as np
+
+# Parameters stored in column B of every material sheet, in row order
+PARAMETERS = ('rho', 'w', 'f', 'n', 'K', 'eta_inf', 'eta_0', 'tau_0', 'lambda', 'a', 'mP', 'R')
+
+CACHE_VERSION = 2
+
+# Catalogs already loaded in this process, keyed by (path, mtime, size)
+_loaded = {}
+
+
+class MaterialCatalog:
+    """
+    MaterialCatalog holds the parameters of every sheet of a material database, parsed once.
+
+    Attributes:
+        path (str): Absolute path of the material database file
+        sha256 (str): Hash of the material database file content
+        sheet_names (list): Material (sheet) names, in workbook order
+        values (array-like): Parameters of every material (n_sheets x 12), ordered as PARAMETERS
+        errors (array-like): Uncertainty of every parameter (n_sheets x 12), NaN when the sheet does not give it
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+
+    def __init__(self, path, sha256, sheet_names, values, errors):
+        self.path = path
+        self.sha256 = sha256
+        self.sheet_names = list(sheet_names)
+        self.values = values
+        self.errors = errors
+        self._index = {name: i for i, name in enumerate(self.sheet_names)}
+
+    def __contains__(self, sheet):
+        return sheet in self._index
+
+    def __len__(self):
+        return len(self.sheet_names)
+
+    def __getitem__(self, sheet):
+        """Returns the 12 parameters (rho, w, f, n, K, eta_inf, eta_0, tau_0, lmbda, a, mP, R) of a sheet."""
+        if isinstance(sheet, int):
+            sheet = self.sheet_names[sheet]
+        if sheet not in self._index:
+            raise KeyError(f"Material '{sheet}' is not in {self.path}")
+        return tuple(self.values[self._index[sheet]].tolist())
+
+    def asDict(self, sheet):
+        """Returns the parameters of a sheet keyed by their database name."""
+        return dict(zip(PARAMETERS, self[sheet]))
+
+    def uncertainty(self, sheet):
+        """Returns the parameter uncertainties given by a sheet (rows labelled 'dn', 'dK', ...) keyed by name."""
+        if isinstance(sheet, int):
+            sheet = self.sheet_names[sheet]
+        errors = self.errors[self._index[sheet]]
+        return {name: float(err) for name, err in zip(PARAMETERS, errors) if not np.isnan(err)}
+
+
+def _fileHash(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _cachePath(path, cache_dir):
+    if cache_dir is None:
+        cache_dir = os.environ.get('MEPM_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'mepm'))
+    key = hashlib.sha1(path.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f'materials-{key}.npz')
+
+
+def _parseWorkbook(path):
+    """Reads every sheet of the workbook with pandas (the slow path)."""
+    import pandas as pd
+
+    sheets = pd.read_excel(path, sheet_name=None, header=None, usecols="A:B")
+    values = np.zeros((len(sheets), len(PARAMETERS)))
+    errors = np.full((len(sheets), len(PARAMETERS)), np.nan)
+    error_rows = {'d' + name: j for j, name in enumerate(PARAMETERS)}
+    for i, df in enumerate(sheets.values()):
+        if df.shape[1] < 2:
+            continue
+        column = pd.to_numeric(df.iloc[:len(PARAMETERS), 1], errors='coerce').to_numpy(dtype=float)
+        # Sheets written before mP and R existed stop at 'a': missing parameters are 0
+        values[i, :column.size] = np.nan_to_num(column, nan=0.0)
+        # Optional uncertainty rows, labelled 'd' + parameter name in column A
+        for label, value in zip(df.iloc[:, 0], pd.to_numeric(df.iloc[:, 1], errors='coerce')):
+            if isinstance(label, str) and label.strip() in error_rows:
+                errors[i, error_rows[label.strip()]] = value
+    return list(sheets.keys()), values, errors
+
+
+def loadMaterialCatalog(file, cache_dir=None):
+    """
+    loadMaterialCatalog returns the parsed content of a material database (.xls). The workbook is parsed with pandas
+    only the first time; its parameters are then stored in a compact binary cache (npz) keyed by the file's path,
+    modification time and content hash, so later runs reload it without touching Excel.
+
+    Inputs:
+        file (str): Path of the material database file
+        cache_dir (str): Cache directory (default: $MEPM_CACHE_DIR or ~/.cache/mepm)
+
+    Outputs:
+        catalog (MaterialCatalog): Parameters of every material of the database
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+    path = os.path.abspath(file)
+    stat = os.stat(path)
+    memo_key = (path, stat.st_mtime_ns, stat.st_size)
+    if memo_key in _loaded:
+        return _loaded[memo_key]
+
+    cache_file = _cachePath(path, cache_dir)
+    cached = None
+    if os.path.isfile(cache_file):
+        try:
+            with np.load(cache_file, allow_pickle=False) as data:
+                cached = {key: data[key] for key in data.files}
+            if int(cached['version']) != CACHE_VERSION or str(cached['path']) != path:
+                cached = None
+        except (OSError, ValueError, KeyError):
+            cached = None
+
+    if cached is not None and int(cached['mtime_ns']) == stat.st_mtime_ns and int(cached['size']) == stat.st_size:
+        # Fast path: the file was not touched since the cache was written
+        sha256 = str(cached['sha256'])
+        sheet_names, values, errors = cached['sheet_names'].tolist(), cached['values'], cached['errors']
+    else:
+        sha256 = _fileHash(path)
+        if cached is not None and str(cached['sha256']) == sha256:
+            # Same content with a new modification time (copy, checkout...)
+            sheet_names, values, errors = cached['sheet_names'].tolist(), cached['values'], cached['errors']
+        else:
+            sheet_names, values, errors = _parseWorkbook(path)
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = cache_file + f'.{os.getpid()}.tmp.npz'
+        np.savez(tmp_file, version=CACHE_VERSION, path=path, mtime_ns=stat.st_mtime_ns, size=stat.st_size,
+                 sha256=sha256, sheet_names=np.array(sheet_names, dtype=str), values=values, errors=errors)
+        os.replace(tmp_file, cache_file)
+
+    catalog = MaterialCatalog(path, sha256, sheet_names, values, errors)
+    _loaded[memo_key] = catalog
+    return catalog
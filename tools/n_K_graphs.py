@@ -3,7 +3,8 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
-# Data for figure 1
+# Data for figure 1: n and K of the power law fitted per nozzle diameter (see tools/fitRheology.py, e.g.
+# fitRheology.fitLaw("PowerLaw", D, L, Q, P) on the measurements of each diameter)
 d = np.array([150, 200, 250, 330])  # µm
 
 n_25 = np.array([0.3670, 0.4864, 0.6469, 0.6814])
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Content-addressed cache of generateP / generatePBatch results.
+
+The key of a result is the SHA-256 of everything the model reads: material parameters, head geometry (D, L, theta),
+nozzle type, ambient pressure, velocities and the cache format version. When a material catalog is given, its
+content hash is part of the key too, so editing materials.xls invalidates every result computed from the previous
+file; results never go stale, they just stop being hit. Two tiers are used:
+    - an in-memory LRU of the most recent results;
+    - an on-disk tier, one npz file per result, in $MEPM_CACHE_DIR/pressure (default ~/.cache/mepm/pressure), shared by
+      every run and script. The least recently used files are removed past max_disk_entries.
+
+Example:
+    cache = PressureCache(catalog=materialCatalog.loadMaterialCatalog('materials.xls'))
+    P, eta, SR, Q, deta, dP, dRi, dSR = cache.generatePBatch(rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda,
+                                                             a, P_amb, Noz_type, R, mP)
+
+Author: Raphaël Plante
+Date: 2026
+"""
+import collections
+import hashlib
+import logging
+import os
+import tempfile
+import numpy as np
+
+from Velocity_driven import generateP, generatePBatch
+
+CACHE_VERSION = 2  # Bump when the model equations change, to invalidate the stored results
+OUTPUTS = ('P', 'eta', 'SR', 'Q', 'deta', 'dP', 'dRi', 'dSR')
+
+logger = logging.getLogger(__name__)
+
+
+def _typeKey(Noz_type):
+    """
+    Text of the nozzle type(s) hashed in a key: every element is written out, since str() of a large array is
+    truncated with '...' and would give two different per-nozzle layouts the same key.
+    """
+    if isinstance(Noz_type, str):
+        return Noz_type
+    return '|'.join(map(repr, np.ravel(np.asarray(Noz_type, dtype=object))))
+
+
+def _defaultDir():
+    return os.path.join(os.environ.get('MEPM_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'mepm')),
+                        'pressure')
+
+
+class PressureCache:
+    """
+    PressureCache memoizes the pressure model (see the module description).
+
+    Inputs:
+        catalog (MaterialCatalog): Material catalog the parameters come from (its content hash is part of the keys)
+        cache_dir (str): On-disk tier directory, None for the default one, False for memory only
+        maxsize (int): Number of results kept in memory
+        max_disk_entries (int): Number of results kept on disk
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+
+    def __init__(self, catalog=None, cache_dir=None, maxsize=256, max_disk_entries=10000):
+        self.namespace = catalog.sha256 if catalog is not None else ''
+        self.cache_dir = _defaultDir() if cache_dir is None else cache_dir
+        self.maxsize = maxsize
+        self.max_disk_entries = max_disk_entries
+        self._memory = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, kind, rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP):
+        """Returns the hexadecimal key of a model evaluation."""
+        sha = hashlib.sha256()
+        sha.update(f'{CACHE_VERSION}|{kind}|{self.namespace}|{_typeKey(Noz_type)}|'.encode('utf-8'))
+        for x in (rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, R, mP):
+            x = np.ascontiguousarray(x, dtype=np.float64)
+            sha.update(str(x.shape).encode('ascii'))
+            sha.update(x.tobytes())
+        return sha.hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.npz')
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _load(self, key):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        if not self.cache_dir:
+            return None
+        file = self._file(key)
+        try:
+            with np.load(file, allow_pickle=False) as data:
+                result = tuple(data[name] for name in OUTPUTS)
+            os.utime(file)  # least recently used files are pruned first
+        except (OSError, ValueError, KeyError):
+            return None
+        result = tuple(x.item() if x.ndim == 0 else x for x in result)
+        self._remember(key, result)
+        return result
+
+    def _store(self, key, result):
+        self._remember(key, result)
+        if not self.cache_dir:
+            return
+        file = self._file(key)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(file), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                np.savez(fh, **dict(zip(OUTPUTS, result)))
+            os.replace(tmp_file, file)
+        except OSError:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            return
+        self._prune()
+
+    def _prune(self):
+        files = [entry for sub in os.scandir(self.cache_dir) if sub.is_dir()
+                 for entry in os.scandir(sub.path) if entry.name.endswith('.npz')]
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        for entry in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def _cached(self, kind, function, args, debug_mode):
+        key = self.key(kind, *args)
+        result = self._load(key)
+        if result is not None:
+            self.hits += 1
+            if debug_mode:
+                logger.debug('%s: result loaded from the cache (%s)', kind, key[:12])
+        else:
+            self.misses += 1
+            result = function(*args, debug_mode)
+            self._store(key, result)
+        # Callers get their own copies, so that modifying them cannot corrupt the cache
+        return tuple(np.array(x) if isinstance(x, np.ndarray) else x for x in result)
+
+    def generateP(self, rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP,
+                  debug_mode=False):
+        """Cached generateP.generateP (same inputs and outputs)."""
+        return self._cached('generateP', generateP.generateP,
+                            (rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP),
+                            debug_mode)
+
+    def generatePBatch(self, rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP,
+                       debug_mode=False):
+        """Cached generatePBatch.generatePBatch (same inputs and outputs)."""
+        return self._cached('generatePBatch', generatePBatch.generatePBatch,
+                            (rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP),
+                            debug_mode)
+
+    def clear(self):
+        """Empties the in-memory tier (the on-disk tier is shared with other processes and left as it is)."""
+        self._memory.clear()
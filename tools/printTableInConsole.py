@@ -1,9 +1,29 @@
-import pandas as pd
+import logging
 
 
-def printTableInConsole(data):
+def printTableInConsole(data, title=None, logger=None, level=logging.DEBUG):
+    """
+    printTableInConsole displays an array as a table. With a logger, the table is logged instead of printed, and only
+    formatted when the logger is enabled for the level.
+
+    Inputs:
+        data (array-like): Table to display
+        title (str): Line displayed above the table
+        logger (logging.Logger): Logger to send the table to, None to print it
+        level (int): Logging level of the table
+    """
+    if logger is not None and not logger.isEnabledFor(level):
+        return
+
+    import pandas as pd  # only loaded when a table is actually displayed
+
     # Constructing the DataFrame
     df = pd.DataFrame(data)
 
     # Displaying the DataFrame
-    print(df)
+    if logger is not None:
+        logger.log(level, '%s\n%s', title or '', df)
+    else:
+        if title:
+            print(title)
+        print(df)
@@ -1,23 +1,19 @@
-import pandas as pd
+from tools import materialCatalog
 
 
 def readMaterial(file, sheet):
-    # Read data from Excel file into DataFrame
-    df = pd.read_excel(file, sheet_name=sheet, header=None, usecols="B")
-
-    # Extract material properties from DataFrame
-    rho = df.iloc[0, 0]
-    w = df.iloc[1, 0]
-    f = df.iloc[2, 0]
-    n = df.iloc[3, 0]
-    k = df.iloc[4, 0]
-    eta_inf = df.iloc[5, 0]
-    eta_0 = df.iloc[6, 0]
-    tau_0 = df.iloc[7, 0]
-    lmbda = df.iloc[8, 0]
-    a = df.iloc[9, 0]
-    mP = df.iloc[10, 0]
-    R = df.iloc[11, 0]
+    """
+    readMaterial returns the properties of one material of the database. The workbook is parsed once and cached by
+    materialCatalog, so repeated lookups do not re-read the Excel file.
+
+    Inputs:
+        file (str): Path of the material database file
+        sheet (str): Material (sheet) name
+
+    Outputs:
+        rho, w, f, n, k, eta_inf, eta_0, tau_0, lmbda, a, mP, R (numeric): Material properties
+    """
+    rho, w, f, n, k, eta_inf, eta_0, tau_0, lmbda, a, mP, R = materialCatalog.loadMaterialCatalog(file)[sheet]
 
     return rho, w, f, n, k, eta_inf, eta_0, tau_0, lmbda, a, mP, R
 
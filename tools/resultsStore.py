@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Columnar, appendable results store.
+
+A store is a directory holding one raw binary file per column and a meta.json file describing the tables (column
+dtypes, trailing shapes, number of rows) and the metadata of every run written to it:
+
+    run.mepm/
+        meta.json
+        sweep/run.bin, sweep/v.bin, sweep/P.bin              one row per (run, velocity)
+        nozzle/run.bin, nozzle/v.bin, nozzle/nozzle.bin, ... one row per (run, velocity, nozzle)
+
+Appending only writes at the end of the column files, and reading maps them in memory (numpy.memmap), so a
+million-row sweep is loaded without parsing anything. The row count in meta.json is only updated once the data is
+written, so an interrupted append leaves the store readable (the extra bytes are dropped by the next append).
+One process writes to a store at a time.
+
+Author: Raphaël Plante
+Date: 2026
+"""
+import json
+import os
+import numpy as np
+
+STORE_VERSION = 1
+
+# Per-nozzle outputs of generatePBatch, stored in the 'nozzle' table
+NOZZLE_COLUMNS = ('eta', 'SR', 'Q', 'deta', 'dP', 'dRi', 'dSR')
+
+
+class ResultsStore:
+    """
+    ResultsStore reads and appends columnar tables in a store directory.
+
+    Inputs:
+        path (str): Store directory (created if it does not exist)
+
+    Author: Raphaël Plante
+    Date: 2026
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._meta_file = os.path.join(path, 'meta.json')
+        if os.path.isfile(self._meta_file):
+            with open(self._meta_file, encoding='utf-8') as fh:
+                self.meta = json.load(fh)
+            if self.meta.get('version') != STORE_VERSION:
+                raise ValueError(f"Unsupported results store version in {path}")
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.meta = {'version': STORE_VERSION, 'tables': {}, 'runs': []}
+            self._writeMeta()
+
+    def _writeMeta(self):
+        tmp_file = self._meta_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as fh:
+            json.dump(self.meta, fh, indent=1)
+        os.replace(tmp_file, self._meta_file)
+
+    def _columnFile(self, table, column):
+        return os.path.join(self.path, table, column + '.bin')
+
+    @property
+    def runs(self):
+        """Metadata of every run, indexed by run id."""
+        return self.meta['runs']
+
+    def tables(self):
+        return list(self.meta['tables'])
+
+    def columns(self, table):
+        return list(self.meta['tables'][table]['columns'])
+
+    def rows(self, table):
+        return self.meta['tables'][table]['rows'] if table in self.meta['tables'] else 0
+
+    def addRun(self, metadata):
+        """Records the metadata of a new run (JSON-serializable dict) and returns its run id."""
+        self.meta['runs'].append(metadata)
+        self._writeMeta()
+        return len(self.meta['runs']) - 1
+
+    def append(self, table, **columns):
+        """
+        Appends rows to a table. Every column is an array whose first axis is the row axis; the trailing shape and
+        dtype of a column are fixed by the first append.
+        """
+        arrays = {name: np.ascontiguousarray(values) for name, values in columns.items()}
+        n_rows = {values.shape[0] for values in arrays.values()}
+        if len(n_rows) != 1:
+            raise ValueError("All the columns appended to a table must have the same number of rows.")
+        n_rows = n_rows.pop()
+
+        schema = self.meta['tables'].get(table)
+        if schema is None:
+            schema = {'rows': 0, 'columns': {name: {'dtype': values.dtype.newbyteorder('<').str,
+                                                    'shape': list(values.shape[1:])}
+                                             for name, values in arrays.items()}}
+            os.makedirs(os.path.join(self.path, table), exist_ok=True)
+        if set(arrays) != set(schema['columns']):
+            raise ValueError(f"Table '{table}' has the columns {sorted(schema['columns'])}.")
+
+        for name, values in arrays.items():
+            column = schema['columns'][name]
+            if list(values.shape[1:]) != column['shape']:
+                raise ValueError(f"Column '{name}' of table '{table}' has rows of shape {tuple(column['shape'])}.")
+            dtype = np.dtype(column['dtype'])
+            row_bytes = dtype.itemsize * int(np.prod(column['shape'], dtype=int))
+            with open(self._columnFile(table, name), 'ab') as fh:
+                fh.truncate(schema['rows'] * row_bytes)  # drop the leftovers of an interrupted append
+                fh.seek(0, os.SEEK_END)
+                fh.write(values.astype(dtype, copy=False).tobytes())
+
+        schema['rows'] += n_rows
+        self.meta['tables'][table] = schema
+        self._writeMeta()
+
+    def read(self, table, column, mmap=True):
+        """Returns a column of a table, memory-mapped read-only by default."""
+        schema = self.meta['tables'][table]
+        spec = schema['columns'][column]
+        shape = (schema['rows'], *spec['shape'])
+        if schema['rows'] == 0:
+            return np.empty(shape, dtype=spec['dtype'])
+        if mmap:
+            return np.memmap(self._columnFile(table, column), dtype=spec['dtype'], mode='r', shape=shape)
+        count = int(np.prod(shape))
+        return np.fromfile(self._columnFile(table, column), dtype=spec['dtype'], count=count).reshape(shape)
+
+    def readTable(self, table, mmap=True):
+        """Returns every column of a table as a dict of arrays."""
+        return {column: self.read(table, column, mmap) for column in self.columns(table)}
+
+    def toDataFrame(self, table):
+        """Returns a table as a pandas DataFrame (one-dimensional columns only)."""
+        import pandas as pd
+
+        return pd.DataFrame({name: np.asarray(values) for name, values in self.readTable(table).items()
+                             if values.ndim == 1})
+
+    def export(self, table, path):
+        """Exports a table to Parquet (.parquet), HDF5 (.h5) or CSV (.csv) through pandas."""
+        df = self.toDataFrame(table)
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.parquet':
+            df.to_parquet(path)
+        elif extension in ('.h5', '.hdf5'):
+            df.to_hdf(path, key=table, mode='w')
+        elif extension == '.csv':
+            df.to_csv(path, index=False)
+        else:
+            raise ValueError(f"Unknown export format '{extension}'.")
+
+
+def writeRun(store, metadata, v, P, eta, SR, Q, deta, dP, dRi, dSR):
+    """
+    writeRun appends the output of generatePBatch for one head (P: nv, per-nozzle arrays: nv x alpha) to a results
+    store, as one new run.
+
+    Inputs:
+        store (ResultsStore or str): Results store, or its directory
+        metadata (dict): Run metadata (material, parameters, head, nozzle type...), JSON-serializable
+        v (array-like): Nozzle exit velocities (nv)
+        P, eta, SR, Q, deta, dP, dRi, dSR (array-like): Outputs of generatePBatch
+
+    Outputs:
+        run (int): Id of the new run
+    """
+    if isinstance(store, str):
+        store = ResultsStore(store)
+    v = np.asarray(v, dtype=float)
+    per_nozzle = [np.asarray(x, dtype=float) for x in (eta, SR, Q, deta, dP, dRi, dSR)]
+    nv, alpha = per_nozzle[0].shape
+
+    run = store.addRun(metadata)
+    store.append('sweep', run=np.full(nv, run, dtype=np.int32), v=v, P=np.asarray(P, dtype=float))
+    columns = {name: values.ravel() for name, values in zip(NOZZLE_COLUMNS, per_nozzle)}
+    store.append('nozzle', run=np.full(nv * alpha, run, dtype=np.int32), v=np.repeat(v, alpha),
+                 nozzle=np.tile(np.arange(alpha, dtype=np.int32), nv), **columns)
+    return run
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Multi-material, multi-head parameter sweeps.
+
+Every (material, head, nozzle type) combination is evaluated over the whole velocity range with generatePBatch, and the
+combinations are spread over a process pool. Each worker receives the parsed material catalog once, when it starts.
+Heads loaded from a head catalog (tools/headCatalog.py) reach the workers by reference to their shared geometry.
+
+Example:
+    heads = {'MN26': {'D': D, 'L': [6.5, 0.01], 'theta': math.radians(5.3)}}
+    table, failures = runSweep('materials.xls', 'all', heads, ['cyl'], np.linspace(10, 250, 100))
+    table, failures = runSweep('materials.xls', 'all', headCatalog.loadHeadCatalog('heads.toml'), ['cyl'], v)
+    runSweep('materials.xls', 'all', heads, ['cyl'], np.linspace(10, 250, 100), store='results/sweep.mepm')
+
+Author: Raphaël Plante
+Date: 2026
+"""
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from tools import materialCatalog
+from tools.resultsStore import NOZZLE_COLUMNS, ResultsStore
+from Velocity_driven import generatePBatch, printHead
+
+logger = logging.getLogger(__name__)
+
+# Catalog of the current worker process, set once by _initWorker
+_catalog = None
+
+
+def _initWorker(catalog):
+    global _catalog
+    _catalog = catalog
+
+
+def _headGeometry(head):
+    """Diameter array (or PrintHead), length and half-cone angle of a head given as a PrintHead or a dict."""
+    if isinstance(head, printHead.PrintHead):
+        return head, head.L, head.theta
+    return np.asarray(head['D'], dtype=float), np.asarray(head['L'], dtype=float), head.get('theta', 0.0)
+
+
+def _runCombination(material, head_name, head, Noz_type, v, P_amb):
+    """Evaluates one (material, head, nozzle type) combination in a worker; returns its rows as columns."""
+    rho, w, f, n, K, eta_inf, eta_0, tau_0, lmbda, a, mP, R = _catalog[material]
+    D, L, theta = _headGeometry(head)
+
+    P, *per_nozzle = generatePBatch.generatePBatch(
+        rho, v, D, L, theta, n, K, eta_0, eta_inf, tau_0, lmbda, a, P_amb, Noz_type, R, mP)
+
+    nv, alpha = per_nozzle[0].shape
+    columns = {
+        'material': np.full(nv * alpha, material, dtype=object),
+        'head': np.full(nv * alpha, head_name, dtype=object),
+        'Noz_type': np.full(nv * alpha, Noz_type, dtype=object),
+        'v': np.repeat(v, alpha),
+        'nozzle': np.tile(np.arange(alpha), nv),
+        'P': np.repeat(P, alpha),
+    }
+    for name, values in zip(NOZZLE_COLUMNS, per_nozzle):
+        columns[name] = np.asarray(values).ravel()
+    return columns
+
+
+def _storeCombination(store, catalog, columns, heads, v, P_amb):
+    """Appends one combination to a results store as a run (the 'sweep' and 'nozzle' tables)."""
+    material, head_name, Noz_type = columns['material'][0], columns['head'][0], columns['Noz_type'][0]
+    alpha = columns['nozzle'].size // v.size
+    D, L, theta = _headGeometry(heads[head_name])
+    metadata = {'material': material, 'material_file': catalog.path, 'material_sha256': catalog.sha256,
+                'parameters': dict(zip(materialCatalog.PARAMETERS, catalog[material])),
+                'head': head_name, 'Noz_type': Noz_type, 'D': np.asarray(D).tolist(),
+                'L': L.tolist(), 'theta': theta, 'P_amb': P_amb}
+    run = store.addRun(metadata)
+    store.append('sweep', run=np.full(v.size, run, dtype=np.int32), v=v, P=columns['P'][::alpha])
+    store.append('nozzle', run=np.full(columns['v'].size, run, dtype=np.int32), v=columns['v'],
+                 nozzle=columns['nozzle'].astype(np.int32), **{name: columns[name] for name in NOZZLE_COLUMNS})
+
+
+def runSweep(material_file, materials, heads, nozzle_types, velocities, P_amb=101325, max_workers=None, store=None):
+    """
+    runSweep evaluates every combination of materials, heads, nozzle types and velocities and returns one consolidated
+    table.
+
+    Inputs:
+        material_file (str): Material database file (.xls)
+        materials (list or str): Material (sheet) names, or "all" for every sheet of the database
+        heads (dict or HeadCatalog): Head name -> PrintHead, or {'D': diameter array (3 x alpha),
+                                     'L': [length, error], 'theta': half-cone angle}
+        nozzle_types (list): Nozzle types to evaluate ("cyl", "tapered")
+        velocities (array-like): Nozzle exit velocities (mm/s)
+        P_amb (numeric): Ambient pressure
+        max_workers (int): Number of worker processes (1 runs everything in the current process)
+        store (str or ResultsStore): Optional results store; every combination is appended to it as one run
+
+    Outputs:
+        table (pandas.DataFrame): One row per combination, velocity and nozzle, with columns material, head, Noz_type,
+                                  v, nozzle, P, eta, SR, Q, deta, dP, dRi, dSR
+        failures (list): (material, head, Noz_type, error message) of the combinations that could not be computed
+    """
+    import pandas as pd
+
+    catalog = materialCatalog.loadMaterialCatalog(material_file)
+    if isinstance(materials, str):
+        materials = catalog.sheet_names if materials == "all" else [materials]
+    v = np.atleast_1d(np.asarray(velocities, dtype=float))
+
+    combinations = list(itertools.product(materials, heads, nozzle_types))
+    results = []
+    failures = []
+
+    if max_workers == 1:
+        _initWorker(catalog)
+        for material, head_name, Noz_type in combinations:
+            try:
+                results.append(_runCombination(material, head_name, heads[head_name], Noz_type, v, P_amb))
+            except (ValueError, KeyError, ArithmeticError) as e:
+                failures.append((material, head_name, Noz_type, str(e)))
+    else:
+        max_workers = max_workers or os.cpu_count()
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_initWorker, initargs=(catalog,)) as pool:
+            futures = [(combination, pool.submit(_runCombination, combination[0], combination[1],
+                                                 heads[combination[1]], combination[2], v, P_amb))
+                       for combination in combinations]
+            for (material, head_name, Noz_type), future in futures:
+                try:
+                    results.append(future.result())
+                except (ValueError, KeyError, ArithmeticError) as e:
+                    failures.append((material, head_name, Noz_type, str(e)))
+
+    if store is not None:
+        if isinstance(store, str):
+            store = ResultsStore(store)
+        for columns in results:
+            _storeCombination(store, catalog, columns, heads, v, P_amb)
+
+    for material, head_name, Noz_type, message in failures:
+        logger.warning('Sweep: %s / %s / %s skipped: %s', material, head_name, Noz_type, message,
+                       extra={'material': material, 'head': head_name, 'Noz_type': Noz_type})
+
+    if not results:
+        return pd.DataFrame(columns=['material', 'head', 'Noz_type', 'v', 'nozzle', 'P', *NOZZLE_COLUMNS]), failures
+    table = pd.DataFrame({name: np.concatenate([r[name] for r in results]) for name in results[0]})
+    return table, failures